@@ -1,24 +1,16 @@
 import streamlit as st
 import os
-from minisql.catalog.table_manager import TableManager
-from minisql.index.index_manager import IndexManager
-from minisql.query.executer import QueryExecutor
-from minisql.query.tokenizer import Tokenizer
-from minisql.query.parser import Parser
+import minisql
 
 st.set_page_config(page_title="MiniSQL Database Engine", layout="wide")
 st.title("MiniSQL Management System")
 
 DB_PATH = r"C:\Users\poudy\Downloads\DSA\data\data.db"
+MAX_DISPLAY_ROWS = 1000
 
-if "tm" not in st.session_state:
-    st.session_state.tm = TableManager(db_path=DB_PATH)
-
-if "im" not in st.session_state:
-    st.session_state.im = IndexManager()
-
-if "executor" not in st.session_state:
-    st.session_state.executor = QueryExecutor(st.session_state.tm, st.session_state.im)
+# Connections share one engine per database, so reruns do not reload it.
+connection = minisql.connect(DB_PATH)
+tm = connection.engine.table_manager
 
 with st.sidebar:
     st.header("Database Metadata")
@@ -26,12 +18,12 @@ with st.sidebar:
     if os.path.exists(DB_PATH):
         st.caption(f"Connected to: {DB_PATH}")
     
-    tables = st.session_state.tm.list_tables()
+    tables = tm.list_tables()
     if tables:
         for table_name in tables:
-            schema = st.session_state.tm.get_table_schema(table_name)
-            rows = getattr(schema, 'data', [])
-            st.write(f"**Table:** `{table_name}` ({len(rows)} rows)")
+            schema = tm.get_table_schema(table_name)
+            row_count = tm.row_count(table_name)
+            st.write(f"**Table:** `{table_name}` ({row_count} rows)")
             with st.expander("Columns"):
                 for col in schema.columns:
                     pk = " (PK)" if col.primary_key else ""
@@ -47,14 +39,22 @@ query = st.text_area("SQL Query Editor:", height=150, placeholder="Enter your SQ
 if st.button("Run Query"):
     if query.strip():
         try:
-            tokens = Tokenizer(query).tokenize()
-            ast = Parser(tokens).parse()
-            result = st.session_state.executor.execute(ast)
+            cursor = connection.execute(query)
+            if cursor.description is not None:
+                names = [column[0] for column in cursor.description]
+                # Pull one row past the display limit to know whether to say so.
+                rows = [dict(zip(names, row)) for row in cursor.fetchmany(MAX_DISPLAY_ROWS + 1)]
+                cursor.close()
+                result = rows[:MAX_DISPLAY_ROWS]
+            else:
+                result = cursor.statusmessage
             
             st.subheader("Query Result")
             if isinstance(result, list):
                 if result:
                     st.table(result)
+                    if len(rows) > MAX_DISPLAY_ROWS:
+                        st.caption(f"Showing the first {MAX_DISPLAY_ROWS} rows.")
                 else:
                     st.warning("Empty set.")
             else:
@@ -0,0 +1,52 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from minisql.catalog.table_manager import TableManager
+from minisql.index.index_manager import IndexManager
+from minisql.query.executer import QueryExecutor
+
+QUERIES = [
+    "SELECT SUM(amount) FROM {}",
+    "SELECT COUNT(*) FROM {} WHERE amount > 500.0",
+    "SELECT region, COUNT(*) FROM {} GROUP BY region",
+]
+
+
+def load(path: Path, rows: int) -> QueryExecutor:
+    tm = TableManager(db_path=str(path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(path / "indices", tm.buffer_pool))
+    data = [(i, i % 1000 + 0.5, f"region-{i % 8}", i % 3 == 0, f"note {i:08d} " * 6) for i in range(rows)]
+    for table, options in (("rows_t", ""), ("cols_t", " WITH (format = columnar)")):
+        executor.execute_sql(f"CREATE TABLE {table} (id INT PRIMARY KEY, amount FLOAT, region STRING, "
+                             f"flag BOOL, note STRING){options}")
+        executor.bulk_insert(table, data)
+    tm.checkpoint()
+    return executor
+
+
+def timed(executor: QueryExecutor, query: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        executor.execute_sql(query)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytic query time, row vs columnar tables")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        executor = load(Path(tmp), args.rows)
+        print(f"{'query':<50} {'row ms':>9} {'columnar ms':>12} {'speedup':>8}")
+        for query in QUERIES:
+            row = timed(executor, query.format("rows_t"), args.repeat)
+            columnar = timed(executor, query.format("cols_t"), args.repeat)
+            print(f"{query.format('t'):<50} {row * 1000:>9.1f} {columnar * 1000:>12.1f} {row / columnar:>8.1f}")
+        executor.table_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+from minisql.cache.buffer_pool import BufferPool
+from minisql.catalog.table_manager import TableManager
+from minisql.concurrency.lock_manager import EXCLUSIVE, LockManager
+from minisql.index.index_manager import IndexManager
+from minisql.query.executer import QueryExecutor
+
+
+# Shared locks let readers of one table interleave instead of queueing;
+# they do not make the Python-level work of a query run on several cores,
+# which the GIL serializes. On one core both columns stay flat as threads
+# are added. What shared locks buy is that a slow reader does not hold up
+# the others, not throughput from more threads.
+
+
+class ExclusiveLockManager(LockManager):
+    # The baseline: every statement excludes every other, as if the whole
+    # database sat behind one lock.
+    def acquire(self, resource, mode=EXCLUSIVE, owner=None, timeout=None):
+        super().acquire(resource, EXCLUSIVE, owner, timeout)
+
+
+def load(path: Path, rows: int, pool_pages: int, lock_manager: LockManager) -> QueryExecutor:
+    tm = TableManager(db_path=str(path / "data.db"), buffer_pool=BufferPool(pool_pages))
+    executor = QueryExecutor(tm, IndexManager(path / "indices", tm.buffer_pool), lock_manager=lock_manager)
+    if "items" not in tm.list_tables():
+        executor.execute_sql("CREATE TABLE items (id INT PRIMARY KEY, grp INT, name STRING)")
+        executor.bulk_insert("items", ((i, i % 100, f"item-{i:08d}" * 4) for i in range(rows)))
+        tm.checkpoint()
+    return executor
+
+
+def run(executor: QueryExecutor, threads: int, seconds: float, rows: int) -> float:
+    done = [0] * threads
+    stop = time.perf_counter() + seconds
+    statement = executor.prepare("SELECT name FROM items WHERE id = ?")
+    scan = executor.prepare("SELECT COUNT(*) FROM items WHERE grp = ?")
+
+    def reader(n):
+        key = n
+        while time.perf_counter() < stop:
+            # Mostly point lookups, with a scan that misses the pool now and then.
+            if done[n] % 50 == 49:
+                scan.execute((key % 100,))
+            else:
+                statement.execute((key * 7919 % rows,))
+            key += threads
+            done[n] += 1
+
+    workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(done) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read throughput by thread count, shared vs exclusive locks "
+                                                 "(GIL-bound: expect no scaling on one core)")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--pool-pages", type=int, default=64)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp)
+        print(f"{'threads':>7} {'shared qps':>12} {'exclusive qps':>14} {'speedup':>8}")
+        for threads in args.threads:
+            shared = load(path, args.rows, args.pool_pages, LockManager())
+            shared_qps = run(shared, threads, args.seconds, args.rows)
+            shared.table_manager.close()
+            exclusive = load(path, args.rows, args.pool_pages, ExclusiveLockManager())
+            exclusive_qps = run(exclusive, threads, args.seconds, args.rows)
+            exclusive.table_manager.close()
+            print(f"{threads:>7} {shared_qps:>12.0f} {exclusive_qps:>14.0f} {shared_qps / exclusive_qps:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from minisql.catalog.schema import Column
+from minisql.catalog.table_manager import TableManager
+from minisql.storage.row_codec import RowCodec
+from minisql.storage.serializer import Serializer
+
+COLUMNS = [Column("id", "INT", primary_key=True), Column("name", "STRING"), Column("email", "STRING"),
+           Column("age", "INT"), Column("score", "FLOAT"), Column("active", "BOOL")]
+
+
+def make_rows(count: int) -> list[dict]:
+    return [{"id": i, "name": f"user {i}", "email": f"user{i}@example.com", "age": i % 90,
+             "score": None if i % 10 == 0 else i / 7, "active": i % 2 == 0} for i in range(count)]
+
+
+def per_row(fn, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def scan_time(path: Path, row_format: str, rows: list[dict]) -> tuple[float, int]:
+    tm = TableManager(db_path=str(path / row_format / "data.db"), row_format=row_format)
+    tm.create_table("users", COLUMNS)
+    for row in rows:
+        tm.insert_row("users", row)
+    tm.checkpoint()
+    start = time.perf_counter()
+    sum(1 for _ in tm.scan("users"))
+    elapsed = time.perf_counter() - start
+    size = (path / row_format / "tables" / "users.heap").stat().st_size
+    tm.close()
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary row codec vs JSON rows")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    codec = RowCodec(COLUMNS)
+    json_rows = [Serializer.serialize_row(row) for row in rows]
+    binary_rows = [Serializer.serialize_row(row, codec) for row in rows]
+    print(f"{'':<14} {'json':>10} {'binary':>10} {'ratio':>7}")
+    encode = (per_row(Serializer.serialize_row, rows, args.repeat),
+              per_row(lambda row: Serializer.serialize_row(row, codec), rows, args.repeat))
+    decode = (per_row(Serializer.deserialize_row, json_rows, args.repeat),
+              per_row(lambda data: Serializer.deserialize_row(data, codec), binary_rows, args.repeat))
+    size = (sum(map(len, json_rows)) / len(rows), sum(map(len, binary_rows)) / len(rows))
+    for label, (text, binary) in (("encode us/row", encode), ("decode us/row", decode), ("bytes/row", size)):
+        print(f"{label:<14} {text:>10.2f} {binary:>10.2f} {text / binary:>7.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (json_scan, json_size), (binary_scan, binary_size) = (scan_time(Path(tmp), f, rows) for f in ("json", "binary"))
+    print(f"{'heap scan ms':<14} {json_scan * 1000:>10.1f} {binary_scan * 1000:>10.1f} {json_scan / binary_scan:>7.2f}")
+    print(f"{'heap KiB':<14} {json_size / 1024:>10.0f} {binary_size / 1024:>10.0f} {json_size / binary_size:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+from minisql.database import (
+    BINARY, DATETIME, NUMBER, ROWID, STRING, Connection, ConnectionPool, DataError, DatabaseError, Error,
+    IntegrityError, InterfaceError, InternalError, NotSupportedError, OperationalError, ProgrammingError, Warning,
+    apilevel, connect, paramstyle, threadsafety,
+)
@@ -0,0 +1,273 @@
+import threading
+from collections import defaultdict
+from typing import Hashable, Optional
+from minisql.cache.lru_cache import LRUReplacer
+from minisql.config.settings import BUFFER_POOL_SIZE, BUFFER_POOL_POLICY
+from minisql.storage.file_manager import FileManager
+from minisql.storage.page import Page, PAGE_SIZE
+from minisql.utils.exceptions import StorageError
+
+
+class ClockReplacer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._evictable = [False] * capacity
+        self._referenced = [False] * capacity
+        self._hand = 0
+        self._size = 0
+
+    def record_access(self, frame_id: int) -> None:
+        self._referenced[frame_id] = True
+
+    def pin(self, frame_id: int) -> None:
+        if self._evictable[frame_id]:
+            self._evictable[frame_id] = False
+            self._size -= 1
+
+    def unpin(self, frame_id: int) -> None:
+        if not self._evictable[frame_id]:
+            self._evictable[frame_id] = True
+            self._size += 1
+        self._referenced[frame_id] = True
+
+    def remove(self, frame_id: int) -> None:
+        self.pin(frame_id)
+        self._referenced[frame_id] = False
+
+    def victim(self) -> Optional[int]:
+        if not self._size:
+            return None
+        while True:
+            frame_id = self._hand
+            self._hand = (self._hand + 1) % self.capacity
+            if not self._evictable[frame_id]:
+                continue
+            if self._referenced[frame_id]:
+                self._referenced[frame_id] = False
+                continue
+            self.remove(frame_id)
+            return frame_id
+
+    def __len__(self) -> int:
+        return self._size
+
+
+REPLACERS = {"lru": LRUReplacer, "clock": ClockReplacer}
+
+
+class Frame:
+    def __init__(self, frame_id: int):
+        self.frame_id = frame_id
+        self.key: Optional[tuple] = None
+        self.file_manager: Optional[FileManager] = None
+        self.page: Optional[Page] = None
+        self.pin_count = 0
+        self.dirty = False
+        self.unlogged = False
+        # Set while the page is being read in; other fetchers wait on it.
+        self.loading: Optional[threading.Event] = None
+
+
+class BufferPool:
+    def __init__(self, capacity: int = BUFFER_POOL_SIZE, policy: str = BUFFER_POOL_POLICY):
+        if capacity < 1:
+            raise ValueError("Buffer pool capacity must be >= 1")
+        if policy not in REPLACERS:
+            raise ValueError(f"Unknown eviction policy {policy!r}, expected one of {sorted(REPLACERS)}")
+        self.capacity = capacity
+        self.policy = policy
+        self.frames = [Frame(i) for i in range(capacity)]
+        self.page_table: dict[Hashable, int] = {}
+        self.free_frames = list(range(capacity - 1, -1, -1))
+        self.replacer = REPLACERS[policy](capacity)
+        self.wal = None
+        self._unsynced: set[FileManager] = set()
+        # Guards the frames and page table. Page reads happen outside it, so
+        # threads missing on different pages read them at the same time.
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+    def attach_wal(self, wal) -> None:
+        self.wal = wal
+
+    def fetch_page(self, file_manager: FileManager, filename: str, page_id: int) -> Page:
+        key = self._key(file_manager, filename, page_id)
+        with self._lock:
+            frame_id = self.page_table.get(key)
+            if frame_id is not None:
+                self.hits += 1
+                frame = self.frames[frame_id]
+                self._pin(frame)
+                loading = frame.loading
+                if loading is None:
+                    return frame.page
+            else:
+                self.misses += 1
+                frame = self._allocate_frame()
+                self._install(frame, key, file_manager, None, dirty=False)
+                frame.loading = threading.Event()
+                loading = None
+
+        if loading is not None:
+            # Another thread is reading this page in.
+            loading.wait()
+            if frame.page is None or frame.key != key:
+                raise StorageError(f"Failed to read page {page_id} of {filename}")
+            return frame.page
+
+        try:
+            # Copied once, from the OS page cache into the frame.
+            data = file_manager.view_page(filename, page_id, PAGE_SIZE)
+        except Exception:
+            with self._lock:
+                loading, frame.loading = frame.loading, None
+                self._release(frame)
+            loading.set()
+            raise
+        with self._lock:
+            frame.page = Page(page_id, data)
+            loading, frame.loading = frame.loading, None
+        loading.set()
+        return frame.page
+
+    def new_page(self, file_manager: FileManager, filename: str, page_id: int) -> Page:
+        key = self._key(file_manager, filename, page_id)
+        with self._lock:
+            if key in self.page_table:
+                raise StorageError(f"Page {page_id} of {filename} is already buffered")
+            frame = self._allocate_frame()
+            self._install(frame, key, file_manager, Page(page_id), dirty=True)
+            return frame.page
+
+    def unpin_page(self, file_manager: FileManager, filename: str, page_id: int, dirty: bool = False) -> None:
+        with self._lock:
+            frame_id = self.page_table.get(self._key(file_manager, filename, page_id))
+            if frame_id is None:
+                raise StorageError(f"Page {page_id} of {filename} is not buffered")
+            frame = self.frames[frame_id]
+            if frame.pin_count <= 0:
+                raise StorageError(f"Page {page_id} of {filename} is not pinned")
+            if dirty:
+                frame.dirty = frame.unlogged = True
+            frame.pin_count -= 1
+            if frame.pin_count == 0:
+                self.replacer.unpin(frame_id)
+
+    def log_dirty_pages(self) -> int:
+        if self.wal is None:
+            return 0
+        with self._lock:
+            return self._log_frames([f for f in self.frames if f.unlogged])
+
+    def flush_page(self, file_manager: FileManager, filename: str, page_id: int) -> None:
+        with self._lock:
+            frame_id = self.page_table.get(self._key(file_manager, filename, page_id))
+            if frame_id is not None and self.frames[frame_id].dirty:
+                self._write_frames([self.frames[frame_id]])
+
+    def flush_file(self, file_manager: FileManager, filename: str) -> None:
+        prefix = (str(file_manager.base_dir), filename)
+        with self._lock:
+            self._write_frames([f for f in self.frames if f.dirty and f.key[:2] == prefix])
+
+    def flush_all(self) -> None:
+        with self._lock:
+            self._write_frames([f for f in self.frames if f.dirty])
+
+    def sync(self) -> None:
+        # fsync every file this pool has written pages to since the last sync.
+        with self._lock:
+            for file_manager in self._unsynced:
+                file_manager.sync()
+            self._unsynced.clear()
+
+    def discard_file(self, file_manager: FileManager, filename: str) -> None:
+        prefix = (str(file_manager.base_dir), filename)
+        with self._lock:
+            for frame in self.frames:
+                if frame.key is None or frame.key[:2] != prefix:
+                    continue
+                if frame.pin_count:
+                    raise StorageError(f"Cannot discard pinned page {frame.key[2]} of {filename}")
+                self._release(frame)
+
+    def dirty_pages(self) -> list[tuple]:
+        with self._lock:
+            return sorted(f.key for f in self.frames if f.dirty)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "resident": len(self.page_table),
+            "dirty": sum(1 for f in self.frames if f.dirty),
+            "pinned": sum(1 for f in self.frames if f.pin_count),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "writes": self.writes,
+        }
+
+    def _allocate_frame(self) -> Frame:
+        if self.free_frames:
+            return self.frames[self.free_frames.pop()]
+        frame_id = self.replacer.victim()
+        if frame_id is None:
+            raise StorageError(f"Buffer pool exhausted: all {self.capacity} frames are pinned")
+        frame = self.frames[frame_id]
+        if frame.dirty:
+            self._write_frames([frame])
+        self.evictions += 1
+        del self.page_table[frame.key]
+        frame.key = frame.file_manager = frame.page = None
+        return frame
+
+    def _install(self, frame: Frame, key: tuple, file_manager: FileManager, page: Page, dirty: bool) -> None:
+        frame.key = key
+        frame.file_manager = file_manager
+        frame.page = page
+        frame.dirty = frame.unlogged = dirty
+        frame.pin_count = 1
+        self.page_table[key] = frame.frame_id
+        self.replacer.pin(frame.frame_id)
+
+    def _pin(self, frame: Frame) -> None:
+        frame.pin_count += 1
+        self.replacer.record_access(frame.frame_id)
+        self.replacer.pin(frame.frame_id)
+
+    def _release(self, frame: Frame) -> None:
+        del self.page_table[frame.key]
+        self.replacer.remove(frame.frame_id)
+        frame.key = frame.file_manager = frame.page = None
+        frame.dirty = frame.unlogged = False
+        frame.pin_count = 0
+        self.free_frames.append(frame.frame_id)
+
+    def _log_frames(self, frames: list[Frame]) -> int:
+        for frame in frames:
+            _, filename, page_id = frame.key
+            self.wal.log_page(frame.file_manager.base_dir / filename, page_id, frame.page.data)
+            frame.unlogged = False
+        return len(frames)
+
+    def _write_frames(self, frames: list[Frame]) -> None:
+        if self.wal is not None and frames:
+            # Write-ahead rule: a page image reaches the log before the data file.
+            self._log_frames([f for f in frames if f.unlogged])
+            self.wal.flush()
+        by_file = defaultdict(list)
+        for frame in frames:
+            by_file[(frame.file_manager, frame.key[1])].append(frame)
+        for (file_manager, filename), group in by_file.items():
+            for frame in sorted(group, key=lambda f: f.key[2]):
+                file_manager.write_page(filename, frame.key[2], bytes(frame.page.data), PAGE_SIZE)
+                frame.dirty = False
+                self.writes += 1
+            file_manager.flush_file(filename)
+            self._unsynced.add(file_manager)
+
+    def _key(self, file_manager: FileManager, filename: str, page_id: int) -> tuple:
+        return (str(file_manager.base_dir), filename, page_id)
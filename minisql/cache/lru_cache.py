@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Capacity must be >= 1")
+        self.capacity = capacity
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> Optional[tuple[Hashable, Any]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._entries[key] = value
+                return None
+            self._entries[key] = value
+            if len(self._entries) > self.capacity:
+                self.evictions += 1
+                return self._entries.popitem(last=False)
+            return None
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LRUReplacer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._evictable: OrderedDict[int, None] = OrderedDict()
+
+    def record_access(self, frame_id: int) -> None:
+        if frame_id in self._evictable:
+            self._evictable.move_to_end(frame_id)
+
+    def pin(self, frame_id: int) -> None:
+        self._evictable.pop(frame_id, None)
+
+    def unpin(self, frame_id: int) -> None:
+        self._evictable[frame_id] = None
+        self._evictable.move_to_end(frame_id)
+
+    def remove(self, frame_id: int) -> None:
+        self._evictable.pop(frame_id, None)
+
+    def victim(self) -> Optional[int]:
+        if not self._evictable:
+            return None
+        frame_id, _ = self._evictable.popitem(last=False)
+        return frame_id
+
+    def __len__(self) -> int:
+        return len(self._evictable)
@@ -0,0 +1,60 @@
+import functools
+from typing import Any, Iterator, Mapping, Union
+
+
+class Row(tuple):
+    # A row as a tuple of its values in column order. The column names and
+    # their positions live on a subclass made once per layout (row_type), so
+    # a row costs its values and no dict of its own. It reads like a
+    # read-only dict; as_dict() gives a plain one for callers.
+    __slots__ = ()
+    names: tuple[str, ...] = ()
+    positions: dict[str, int] = {}
+
+    def get(self, name: str, default: Any = None) -> Any:
+        position = self.positions.get(name)
+        return default if position is None else tuple.__getitem__(self, position)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self.positions[key])
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.positions
+
+    def keys(self) -> tuple[str, ...]:
+        return self.names
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        return zip(self.names, self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, dict):
+            return dict(zip(self.names, self)) == other
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def __repr__(self) -> str:
+        return repr(dict(zip(self.names, self)))
+
+
+@functools.lru_cache(maxsize=1024)
+def row_type(names: tuple[str, ...]) -> type[Row]:
+    return type("Row", (Row,), {"__slots__": (), "names": names,
+                                "positions": {name: i for i, name in enumerate(names)}})
+
+
+def make_row(layout: type[Row], values) -> Row:
+    return tuple.__new__(layout, values)
+
+
+def as_dict(row: Union[Row, Mapping]) -> dict:
+    # Rows leave the engine as plain dicts.
+    if type(row) is dict:
+        return row
+    return dict(zip(row.names, row)) if isinstance(row, Row) else dict(row)
@@ -1,21 +1,86 @@
 from typing import Literal, Any
+from minisql.catalog.row import Row, row_type
 DataType = Literal["INT", "FLOAT", "STRING", "BOOL"]
+# How a table lays out its rows: a row per record, or a file of column chunks.
+ROW, COLUMNAR = "row", "columnar"
 
 class Column:
-    def __init__(self, name: str, col_type: str, primary_key: bool = False):
+    def __init__(self, name: str, col_type: str, primary_key: bool = False, unique: bool = False):
         self.name = name
         self.type = col_type
         self.primary_key = primary_key
+        self.unique = unique
+
+    def coerce(self, value: Any) -> Any:
+        if value is None:
+            return None
+        col_type = self.type.upper()
+        if col_type == "INT":
+            if isinstance(value, float) and not value.is_integer():
+                raise ValueError(f"invalid INT value {value!r}")
+            return int(value)
+        if col_type == "FLOAT":
+            return float(value)
+        if col_type == "BOOL":
+            if isinstance(value, str):
+                lowered = value.strip().lower()
+                if lowered in ("true", "1"):
+                    return True
+                if lowered in ("false", "0"):
+                    return False
+                raise ValueError(f"invalid BOOL value {value!r}")
+            return bool(value)
+        if col_type in ("STRING", "TEXT"):
+            return str(value)
+        return value
+
+    def operand(self, value: Any) -> Any:
+        # A constant compared with the column. A fractional number against an
+        # INT column is compared as it is: a = 2.5 holds for no row and
+        # a >= 2.5 starts at 3.
+        if isinstance(value, float) and self.type.upper() == "INT" and not value.is_integer():
+            return value
+        return self.coerce(value)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.name, "type": self.type, "primary_key": self.primary_key, "unique": self.unique}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Column":
+        return cls(data["name"], data["type"], primary_key=data.get("primary_key", False),
+                   unique=data.get("unique", False))
 
 
 class TableSchema:
-    def __init__(self, name, columns):
+    def __init__(self, name, columns, storage: str = ROW):
         self.name = name
         self.columns = columns
-        self.data = []
+        self.storage = storage
+
+    @property
+    def row_type(self) -> type[Row]:
+        # The Row subclass this table's rows are built as.
+        return row_type(tuple(col.name.lower() for col in self.columns))
+
+    def get_column(self, name: str):
+        name = name.lower()
+        for col in self.columns:
+            if col.name.lower() == name:
+                return col
+        return None
 
     def get_primary_key_column(self):
         for col in self.columns:
             if getattr(col, "primary_key", False):
                 return col
         return None
+
+    def get_unique_columns(self):
+        return [col for col in self.columns if getattr(col, "primary_key", False) or getattr(col, "unique", False)]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.name, "columns": [col.to_dict() for col in self.columns], "storage": self.storage}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "TableSchema":
+        return cls(data["name"], [Column.from_dict(col) for col in data["columns"]], data.get("storage", ROW))
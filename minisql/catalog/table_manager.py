@@ -1,26 +1,71 @@
-from minisql.catalog.schema import TableSchema, Column
-from minisql.utils.exceptions import SchemaError
-from minisql.storage.serializer import Serializer 
+from minisql.catalog.row import Row
+from minisql.catalog.schema import COLUMNAR, ROW, TableSchema, Column
+from minisql.concurrency.mvcc import FROZEN, Snapshot, TransactionManager
+from minisql.utils.exceptions import RecordNotFoundError, SchemaError, SerializationFailure
+from minisql.storage.column_file import ColumnFile
+from minisql.storage.row_codec import RowCodec
+from minisql.storage.serializer import Serializer
+from minisql.storage.file_manager import FileManager
+from minisql.storage.heap_file import HeapFile
+from minisql.storage.wal import WriteAheadLog
+from minisql.cache.buffer_pool import BufferPool
+from minisql.config.settings import DATA_DIR, AUTO_COMMIT, ROW_FORMAT, WAL_CHECKPOINT_BYTES
+from pathlib import Path
+from typing import Optional
 import pickle
 import os
+import struct
+
+PICKLE_MAGIC = b"\x80"
+
+# Every row version starts with a marker byte, the xid that wrote it and the
+# xid that deleted or replaced it (0 while it is current). Rows written
+# before versioning start with the JSON "{" and count as frozen and current.
+VERSION = struct.Struct("<BQQ")
+VERSIONED = 0x80
 
 class TableManager:
-    def __init__(self, db_path=r"C:\Users\poudy\Downloads\DSA\data\data.db"):
+    def __init__(self, db_path=str(DATA_DIR / "data.db"), buffer_pool: BufferPool = None,
+                 auto_commit: bool = AUTO_COMMIT, row_format: str = ROW_FORMAT):
         self.db_path = db_path
         self.tables = {}
-        self.load() 
+        self.heaps: dict[str, HeapFile | ColumnFile] = {}
+        # Rows are written in `row_format`; rows already stored in either
+        # format read back the same.
+        self.row_format = row_format
+        self.codecs: dict[str, Optional[RowCodec]] = {}
+        self.file_manager = FileManager(Path(db_path).parent / "tables")
+        self.buffer_pool = buffer_pool or BufferPool()
+        self.wal = WriteAheadLog(Path(db_path).parent / "wal.log", group_commit=not auto_commit)
+        self.buffer_pool.attach_wal(self.wal)
+        self.transactions = TransactionManager()
+        self._catalog_dirty = False
+        # Bumped on CREATE/DROP TABLE so cached plans can tell they are stale.
+        self.schema_version = 0
+        self.load()
 
-    def create_table(self, table_name: str, columns: list[Column]) -> None:
+    def create_table(self, table_name: str, columns: list[Column], storage: str = ROW) -> None:
         if table_name in self.tables:
             raise SchemaError(f"Table {table_name} already exists")
-        self.tables[table_name] = TableSchema(table_name, columns)
-        self.save() 
+        self.tables[table_name] = TableSchema(table_name, columns, storage)
+        self.file_manager.delete_file(self._heap_filename(table_name))
+        self.heaps[table_name] = self._open_heap(table_name)
+        self.schema_version += 1
+        self._catalog_dirty = True
+        self.save()
 
     def drop_table(self, table_name: str) -> None:
         if table_name not in self.tables:
             raise SchemaError(f"Table {table_name} does not exist")
+        filename = self._heap_filename(table_name)
         del self.tables[table_name]
+        self.buffer_pool.discard_file(self.file_manager, filename)
+        del self.heaps[table_name]
+        self.codecs.pop(table_name, None)
+        self.schema_version += 1
+        self._catalog_dirty = True
         self.save()
+        self.file_manager.delete_file(filename)
 
     def get_table_schema(self, table_name: str) -> TableSchema:
         if table_name not in self.tables:
@@ -30,19 +75,327 @@ class TableManager:
     def list_tables(self) -> list[str]:
         return list(self.tables.keys())
 
+    # Without a snapshot, reads see the current version of each row: the
+    # one nobody has deleted or replaced yet.
+
+    def insert_row(self, table_name: str, row: dict, xid: int = FROZEN):
+        heap = self._heap(table_name)
+        if isinstance(heap, ColumnFile):
+            return heap.insert(row, xid)
+        return heap.insert(_version(Serializer.serialize_row(row, self.codecs.get(table_name)), xid))
+
+    def get_row(self, table_name: str, rid, snapshot: Optional[Snapshot] = None):
+        version = _read(self._heap(table_name), rid)
+        if version is None:
+            return None
+        xmin, xmax, data = version
+        return _row(data, self.codecs.get(table_name)) if _visible(snapshot, xmin, xmax) else None
+
+    def get_version(self, table_name: str, rid):
+        # The row stored at `rid` whether or not anyone can see it.
+        version = _read(self._heap(table_name), rid)
+        return _row(version[2], self.codecs.get(table_name)) if version is not None else None
+
+    def update_row(self, table_name: str, rid, row: dict, xid: int = FROZEN):
+        # Returns where the replaced version now is and where the new one went.
+        heap = self._heap(table_name)
+        if xid == FROZEN and isinstance(heap, ColumnFile):
+            # Column chunks are not rewritten in place: the row moves to the end.
+            heap.delete(rid)
+            return rid, heap.insert(row, FROZEN)
+        if xid == FROZEN:
+            return rid, heap.update(rid, _version(Serializer.serialize_row(row, self.codecs.get(table_name))))
+        with heap.latch:
+            rid = self._stamp(heap, rid, xid)
+            return rid, self.insert_row(table_name, row, xid)
+
+    def delete_row(self, table_name: str, rid, xid: int = FROZEN):
+        heap = self._heap(table_name)
+        if xid == FROZEN:
+            heap.delete(rid)
+            return rid
+        with heap.latch:
+            return self._stamp(heap, rid, xid)
+
+    def restore_row(self, table_name: str, rid, xid: int) -> None:
+        # Undoes delete_row by `xid`.
+        heap = self._heap(table_name)
+        with heap.latch:
+            version = _read(heap, rid)
+            if version is not None and version[1] == xid:
+                _set_xmax(heap, rid, version, 0)
+
+    def remove_version(self, table_name: str, rid) -> None:
+        self._heap(table_name).delete(rid)
+
+    def scan(self, table_name: str, snapshot: Optional[Snapshot] = None):
+        heap = self._heap(table_name)
+        if isinstance(heap, ColumnFile):
+            for rid, _, _, row in heap.records(lambda xmin, xmax: _visible(snapshot, xmin, xmax)):
+                yield rid, row
+            return
+        codec = self.codecs.get(table_name)
+        for rid, record in heap.scan():
+            xmin, xmax, data = _unpack(record)
+            if _visible(snapshot, xmin, xmax):
+                yield rid, Serializer.deserialize_row(data, codec)
+
+    def scan_columns(self, table_name: str, names, snapshot: Optional[Snapshot] = None):
+        # For a columnar table: (rids, {column: values}) per row group, with
+        # only the columns in `names` read.
+        heap = self._heap(table_name)
+        if not isinstance(heap, ColumnFile):
+            raise SchemaError(f"Table {table_name} is not columnar")
+        for rids, _, _, vectors in heap.scan(names, lambda xmin, xmax: _visible(snapshot, xmin, xmax)):
+            yield rids, vectors
+
+    def versions(self, table_name: str):
+        # Every stored version, visible to anyone or not.
+        heap = self._heap(table_name)
+        if isinstance(heap, ColumnFile):
+            for rid, _, _, row in heap.records():
+                yield rid, row
+            return
+        codec = self.codecs.get(table_name)
+        for rid, record in heap.scan():
+            yield rid, Serializer.deserialize_row(_unpack(record)[2], codec)
+
+    def vacuum(self, table_name: str, horizon: int, on_remove=None) -> int:
+        # Removes the versions deleted by transactions older than `horizon`,
+        # which no snapshot can see any more; `on_remove(rid, row)` runs
+        # first for each.
+        heap = self._heap(table_name)
+        if isinstance(heap, ColumnFile):
+            return heap.vacuum(horizon, on_remove)
+        removed = 0
+        for page_id in range(heap.num_pages):
+            with heap.latch:
+                with heap.page(page_id) as page:
+                    dead = [(slot, data) for slot, record in page.records()
+                            for _, xmax, data in [_unpack(record)] if xmax and xmax < horizon]
+                for slot, data in dead:
+                    if on_remove is not None:
+                        on_remove((page_id, slot), Serializer.deserialize_row(data, self.codecs.get(table_name)))
+                    heap.delete((page_id, slot))
+            removed += len(dead)
+        return removed
+
+    def prune(self, table_name: str, rids, horizon: int, on_remove=None) -> int:
+        # vacuum() for the versions at `rids` only.
+        heap = self._heap(table_name)
+        removed = 0
+        with heap.latch:
+            for rid in rids:
+                version = _read(heap, rid)
+                if version is None:
+                    continue
+                _, xmax, data = version
+                if xmax and xmax < horizon:
+                    if on_remove is not None:
+                        on_remove(rid, _row(data, self.codecs.get(table_name)))
+                    heap.delete(rid)
+                    removed += 1
+        return removed
+
+    def latch(self, table_name: str):
+        return self._heap(table_name).latch
+
+    def truncate_table(self, table_name: str) -> None:
+        self._heap(table_name).truncate()
+
+    def row_count(self, table_name: str, snapshot: Optional[Snapshot] = None) -> int:
+        heap = self._heap(table_name)
+        if isinstance(heap, ColumnFile):
+            return sum(len(rids) for rids, _, _, _ in heap.scan((), lambda xmin, xmax: _visible(snapshot, xmin, xmax)))
+        return sum(1 for _, record in heap.scan() if _visible(snapshot, *_unpack(record)[:2]))
+
+    def begin(self, transaction) -> int:
+        xid = self.transactions.assign(transaction)
+        self.wal.begin(xid)
+        return xid
+
+    def commit(self, xid: int = FROZEN) -> None:
+        self.wait_commit(self.log_commit(xid))
+        self.checkpoint_if_due()
+
+    def log_commit(self, xid: int = FROZEN) -> int:
+        # Logs a commit without waiting for it to be durable. From here on a
+        # checkpoint counts the xid as committed: it flushes the COMMIT record
+        # before the catalog that no longer lists the xid as active.
+        self._write_columns()
+        self.buffer_pool.log_dirty_pages()
+        if xid != FROZEN:
+            self.transactions.committing(xid)
+        return self.wal.log_commit(xid)
+
+    def wait_commit(self, lsn: int) -> None:
+        self.wal.wait(lsn)
+
+    def checkpoint_if_due(self) -> None:
+        if self.wal.size() >= WAL_CHECKPOINT_BYTES:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self._write_columns()
+        self.buffer_pool.log_dirty_pages()
+        self.wal.flush()
+        self.buffer_pool.flush_all()
+        self.buffer_pool.sync()
+        self.file_manager.sync()
+        if self._catalog_dirty or self.transactions.dirty:
+            self._write_catalog()
+            self._catalog_dirty = False
+        self.wal.truncate()
+
     def save(self) -> None:
-        try:
-            with open(self.db_path, 'wb') as f:
-                pickle.dump(self.tables, f)
-        except Exception as e:
-            pass
+        self.checkpoint()
+
+    def close(self) -> None:
+        self.checkpoint()
+        self.wal.close()
+        self.file_manager.close()
 
     def load(self) -> None:
         if os.path.exists(self.db_path) and os.path.getsize(self.db_path) > 0:
-            try:
-                with open(self.db_path, 'rb') as f:
-                    data = pickle.load(f)
-                    if isinstance(data, dict):
-                        self.tables = data
-            except Exception as e:
-                pass
\ No newline at end of file
+            with open(self.db_path, 'rb') as f:
+                legacy = f.read(1) == PICKLE_MAGIC
+            if legacy:
+                self._load_legacy()
+                return
+            catalog = Serializer.deserialize_from_file(self.db_path)
+            for entry in catalog.get("tables", []):
+                schema = TableSchema.from_dict(entry)
+                self.tables[schema.name] = schema
+            state = catalog.get("transactions", {})
+            self.transactions.restore(state)
+        else:
+            state = {}
+        # Transactions running at the last checkpoint or begun since, and
+        # never committed, were cut off by a crash.
+        begun, committed = self.wal.transactions()
+        in_doubt = (set(state.get("active", ())) | begun) - committed
+        self.transactions.next_xid = max([self.transactions.next_xid, *(xid + 1 for xid in begun)])
+        # Redo every page image logged since the last checkpoint, then start a fresh log.
+        if self.wal.recover():
+            self.wal.truncate()
+        for table_name in self.tables:
+            self.heaps[table_name] = self._open_heap(table_name)
+        if in_doubt:
+            self._undo_in_doubt(in_doubt)
+
+    def _undo_in_doubt(self, xids: set) -> None:
+        for heap in self.heaps.values():
+            if isinstance(heap, ColumnFile):
+                for rid, xmin, xmax, _ in list(heap.records()):
+                    if xmin in xids:
+                        heap.delete(rid)
+                    elif xmax in xids:
+                        heap.set_xmax(rid, 0)
+                continue
+            for rid, record in list(heap.scan()):
+                xmin, xmax, data = _unpack(record)
+                if xmin in xids:
+                    heap.delete(rid)
+                elif xmax in xids:
+                    heap.update(rid, _version(data, xmin))
+        self.transactions.dirty = True
+        self.checkpoint()
+
+    def _write_catalog(self) -> None:
+        catalog = {"tables": [schema.to_dict() for schema in self.tables.values()],
+                   "transactions": self.transactions.state()}
+        tmp_path = f"{self.db_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(Serializer.serialize(catalog))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.db_path)
+
+    def _load_legacy(self) -> None:
+        # Older databases pickled every TableSchema together with its rows;
+        # move the rows into heap files and rewrite the catalog.
+        with open(self.db_path, 'rb') as f:
+            data = pickle.load(f)
+        if not isinstance(data, dict):
+            raise SchemaError(f"Unrecognised catalog format in {self.db_path}")
+        for table_name, legacy in data.items():
+            rows = getattr(legacy, "data", [])
+            # Columns pickled before UNIQUE existed have no unique attribute.
+            columns = [Column(c.name, c.type, getattr(c, "primary_key", False), getattr(c, "unique", False))
+                       for c in legacy.columns]
+            self.create_table(table_name, columns)
+            for row in rows:
+                self.insert_row(table_name, row)
+        self._catalog_dirty = True
+        self.save()
+
+    def _write_columns(self) -> None:
+        # Columnar tables keep changed chunks decoded until here, so they
+        # reach their pages before the pages are logged.
+        for heap in list(self.heaps.values()):
+            if isinstance(heap, ColumnFile):
+                heap.write_pending()
+
+    def _heap(self, table_name: str) -> HeapFile | ColumnFile:
+        if table_name not in self.heaps:
+            raise SchemaError(f"Table {table_name} does not exist")
+        return self.heaps[table_name]
+
+    def _open_heap(self, table_name: str) -> HeapFile | ColumnFile:
+        schema = self.tables[table_name]
+        self.codecs[table_name] = RowCodec(schema.columns) if self.row_format == "binary" else None
+        if schema.storage == COLUMNAR:
+            return ColumnFile(self.file_manager, self._heap_filename(table_name),
+                              [(col.name, col.type) for col in schema.columns], self.buffer_pool)
+        return HeapFile(self.file_manager, self._heap_filename(table_name), self.buffer_pool)
+
+    def _heap_filename(self, table_name: str) -> str:
+        if self.tables[table_name].storage == COLUMNAR:
+            return f"{table_name}.cols"
+        return f"{table_name}.heap"
+
+    def _stamp(self, heap: HeapFile | ColumnFile, rid, xid: int):
+        # Marks the version at `rid` deleted by `xid`. A row from before
+        # versioning grows by its header and may move; the rid it ends up
+        # at is returned.
+        version = _read(heap, rid)
+        if version is None:
+            raise RecordNotFoundError(f"No record at {rid} in {heap.filename}")
+        if version[1] and version[1] != xid:
+            raise SerializationFailure("Could not serialize access: the row was changed by a concurrent transaction")
+        return _set_xmax(heap, rid, version, xid)
+
+
+def _version(data: bytes, xmin: int = FROZEN, xmax: int = 0) -> bytes:
+    return VERSION.pack(VERSIONED, xmin, xmax) + data
+
+
+def _unpack(record: bytes | memoryview) -> tuple[int, int, bytes | memoryview]:
+    if record[0] != VERSIONED:
+        return FROZEN, 0, record
+    _, xmin, xmax = VERSION.unpack_from(record, 0)
+    return xmin, xmax, memoryview(record)[VERSION.size:]
+
+
+def _read(heap: HeapFile | ColumnFile, rid) -> Optional[tuple[int, int, bytes | Row]]:
+    # The version at `rid` as (xmin, xmax, data): the serialized row of a
+    # heap record, the row itself from a columnar table.
+    if isinstance(heap, ColumnFile):
+        return heap.read(rid)
+    record = heap.read(rid)
+    return _unpack(record) if record is not None else None
+
+
+def _row(data: bytes | Row, codec: Optional[RowCodec] = None) -> Row | dict:
+    return data if isinstance(data, Row) else Serializer.deserialize_row(data, codec)
+
+
+def _set_xmax(heap: HeapFile | ColumnFile, rid, version: tuple, xmax: int):
+    if isinstance(heap, ColumnFile):
+        heap.set_xmax(rid, xmax)
+        return rid
+    return heap.update(rid, _version(version[2], version[0], xmax))
+
+
+def _visible(snapshot: Optional[Snapshot], xmin: int, xmax: int) -> bool:
+    return not xmax if snapshot is None else snapshot.visible(xmin, xmax)
@@ -1,14 +1,8 @@
-from minisql.query.parser import Parser
-from minisql.query.executer import QueryExecutor
-from minisql.catalog.table_manager import TableManager
-from minisql.index.index_manager import IndexManager
-from minisql.query.tokenizer import Tokenizer
+from minisql import database
 
 class MiniSQLShell:
     def __init__(self):
-        self.table_manager = TableManager()
-        self.index_manager = IndexManager()
-        self.executor = QueryExecutor(self.table_manager, self.index_manager)
+        self.connection = database.connect()
 
     def start(self):
         print("Welcome to MiniSQL CLI. Type 'exit' to quit.")
@@ -17,13 +11,25 @@ class MiniSQLShell:
                 query = input("MiniSQL> ").strip()
                 if query.lower() in {"exit", "quit"}:
                     print("Exiting MiniSQL CLI.")
+                    self.connection.close()
+                    self.connection.engine.close()
                     break
                 if not query:
                     continue
-                tokens = Tokenizer(query).tokenize()
-                ast = Parser(tokens).parse()
-                result = self.executor.execute(ast)
-                if result is not None:
-                    print(result)
+                cursor = self.connection.execute(query)
+                if cursor.description is not None:
+                    self._print_rows(cursor)
+                    continue
+                if cursor.statusmessage is not None:
+                    print(cursor.statusmessage)
             except Exception as e:
                 print(f"Error: {e}")
+
+    def _print_rows(self, cursor):
+        names = [column[0] for column in cursor.description]
+        count = 0
+        for row in cursor:
+            print(dict(zip(names, row)))
+            count += 1
+        cursor.close()
+        print(f"({count} rows)")
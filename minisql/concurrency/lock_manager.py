@@ -0,0 +1,123 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Hashable, Iterator, Mapping, Optional
+from minisql.config.settings import LOCK_TIMEOUT
+from minisql.utils.exceptions import LockTimeoutError
+
+SHARED, EXCLUSIVE = "S", "X"
+# Every statement holds the catalog shared; DDL holds it exclusively.
+CATALOG = "catalog"
+
+
+def table_resource(table_name: str) -> str:
+    return f"table:{table_name}"
+
+
+class _LockState:
+    def __init__(self):
+        # owner -> [mode, hold count]
+        self.holders: dict[Hashable, list] = {}
+        self.waiting = 0
+        self.waiting_writers = 0
+
+
+class LockManager:
+    # Shared/exclusive locks on named resources, held by an owner (the
+    # calling thread unless given). Locks are reentrant, and an owner that
+    # holds S gets X once it is the only holder. A waiting writer holds back
+    # new readers so a steady stream of readers cannot starve it. There is no
+    # deadlock detection: a request that waits longer than the timeout fails
+    # with LockTimeoutError.
+    def __init__(self, timeout: Optional[float] = LOCK_TIMEOUT):
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._locks: dict[Hashable, _LockState] = {}
+        self.waits = 0
+
+    def acquire(self, resource: Hashable, mode: str = SHARED, owner: Hashable = None,
+                timeout: Optional[float] = None) -> None:
+        if mode not in (SHARED, EXCLUSIVE):
+            raise ValueError(f"Unknown lock mode {mode}")
+        owner = threading.get_ident() if owner is None else owner
+        timeout = self.timeout if timeout is None else timeout
+        with self._cond:
+            state = self._locks.setdefault(resource, _LockState())
+            held = state.holders.get(owner)
+            if held is not None and (held[0] == EXCLUSIVE or mode == SHARED):
+                held[1] += 1
+                return
+            if not self._grantable(state, owner, mode):
+                try:
+                    self._wait(state, resource, owner, mode, timeout)
+                except LockTimeoutError:
+                    if not state.holders and not state.waiting:
+                        del self._locks[resource]
+                    raise
+            if held is not None:
+                held[0], held[1] = EXCLUSIVE, held[1] + 1
+            else:
+                state.holders[owner] = [mode, 1]
+
+    def release(self, resource: Hashable, owner: Hashable = None) -> None:
+        owner = threading.get_ident() if owner is None else owner
+        with self._cond:
+            state = self._locks.get(resource)
+            held = state.holders.get(owner) if state is not None else None
+            if held is None:
+                raise RuntimeError(f"{resource} is not locked by {owner}")
+            held[1] -= 1
+            if held[1]:
+                return
+            del state.holders[owner]
+            if not state.holders and not state.waiting:
+                del self._locks[resource]
+            self._cond.notify_all()
+
+    @contextmanager
+    def hold(self, resources: Mapping[Hashable, str], owner: Hashable = None,
+             timeout: Optional[float] = None) -> Iterator[None]:
+        # Takes the locks in a fixed order, so two owners asking for the same
+        # set cannot each end up waiting on the other.
+        acquired = []
+        try:
+            for resource in sorted(resources, key=str):
+                self.acquire(resource, resources[resource], owner, timeout)
+                acquired.append(resource)
+            yield
+        finally:
+            for resource in reversed(acquired):
+                self.release(resource, owner)
+
+    def mode(self, resource: Hashable, owner: Hashable = None) -> Optional[str]:
+        owner = threading.get_ident() if owner is None else owner
+        with self._cond:
+            state = self._locks.get(resource)
+            held = state.holders.get(owner) if state is not None else None
+            return held[0] if held is not None else None
+
+    def _grantable(self, state: _LockState, owner: Hashable, mode: str) -> bool:
+        others = [held[0] for holder, held in state.holders.items() if holder != owner]
+        if mode == EXCLUSIVE:
+            return not others
+        return EXCLUSIVE not in others and (not state.waiting_writers or owner in state.holders)
+
+    def _wait(self, state: _LockState, resource: Hashable, owner: Hashable, mode: str,
+              timeout: Optional[float]) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.waits += 1
+        state.waiting += 1
+        if mode == EXCLUSIVE:
+            state.waiting_writers += 1
+        try:
+            while not self._grantable(state, owner, mode):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise LockTimeoutError(f"Timed out waiting for a {mode} lock on {resource}")
+                self._cond.wait(remaining)
+        finally:
+            state.waiting -= 1
+            if mode == EXCLUSIVE:
+                state.waiting_writers -= 1
+                # Readers held back for this writer may go if it gave up.
+                self._cond.notify_all()
@@ -0,0 +1,114 @@
+import threading
+import weakref
+from typing import Any, Optional
+
+# Versions written outside any transaction, and rows from databases older
+# than versioning, carry xid 0 and are visible to everyone.
+FROZEN = 0
+
+# Undo log actions: a version the transaction wrote, a version it stamped
+# as deleted, and the versions of one bulk load batch.
+INSERTED, DELETED, LOADED = "inserted", "deleted", "loaded"
+
+
+class Snapshot:
+    # The writes a statement may see: those of every transaction that had
+    # finished when the snapshot was taken, and its own transaction's.
+    # Transactions that roll back remove their versions before finishing,
+    # so a finished transaction is a committed one.
+    def __init__(self, xmax: int, active: frozenset, transaction: "Transaction" = None):
+        self.xmax = xmax
+        self.active = active
+        self.xmin = min(active, default=xmax)
+        self.transaction = transaction
+
+    def sees(self, xid: int) -> bool:
+        if xid == FROZEN:
+            return True
+        if self.transaction is not None and xid == self.transaction.xid:
+            return True
+        return xid < self.xmax and xid not in self.active
+
+    def visible(self, xmin: int, xmax: int) -> bool:
+        return self.sees(xmin) and not (xmax and self.sees(xmax))
+
+
+class Transaction:
+    def __init__(self, explicit: bool = False):
+        self.explicit = explicit
+        # Assigned on the first write; read-only transactions never get one.
+        self.xid: Optional[int] = None
+        self.snapshot: Optional[Snapshot] = None
+        self.undo: list[tuple[str, str, Any]] = []
+        # Lock manager resources held until the transaction ends.
+        self.locks: list = []
+
+
+class Session:
+    # Holds the explicit transaction of one connection, if it has one open.
+    def __init__(self):
+        self.transaction: Optional[Transaction] = None
+
+
+class TransactionManager:
+    def __init__(self):
+        self.next_xid = 1
+        self.active: set[int] = set()
+        # Active xids whose COMMIT record is logged; still invisible to
+        # snapshots, but recorded as finished by a checkpoint.
+        self._committing: set[int] = set()
+        # Open snapshots hold back vacuum. Weak, so a stream dropped before
+        # it was read does not hold it back for good.
+        self._snapshots: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        # Set when next_xid or the active set moved since the catalog last
+        # recorded them.
+        self.dirty = False
+
+    def assign(self, transaction: Transaction) -> int:
+        with self._lock:
+            if transaction.xid is None:
+                transaction.xid = self.next_xid
+                self.next_xid += 1
+                self.active.add(transaction.xid)
+                self.dirty = True
+            return transaction.xid
+
+    def snapshot(self, transaction: Optional[Transaction] = None) -> Snapshot:
+        with self._lock:
+            snapshot = Snapshot(self.next_xid, frozenset(self.active), transaction)
+            self._snapshots[id(snapshot)] = snapshot
+            return snapshot
+
+    def release(self, snapshot: Optional[Snapshot]) -> None:
+        if snapshot is not None:
+            with self._lock:
+                self._snapshots.pop(id(snapshot), None)
+
+    def committing(self, xid: int) -> None:
+        with self._lock:
+            self._committing.add(xid)
+            self.dirty = True
+
+    def finish(self, transaction: Transaction) -> None:
+        with self._lock:
+            self._committing.discard(transaction.xid)
+            if transaction.xid is not None and transaction.xid in self.active:
+                self.active.discard(transaction.xid)
+                self.dirty = True
+            if transaction.snapshot is not None:
+                self._snapshots.pop(id(transaction.snapshot), None)
+
+    def horizon(self) -> int:
+        # Versions deleted by a transaction below this xid are invisible to
+        # every snapshot now open and to any taken later.
+        with self._lock:
+            return min([self.next_xid, *self.active, *(s.xmin for s in list(self._snapshots.values()))])
+
+    def state(self) -> dict:
+        with self._lock:
+            self.dirty = False
+            return {"next_xid": self.next_xid, "active": sorted(self.active - self._committing)}
+
+    def restore(self, state: dict) -> None:
+        self.next_xid = max(self.next_xid, state.get("next_xid", 1))
@@ -0,0 +1,44 @@
+import threading
+from typing import Optional
+from minisql.config.settings import VACUUM_INTERVAL, VACUUM_MIN_DEAD_VERSIONS
+from minisql.utils.exceptions import MiniSQLError
+
+
+class Vacuum:
+    # Every `interval` seconds, vacuums the tables whose committed updates
+    # and deletes have left at least `min_dead` dead versions behind. Tables
+    # a transaction is writing are skipped until the next round.
+    def __init__(self, executor, interval: float = VACUUM_INTERVAL, min_dead: int = VACUUM_MIN_DEAD_VERSIONS):
+        self.executor = executor
+        self.interval = interval
+        self.min_dead = min_dead
+        self.removed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="minisql-vacuum", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self) -> int:
+        removed = 0
+        for table_name, dead in list(self.executor.dead_versions.items()):
+            if dead >= self.min_dead:
+                removed += self.executor.vacuum(table_name, wait=False)
+        self.removed += removed
+        return removed
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except MiniSQLError:
+                # Tried again next round.
+                pass
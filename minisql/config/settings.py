@@ -15,9 +15,37 @@ LOG_DIR.mkdir(exist_ok=True)
 DEFAULT_ENCODING = "utf-8"
 MAX_RECORD_SIZE = 4096
 BUFFER_SIZE = 8192
+BUFFER_POOL_SIZE = 256
+BUFFER_POOL_POLICY: Literal["lru", "clock"] = "lru"
 
 FileMode = Literal["r", "w", "a", "rb", "wb", "ab"]
 DEFAULT_FILE_MODE: FileMode = "rb"
 SUPPORTED_DATA_TYPES = ["INT", "FLOAT", "STRING", "BOOL"]
 AUTO_COMMIT = True
+GROUP_COMMIT_DELAY = 0.0
+WAL_CHECKPOINT_BYTES = 16 * 1024 * 1024
+INDEX_ORDER = 128
+INDEX_FILL_FACTOR = 0.9
+INDEX_NODE_CACHE_SIZE = 1024
+HASH_BUCKET_SIZE = 64
+STATEMENT_CACHE_SIZE = 256
+BULK_INSERT_BATCH_SIZE = 5000
+POOL_SIZE = 8
+POOL_TIMEOUT = 30.0
+LOCK_TIMEOUT = 10.0
+LOCKED_FETCH_ROWS = 64
+VACUUM_INTERVAL = 5.0
+VACUUM_MIN_DEAD_VERSIONS = 100
+VECTORIZED_EXECUTION = False
+VECTOR_BATCH_SIZE = 1024
+# Rows per row group of a columnar table, and decoded column chunks kept.
+COLUMNAR_GROUP_ROWS = 1024
+COLUMNAR_CACHE_CHUNKS = 256
+# How heap rows are encoded: "binary" against the table schema, or "json".
+ROW_FORMAT = "binary"
+# RecordManager table logs: fsync each append, and how often (seconds) to
+# compact logs with at least this many dead lines.
+RECORD_LOG_FSYNC = False
+RECORD_COMPACT_INTERVAL = 5.0
+RECORD_COMPACT_MIN_GARBAGE = 1000
 DEBUG_MODE = False
@@ -0,0 +1,383 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+from minisql.catalog.table_manager import TableManager
+from minisql.concurrency.mvcc import Session
+from minisql.concurrency.vacuum import Vacuum
+from minisql.config.settings import DATA_DIR, POOL_SIZE, POOL_TIMEOUT, VACUUM_INTERVAL
+from minisql.index.index_manager import IndexManager
+from minisql.query.executer import QueryExecutor
+from minisql.query.planner import Project
+from minisql.utils.exceptions import (ConstraintError, LockTimeoutError, MiniSQLError, QueryError, SchemaError,
+                                      SerializationFailure)
+
+# PEP 249 module interface.
+apilevel = "2.0"
+# Threads may share the module and its connections. Reads see a snapshot
+# and never wait; writes to the same table wait their turn.
+threadsafety = 2
+paramstyle = "qmark"
+
+
+class Warning(Exception):
+    pass
+
+
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DataError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class InternalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+class DBAPITypeObject:
+    def __init__(self, *values: str):
+        self.values = frozenset(values)
+
+    def __eq__(self, other) -> bool:
+        return other in self.values
+
+    def __hash__(self) -> int:
+        return hash(self.values)
+
+
+STRING = DBAPITypeObject("STRING", "TEXT")
+NUMBER = DBAPITypeObject("INT", "FLOAT", "BOOL")
+BINARY = DBAPITypeObject()
+DATETIME = DBAPITypeObject()
+ROWID = DBAPITypeObject()
+
+
+class Engine:
+    # The storage, indexes and executor of one database, opened once per
+    # process and shared by every connection to it, so connecting does not
+    # reload the catalog.
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.table_manager = TableManager(db_path=str(db_path))
+        self.index_manager = IndexManager(db_path.parent / "indices", self.table_manager.buffer_pool)
+        self.executor = QueryExecutor(self.table_manager, self.index_manager)
+        self.vacuum = Vacuum(self.executor)
+        if VACUUM_INTERVAL:
+            self.vacuum.start()
+        self.lock = threading.RLock()
+        self.closed = False
+
+    def close(self) -> None:
+        with self.lock:
+            if self.closed:
+                return
+            self.vacuum.stop()
+            self.index_manager.close()
+            self.table_manager.close()
+            self.closed = True
+
+
+_engines: dict[Path, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(database: Optional[Union[str, Path]] = None) -> Engine:
+    # `database` is the catalog file or the directory holding data.db.
+    db_path = Path(database) if database is not None else DATA_DIR / "data.db"
+    if db_path.suffix != ".db":
+        db_path = db_path / "data.db"
+    db_path = db_path.resolve()
+    with _engines_lock:
+        engine = _engines.get(db_path)
+        if engine is None or engine.closed:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            engine = _engines[db_path] = Engine(db_path)
+        return engine
+
+
+@atexit.register
+def close_engines() -> None:
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.close()
+        _engines.clear()
+
+
+def connect(database: Optional[Union[str, Path]] = None, autocommit: bool = True) -> "Connection":
+    return Connection(get_engine(database), autocommit)
+
+
+class Connection:
+    # With `autocommit` on, as by default, every statement outside BEGIN ...
+    # COMMIT commits when it finishes. With it off, the first statement
+    # opens a transaction that lasts until commit() or rollback(). PEP 249
+    # has it off to begin with; connect(autocommit=False) gives that.
+    Error, Warning, InterfaceError, DatabaseError = Error, Warning, InterfaceError, DatabaseError
+    DataError, OperationalError, IntegrityError = DataError, OperationalError, IntegrityError
+    InternalError, ProgrammingError, NotSupportedError = InternalError, ProgrammingError, NotSupportedError
+
+    def __init__(self, engine: Engine, autocommit: bool = True):
+        self.engine = engine
+        self.autocommit = autocommit
+        self.session = Session()
+        self.closed = False
+
+    def cursor(self) -> "Cursor":
+        self._check_open()
+        return Cursor(self)
+
+    def execute(self, operation: str, parameters: Any = ()) -> "Cursor":
+        cursor = self.cursor()
+        cursor.execute(operation, parameters)
+        return cursor
+
+    def commit(self) -> None:
+        self._check_open()
+        self._end(self.engine.executor.commit)
+
+    def rollback(self) -> None:
+        self._check_open()
+        self._end(self.engine.executor.rollback)
+
+    def close(self) -> None:
+        if not self.closed and self.session.transaction is not None:
+            self._end(self.engine.executor.rollback)
+        self.closed = True
+
+    def __enter__(self) -> "Connection":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise InterfaceError("Connection is closed")
+
+    def _end(self, end) -> None:
+        if self.session.transaction is None:
+            return
+        with _translate(), self.engine.executor.use_session(self.session):
+            end()
+
+    @contextmanager
+    def _statement(self) -> Iterator[QueryExecutor]:
+        # Runs the cursor's statements in this connection's transaction.
+        executor = self.engine.executor
+        with _translate(), executor.use_session(self.session):
+            if not self.autocommit and self.session.transaction is None:
+                executor.begin()
+            yield executor
+
+
+class Cursor:
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.arraysize = 1
+        self.description: Optional[list[tuple]] = None
+        self.rowcount = -1
+        self.lastrowid = None
+        # The executor's message for the last statement, e.g. "Updated 3 rows".
+        self.statusmessage: Optional[str] = None
+        self.closed = False
+        self._result = None
+        self._names: list[str] = []
+
+    def execute(self, operation: str, parameters: Any = ()) -> "Cursor":
+        self._check_open()
+        self._reset()
+        with self.connection._statement() as executor:
+            statement = executor.prepare(operation)
+            if statement.node_type == "SELECT":
+                self._result = statement.cursor(parameters or ())
+                self.description = self._describe(statement)
+            else:
+                self.statusmessage = statement.execute(parameters or ())
+                self.rowcount = executor.rowcount
+        return self
+
+    def executemany(self, operation: str, seq_of_parameters) -> "Cursor":
+        self._check_open()
+        self._reset()
+        total = 0
+        with self.connection._statement() as executor:
+            statement = executor.prepare(operation)
+            if statement.node_type == "SELECT":
+                raise ProgrammingError("executemany() cannot run a SELECT")
+            for parameters in seq_of_parameters:
+                self.statusmessage = statement.execute(parameters)
+                total += max(executor.rowcount, 0)
+        self.rowcount = total
+        return self
+
+    def fetchone(self) -> Optional[tuple]:
+        rows = self._fetch(lambda result: [row] if (row := result.fetchone()) is not None else [])
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: Optional[int] = None) -> list[tuple]:
+        return self._fetch(lambda result: result.fetchmany(self.arraysize if size is None else size))
+
+    def fetchall(self) -> list[tuple]:
+        return self._fetch(lambda result: result.fetchall())
+
+    def setinputsizes(self, sizes) -> None:
+        pass
+
+    def setoutputsize(self, size, column=None) -> None:
+        pass
+
+    def close(self) -> None:
+        self._reset()
+        self.closed = True
+
+    def __iter__(self) -> Iterator[tuple]:
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _fetch(self, fetch) -> list[tuple]:
+        self._check_open()
+        if self._result is None:
+            raise ProgrammingError("No result set; execute a SELECT first")
+        with _translate():
+            rows = fetch(self._result)
+        names = self._names
+        return [tuple(row.get(name) for name in names) for row in rows]
+
+    def _describe(self, statement) -> list[tuple]:
+        table_name = next(child.value for child in statement.ast.children if child.node_type == "TABLE")
+        schema = self.connection.engine.table_manager.get_table_schema(table_name)
+        plan = statement.plan
+        while plan is not None and not isinstance(plan, Project):
+            plan = plan.children[0] if plan.children else None
+        self._names = plan.columns if plan is not None and plan.columns is not None else \
+            [c.name.lower() for c in schema.columns]
+        description = []
+        for name in self._names:
+            column = schema.get_column(name)
+            description.append((name, column.type if column is not None else None, None, None, None, None,
+                                column is None or not column.primary_key))
+        return description
+
+    def _reset(self) -> None:
+        if self._result is not None:
+            self._result.close()
+        self._result = None
+        self.description = None
+        self.rowcount = -1
+        self.statusmessage = None
+        self._names = []
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise InterfaceError("Cursor is closed")
+        self.connection._check_open()
+
+
+class ConnectionPool:
+    # Hands out up to `size` connections to threads; a thread that finds none
+    # free waits up to `timeout` seconds. Connections share the pool's engine.
+    def __init__(self, database: Optional[Union[str, Path]] = None, size: int = POOL_SIZE,
+                 timeout: Optional[float] = POOL_TIMEOUT):
+        if size < 1:
+            raise ValueError("Pool size must be >= 1")
+        self.engine = get_engine(database)
+        self.size = size
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.closed = False
+
+    def acquire(self) -> Connection:
+        if self.closed:
+            raise InterfaceError("Pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(f"No free connection after {self.timeout}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return Connection(self.engine)
+
+    def release(self, connection: Connection) -> None:
+        # A transaction left open is rolled back, not handed on with its
+        # locks to the next borrower; a connection that cannot roll back
+        # is dropped.
+        if not connection.closed and connection.session.transaction is not None:
+            try:
+                connection.rollback()
+            except Error:
+                connection.closed = True
+        if not connection.closed and not self.closed:
+            self._idle.put(connection)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        self.closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+@contextmanager
+def _translate():
+    # Engine errors surface as the PEP 249 exception for their kind.
+    try:
+        yield
+    except Error:
+        raise
+    except ConstraintError as e:
+        raise IntegrityError(str(e)) from e
+    except (LockTimeoutError, SerializationFailure) as e:
+        raise OperationalError(str(e)) from e
+    except (QueryError, SchemaError, ValueError) as e:
+        raise ProgrammingError(str(e)) from e
+    except MiniSQLError as e:
+        raise DatabaseError(str(e)) from e
+    except OSError as e:
+        raise OperationalError(str(e)) from e
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Iterator, Optional
 
 
 @dataclass
@@ -8,73 +9,215 @@ class BPlusNode:
     is_leaf: bool
     keys: list[Any] = field(default_factory=list)
     children: list[Any] = field(default_factory=list)
-    next: Optional["BPlusNode"] = None
+    next: Optional[Any] = None
+    page_id: Optional[int] = None
 
 
 class BPlusTree:
+    # Internal children and leaf `next` links hold node references. In this
+    # in-memory tree a reference is the node itself; subclasses that keep
+    # nodes elsewhere override _ref/_load/_new_node/_touch/_free/_set_root.
+
     def __init__(self, order: int = 4):
+        self._set_order(order)
+        self.root = BPlusNode(is_leaf=True)
+        self.size = 0
+
+    def _set_order(self, order: int) -> None:
         if order < 3:
             raise ValueError("Order must be >= 3")
         self.order = order
-        self.root = BPlusNode(is_leaf=True)
+        self.min_keys = max(1, (order - 1) // 2)
+        # Splitting a full internal node must leave a key on both sides, which
+        # takes at least three keys.
+        self.max_internal_keys = max(order - 1, 3)
+
+    @classmethod
+    def bulk_load(cls, items: Iterable[tuple[Any, Any]], order: int = 4, fill_factor: float = 1.0,
+                  **kwargs) -> "BPlusTree":
+        if not 0 < fill_factor <= 1:
+            raise ValueError("Fill factor must be in (0, 1]")
+        tree = cls(order=order, **kwargs)
+        # A dict keeps the last value for a repeated key, like repeated insert().
+        entries = dict(items)
+        keys = sorted(entries)
+        values = list(map(entries.__getitem__, keys))
+        if not keys:
+            return tree
+
+        per_leaf = max(tree.min_keys, int((order - 1) * fill_factor))
+        level: list[BPlusNode] = []
+        for group in tree._pack(len(keys), per_leaf, tree.min_keys, order - 1):
+            leaf = tree._new_node(is_leaf=True)
+            leaf.keys, leaf.children = keys[group], values[group]
+            if level:
+                level[-1].next = tree._ref(leaf)
+                tree._touch(level[-1])
+            level.append(leaf)
+        tree._touch(level[-1])
+        lows = [leaf.keys[0] for leaf in level]
+
+        per_node = max(tree.min_keys + 1, int((tree.max_internal_keys + 1) * fill_factor))
+        while len(level) > 1:
+            parents, parent_lows = [], []
+            for group in tree._pack(len(level), per_node, tree.min_keys + 1, tree.max_internal_keys + 1):
+                parent = tree._new_node(is_leaf=False)
+                parent.keys, parent.children = lows[group][1:], [tree._ref(child) for child in level[group]]
+                tree._touch(parent)
+                parents.append(parent)
+                parent_lows.append(lows[group.start])
+            level, lows = parents, parent_lows
+
+        old_root = tree.root
+        tree._set_root(level[0])
+        tree._free(old_root)
+        tree.size = len(keys)
+        return tree
+
+    @staticmethod
+    def _pack(count: int, per_node: int, minimum: int, capacity: int) -> list[slice]:
+        groups = [slice(start, min(start + per_node, count)) for start in range(0, count, per_node)]
+        if len(groups) > 1 and groups[-1].stop - groups[-1].start < minimum:
+            # Fold an underfull tail into its neighbour, or split the two evenly.
+            start, stop = groups[-2].start, groups[-1].stop
+            if stop - start <= capacity:
+                groups[-2:] = [slice(start, stop)]
+            else:
+                middle = start + (stop - start) // 2
+                groups[-2:] = [slice(start, middle), slice(middle, stop)]
+        return groups
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[Any]:
+        return (key for key, _ in self.range_scan())
+
+    def items(self) -> Iterator[tuple[Any, Any]]:
+        return self.range_scan()
 
     def search(self, key: Any):
+        leaf = self._find_leaf(key)
+        idx = bisect_left(leaf.keys, key)
+        if idx < len(leaf.keys) and leaf.keys[idx] == key:
+            return leaf.children[idx]
+        return None
+
+    def min(self) -> Optional[tuple[Any, Any]]:
         node = self.root
         while not node.is_leaf:
-            idx = self._find_index(node.keys, key)
-            node = node.children[idx]
-        for i, k in enumerate(node.keys):
-            if k == key:
-                return node.children[i]
-        return None
+            node = self._child(node, 0)
+        return (node.keys[0], node.children[0]) if node.keys else None
+
+    def max(self) -> Optional[tuple[Any, Any]]:
+        node = self.root
+        while not node.is_leaf:
+            node = self._child(node, -1)
+        return (node.keys[-1], node.children[-1]) if node.keys else None
+
+    def range_scan(self, low: Any = None, high: Any = None, low_inclusive: bool = True,
+                   high_inclusive: bool = True, reverse: bool = False) -> Iterator[tuple[Any, Any]]:
+        if reverse:
+            return self._reverse_scan(self.root, low, high, low_inclusive, high_inclusive)
+        return self._forward_scan(low, high, low_inclusive, high_inclusive)
+
+    def _forward_scan(self, low: Any, high: Any, low_inclusive: bool,
+                      high_inclusive: bool) -> Iterator[tuple[Any, Any]]:
+        node = self.root
+        while not node.is_leaf:
+            node = self._child(node, 0 if low is None else self._find_index(node.keys, low))
+
+        if low is None:
+            idx = 0
+        elif low_inclusive:
+            idx = bisect_left(node.keys, low)
+        else:
+            idx = bisect_right(node.keys, low)
+
+        while node is not None:
+            keys = node.keys
+            while idx < len(keys):
+                key = keys[idx]
+                if high is not None and (key > high or (key == high and not high_inclusive)):
+                    return
+                yield key, node.children[idx]
+                idx += 1
+            node = None if node.next is None else self._load(node.next)
+            idx = 0
+
+    def _reverse_scan(self, node: BPlusNode, low: Any, high: Any, low_inclusive: bool,
+                      high_inclusive: bool) -> Iterator[tuple[Any, Any]]:
+        # Leaves only link forwards, so walk the subtrees right to left and
+        # skip any whose separator keys put them outside the range.
+        if node.is_leaf:
+            end = len(node.keys) if high is None else \
+                (bisect_right(node.keys, high) if high_inclusive else bisect_left(node.keys, high))
+            for idx in range(end - 1, -1, -1):
+                key = node.keys[idx]
+                if low is not None and (key < low or (key == low and not low_inclusive)):
+                    return
+                yield key, node.children[idx]
+            return
+        last = len(node.children) - 1 if high is None else self._find_index(node.keys, high)
+        first = 0 if low is None else self._find_index(node.keys, low)
+        for idx in range(last, first - 1, -1):
+            yield from self._reverse_scan(self._child(node, idx), low, high, low_inclusive, high_inclusive)
 
     def insert(self, key: Any, value: Any):
         root = self.root
-        if len(root.keys) >= self.order - 1:
-            new_root = BPlusNode(is_leaf=False)
-            new_root.children.append(root)
+        if self._is_full(root):
+            new_root = self._new_node(is_leaf=False)
+            new_root.children.append(self._ref(root))
             self._split_child(new_root, 0)
-            self.root = new_root
+            self._set_root(new_root)
         self._insert_non_full(self.root, key, value)
 
     def _insert_non_full(self, node: BPlusNode, key: Any, value: Any):
         if node.is_leaf:
             idx = self._find_index(node.keys, key)
-            if idx < len(node.keys) and node.keys[idx] == key:
-                node.children[idx] = value
+            if idx > 0 and node.keys[idx - 1] == key:
+                node.children[idx - 1] = value
+                self._touch(node)
                 return
             node.keys.insert(idx, key)
             node.children.insert(idx, value)
+            self._touch(node)
+            self.size += 1
             return
 
         idx = self._find_index(node.keys, key)
-        child = node.children[idx]
+        child = self._child(node, idx)
 
-        if len(child.keys) >= self.order - 1:
-            self._split_child(node, idx)
+        if self._is_full(child):
+            self._split_child(node, idx, child)
             if key >= node.keys[idx]:
                 idx += 1
+            child = self._child(node, idx)
 
-        self._insert_non_full(node.children[idx], key, value)
+        self._insert_non_full(child, key, value)
 
-    def _split_child(self, parent: BPlusNode, index: int):
-        child = parent.children[index]
-        mid = (self.order - 1) // 2
+    def _is_full(self, node: BPlusNode) -> bool:
+        return len(node.keys) >= (self.order - 1 if node.is_leaf else self.max_internal_keys)
+
+    def _split_child(self, parent: BPlusNode, index: int, child: Optional[BPlusNode] = None):
+        child = child or self._child(parent, index)
+        mid = (self.order - 1) // 2 if child.is_leaf else len(child.keys) // 2
 
         if child.is_leaf:
-            new_leaf = BPlusNode(is_leaf=True)
+            new_leaf = self._new_node(is_leaf=True)
             new_leaf.keys = child.keys[mid:]
             new_leaf.children = child.children[mid:]
             child.keys = child.keys[:mid]
             child.children = child.children[:mid]
 
             new_leaf.next = child.next
-            child.next = new_leaf
+            child.next = self._ref(new_leaf)
 
             parent.keys.insert(index, new_leaf.keys[0])
-            parent.children.insert(index + 1, new_leaf)
+            parent.children.insert(index + 1, self._ref(new_leaf))
+            self._touch(new_leaf)
         else:
-            new_internal = BPlusNode(is_leaf=False)
+            new_internal = self._new_node(is_leaf=False)
 
             promote_key = child.keys[mid]
 
@@ -85,14 +228,114 @@ class BPlusTree:
             child.children = child.children[:mid + 1]
 
             parent.keys.insert(index, promote_key)
-            parent.children.insert(index + 1, new_internal)
+            parent.children.insert(index + 1, self._ref(new_internal))
+            self._touch(new_internal)
+        self._touch(child)
+        self._touch(parent)
 
-    def _find_index(self, keys: list[Any], key: Any) -> int:
-        lo, hi = 0, len(keys)
-        while lo < hi:
-            mid = (lo + hi) // 2
-            if key < keys[mid]:
-                hi = mid
+    def delete(self, key: Any) -> bool:
+        deleted = self._delete(self.root, key)
+        while not self.root.is_leaf and not self.root.keys:
+            old_root = self.root
+            self._set_root(self._child(old_root, 0))
+            self._free(old_root)
+        if deleted:
+            self.size -= 1
+        return deleted
+
+    def _delete(self, node: BPlusNode, key: Any) -> bool:
+        if node.is_leaf:
+            idx = bisect_left(node.keys, key)
+            if idx == len(node.keys) or node.keys[idx] != key:
+                return False
+            del node.keys[idx]
+            del node.children[idx]
+            self._touch(node)
+            return True
+
+        idx = self._find_index(node.keys, key)
+        child = self._child(node, idx)
+        deleted = self._delete(child, key)
+        if deleted and len(child.keys) < self.min_keys:
+            self._rebalance(node, idx, child)
+        return deleted
+
+    def _rebalance(self, parent: BPlusNode, idx: int, child: BPlusNode):
+        left = self._child(parent, idx - 1) if idx > 0 else None
+        right = self._child(parent, idx + 1) if idx + 1 < len(parent.children) else None
+
+        if left is not None and len(left.keys) > self.min_keys:
+            if child.is_leaf:
+                child.keys.insert(0, left.keys.pop())
+                child.children.insert(0, left.children.pop())
+                parent.keys[idx - 1] = child.keys[0]
             else:
-                lo = mid + 1
-        return lo
+                child.keys.insert(0, parent.keys[idx - 1])
+                child.children.insert(0, left.children.pop())
+                parent.keys[idx - 1] = left.keys.pop()
+            self._touch(left)
+        elif right is not None and len(right.keys) > self.min_keys:
+            if child.is_leaf:
+                child.keys.append(right.keys.pop(0))
+                child.children.append(right.children.pop(0))
+                parent.keys[idx] = right.keys[0]
+            else:
+                child.keys.append(parent.keys[idx])
+                child.children.append(right.children.pop(0))
+                parent.keys[idx] = right.keys.pop(0)
+            self._touch(right)
+        elif left is not None:
+            self._merge(parent, idx - 1, left, child)
+            return
+        elif right is not None:
+            self._merge(parent, idx, child, right)
+            return
+        else:
+            return
+        self._touch(child)
+        self._touch(parent)
+
+    def _merge(self, parent: BPlusNode, idx: int, left: BPlusNode, right: BPlusNode):
+        separator = parent.keys.pop(idx)
+        parent.children.pop(idx + 1)
+        if left.is_leaf:
+            left.keys.extend(right.keys)
+            left.children.extend(right.children)
+            left.next = right.next
+        else:
+            left.keys.append(separator)
+            left.keys.extend(right.keys)
+            left.children.extend(right.children)
+        self._touch(left)
+        self._touch(parent)
+        self._free(right)
+
+    def _find_leaf(self, key: Any) -> BPlusNode:
+        node = self.root
+        while not node.is_leaf:
+            node = self._child(node, self._find_index(node.keys, key))
+        return node
+
+    def _find_index(self, keys: list[Any], key: Any) -> int:
+        return bisect_right(keys, key)
+
+    def _child(self, node: BPlusNode, idx: int) -> BPlusNode:
+        return self._load(node.children[idx])
+
+    def _load(self, ref: Any) -> BPlusNode:
+        return ref
+
+    def _ref(self, node: BPlusNode) -> Any:
+        return node
+
+    def _new_node(self, is_leaf: bool) -> BPlusNode:
+        return BPlusNode(is_leaf=is_leaf)
+
+    def _touch(self, node: BPlusNode) -> None:
+        pass
+
+    def _free(self, node: BPlusNode) -> None:
+        pass
+
+    def _set_root(self, node: BPlusNode) -> None:
+        self.root = node
@@ -0,0 +1,179 @@
+import math
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional
+from minisql.config.settings import HASH_BUCKET_SIZE
+
+# Hashes are 32 bits wide, so the directory never needs more than 32 bits.
+MAX_DEPTH = 32
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_FLOAT = struct.Struct("<d")
+
+
+def stable_hash(key: Any) -> int:
+    # hash() of a str changes between processes, which would scramble a
+    # persisted directory. Keys that compare equal hash alike, as with hash().
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)
+    if isinstance(key, int):
+        # Fibonacci hashing spreads sequential ids over the low bits.
+        return ((key * _GOLDEN) & _MASK64) >> 32
+    if isinstance(key, str):
+        return zlib.crc32(key.encode("utf-8"))
+    if isinstance(key, float):
+        return zlib.crc32(_FLOAT.pack(key))
+    if isinstance(key, tuple):
+        h = len(key)
+        for item in key:
+            h = zlib.crc32(stable_hash(item).to_bytes(4, "little"), h)
+        return h
+    if key is None:
+        return 0
+    raise TypeError(f"Cannot hash a {type(key).__name__} index key")
+
+
+@dataclass
+class HashBucket:
+    depth: int
+    entries: dict = field(default_factory=dict)
+    page_id: Optional[int] = None
+
+
+class HashIndex:
+    # Extendible hashing. The directory has 2**depth slots and the low `depth`
+    # bits of a key's hash pick one; a bucket of local depth d is shared by
+    # every slot that agrees on the low d bits. A full bucket splits on its
+    # next bit, doubling the directory first when it is already at full depth,
+    # so growth touches one bucket at a time instead of rehashing everything.
+    # Buckets are not merged back on delete.
+    #
+    # Directory slots hold bucket references. Here a reference is the bucket
+    # itself; subclasses that keep buckets elsewhere override
+    # _ref/_load/_new_bucket/_touch/_set_slots.
+
+    def __init__(self, bucket_size: int = HASH_BUCKET_SIZE):
+        self._set_bucket_size(bucket_size)
+        self.depth = 0
+        self.size = 0
+        self.directory = [self._ref(self._new_bucket(0))]
+
+    def _set_bucket_size(self, bucket_size: int) -> None:
+        if bucket_size < 1:
+            raise ValueError("Bucket size must be >= 1")
+        self.bucket_size = bucket_size
+
+    @classmethod
+    def bulk_load(cls, items: Iterable[tuple[Any, Any]], bucket_size: int = HASH_BUCKET_SIZE,
+                  fill_factor: float = 1.0, **kwargs) -> "HashIndex":
+        if not 0 < fill_factor <= 1:
+            raise ValueError("Fill factor must be in (0, 1]")
+        index = cls(bucket_size=bucket_size, **kwargs)
+        entries = dict(items)
+        if not entries:
+            return index
+
+        # Size the directory up front so that each slot gets its own bucket at
+        # the requested fill; only skewed slots split afterwards.
+        per_bucket = max(1, int(bucket_size * fill_factor))
+        depth = min(MAX_DEPTH, max(0, math.ceil(math.log2(len(entries) / per_bucket))))
+        groups: list[dict] = [{} for _ in range(1 << depth)]
+        mask = (1 << depth) - 1
+        for key, value in entries.items():
+            groups[stable_hash(key) & mask][key] = value
+
+        first = index._load(index.directory[0])
+        buckets = [first] + [index._new_bucket(depth) for _ in range(len(groups) - 1)]
+        index.depth = depth
+        index.directory = [index._ref(bucket) for bucket in buckets]
+        spill = []
+        for bucket, group in zip(buckets, groups):
+            bucket.depth = depth
+            if len(group) > bucket_size:
+                pairs = list(group.items())
+                group = dict(pairs[:bucket_size])
+                spill.extend(pairs[bucket_size:])
+            bucket.entries = group
+            index.size += len(group)
+            index._touch(bucket)
+        index._set_slots(range(len(buckets)))
+        for key, value in spill:
+            index.insert(key, value)
+        return index
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[Any]:
+        return (key for key, _ in self.items())
+
+    def items(self) -> Iterator[tuple[Any, Any]]:
+        # Each bucket once, from the lowest slot that points at it; keys come
+        # out unordered.
+        for slot, ref in enumerate(self.directory):
+            bucket = self._load(ref)
+            if slot < 1 << bucket.depth:
+                yield from list(bucket.entries.items())
+
+    def search(self, key: Any):
+        return self._bucket(stable_hash(key)).entries.get(key)
+
+    def insert(self, key: Any, value: Any):
+        h = stable_hash(key)
+        while True:
+            slot = h & ((1 << self.depth) - 1)
+            bucket = self._load(self.directory[slot])
+            if key in bucket.entries or len(bucket.entries) < self.bucket_size or bucket.depth >= MAX_DEPTH:
+                break
+            self._split(bucket, slot)
+        if key not in bucket.entries:
+            self.size += 1
+        bucket.entries[key] = value
+        self._touch(bucket)
+
+    def delete(self, key: Any) -> bool:
+        bucket = self._bucket(stable_hash(key))
+        if key not in bucket.entries:
+            return False
+        del bucket.entries[key]
+        self.size -= 1
+        self._touch(bucket)
+        return True
+
+    def _bucket(self, h: int) -> HashBucket:
+        return self._load(self.directory[h & ((1 << self.depth) - 1)])
+
+    def _split(self, bucket: HashBucket, slot: int) -> None:
+        if bucket.depth == self.depth:
+            half = len(self.directory)
+            self.directory += self.directory
+            self.depth += 1
+            self._set_slots(range(half, len(self.directory)))
+        bit = 1 << bucket.depth
+        bucket.depth += 1
+        sibling = self._new_bucket(bucket.depth)
+        for key in [k for k in bucket.entries if stable_hash(k) & bit]:
+            sibling.entries[key] = bucket.entries.pop(key)
+        self._touch(bucket)
+        self._touch(sibling)
+        ref = self._ref(sibling)
+        moved = range((slot & (bit - 1)) | bit, len(self.directory), bit << 1)
+        for s in moved:
+            self.directory[s] = ref
+        self._set_slots(moved)
+
+    def _load(self, ref: Any) -> HashBucket:
+        return ref
+
+    def _ref(self, bucket: HashBucket) -> Any:
+        return bucket
+
+    def _new_bucket(self, depth: int) -> HashBucket:
+        return HashBucket(depth)
+
+    def _touch(self, bucket: HashBucket) -> None:
+        pass
+
+    def _set_slots(self, slots: range) -> None:
+        pass
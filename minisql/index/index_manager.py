@@ -1,42 +1,341 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union
+from minisql.cache.buffer_pool import BufferPool
 from minisql.catalog.schema import TableSchema
+from minisql.config.settings import HASH_BUCKET_SIZE, INDEX_FILL_FACTOR, INDEX_ORDER
+from minisql.storage.file_manager import FileManager
 from .bplustree import BPlusTree
+from .hash_index import HashIndex
+from .paged_bplustree import PagedBPlusTree
+from .paged_hash_index import PagedHashIndex
+
+BTREE, HASH = "btree", "hash"
+INDEX_SUFFIX = ".idx"
+HASH_SUFFIX = ".hidx"
+
+
+@dataclass
+class IndexInfo:
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    unique: bool = True
+    kind: str = BTREE
+
+    @property
+    def composite(self) -> bool:
+        return len(self.columns) > 1
+
+    @property
+    def ordered(self) -> bool:
+        # Only B+ trees keep keys in order, so only they answer range and
+        # prefix scans; hash indexes answer equality alone.
+        return self.kind == BTREE
+
+    @property
+    def filename(self) -> str:
+        return self.name + (HASH_SUFFIX if self.kind == HASH else INDEX_SUFFIX)
+
+    def key(self, row: dict) -> Any:
+        # Composite keys are tuples and compare column by column. Rows with a
+        # NULL in any key column are not indexed.
+        values = tuple(row.get(column) for column in self.columns)
+        if any(value is None for value in values):
+            return None
+        return values if self.composite else values[0]
+
+
+class _Top:
+    # Sorts after every value, so (v, _TOP) bounds every composite key that
+    # starts with v from above.
+    def __lt__(self, other): return False
+    def __le__(self, other): return False
+    def __gt__(self, other): return True
+    def __ge__(self, other): return True
+
+
+_TOP = _Top()
+
 
 class IndexManager:
-    def __init__(self):
-        self.indexes: dict[str, BPlusTree] = {}
+    # Indexes are known by name. The ones the executor creates for PRIMARY KEY
+    # and UNIQUE columns are named "<table>.<column>"; CREATE INDEX picks its own.
+    # Unique indexes map each key to a rid, the others to a posting list of rids.
+    # An index is a B+ tree unless created as a hash index.
+    #
+    # Without an index directory every index lives in memory. With one, each
+    # is a page file "<name>.idx" (or "<name>.hidx" for hash indexes) read
+    # through the buffer pool; passing the table manager's pool puts index
+    # pages under the same WAL.
+    def __init__(self, index_dir: Optional[Union[str, Path]] = None, buffer_pool: Optional[BufferPool] = None):
+        self.indexes: dict[str, Union[BPlusTree, HashIndex]] = {}
+        self.definitions: dict[str, IndexInfo] = {}
+        # Bumped whenever the set of indexes changes, so cached plans that
+        # picked (or passed over) an index can tell they are stale.
+        self.version = 0
+        self.file_manager = None
+        self.buffer_pool = buffer_pool
+        if index_dir is not None:
+            self.file_manager = FileManager(index_dir)
+            self.buffer_pool = buffer_pool or BufferPool()
+            self._open_indexes()
 
-    def create_index(self, table_name: str, column_name: str, table_schema: TableSchema):
-        index_key = f"{table_name}.{column_name}"
-        if index_key in self.indexes:
+    def create_index(self, table_name: str, column_name: Union[str, Sequence[str]], table_schema: TableSchema,
+                     rows=(), order: Optional[int] = None, fill_factor: float = INDEX_FILL_FACTOR,
+                     name: Optional[str] = None, unique: bool = True, kind: str = BTREE) -> IndexInfo:
+        # For a hash index `order` is the bucket size.
+        if kind not in (BTREE, HASH):
+            raise ValueError(f"Unknown index type {kind}")
+        columns = (column_name,) if isinstance(column_name, str) else tuple(column_name)
+        info = IndexInfo(name or f"{table_name}.{columns[0]}", table_name, tuple(c.lower() for c in columns),
+                         unique, kind)
+        if info.name in self.indexes:
+            return self.definitions[info.name]
+
+        for column in columns:
+            self._get_column_index(table_schema, column)
+        entries = self._collect([info], rows)[info.name]
+        order = order or (HASH_BUCKET_SIZE if kind == HASH else INDEX_ORDER)
+        # Both maps are replaced rather than changed in place, here and in
+        # rebuild(), truncate() and drop(), so threads planning against the
+        # old ones can keep iterating them.
+        self.indexes = {**self.indexes, info.name: self._new_tree(info, order, entries.items(), fill_factor)}
+        self.definitions = {**self.definitions, info.name: info}
+        self.version += 1
+        return info
+
+    def rebuild(self, table_name: str, rows, fill_factor: float = INDEX_FILL_FACTOR) -> None:
+        # Bulk-loads every index of the table again from `rows`, read once.
+        infos = self.table_indexes(table_name)
+        if not infos:
+            return
+        entries = self._collect(infos, rows)
+        self.indexes = {**self.indexes, **{info.name: self._new_tree(info, self._order(info),
+                                                                     entries[info.name].items(), fill_factor)
+                                           for info in infos}}
+
+    def get_index(self, name: str) -> Optional[IndexInfo]:
+        return self.definitions.get(name)
+
+    def table_indexes(self, table_name: str) -> list[IndexInfo]:
+        return [info for info in self.definitions.values() if info.table == table_name]
+
+    def find_index(self, table_name: str, columns: Sequence[str], unique: Optional[bool] = None) -> Optional[IndexInfo]:
+        # An index on exactly these columns, preferring a unique one, then a
+        # hash index, which answers a lookup without walking a tree.
+        return self._best(self.table_indexes(table_name), columns, unique)
+
+    def leading_index(self, table_name: str, column_name: str, ordered: bool = False) -> Optional[IndexInfo]:
+        # The best index for a condition on one column: a single-column index,
+        # else a B+ tree whose composite key starts with the column. `ordered`
+        # asks for an index that can scan a range.
+        candidates = [info for info in self.table_indexes(table_name) if info.ordered or not ordered]
+        exact = self._best(candidates, [column_name])
+        if exact is not None:
+            return exact
+        column_name = column_name.lower()
+        return next((info for info in candidates if info.ordered and info.columns[0] == column_name), None)
+
+    def add_entry(self, name: str, key, rid):
+        # A unique index holds one rid per key, or a list of them while
+        # several versions of rows with the key are kept.
+        tree, info = self.indexes[name], self.definitions[name]
+        postings = tree.search(key)
+        if info.unique and (postings is None or postings == rid):
+            tree.insert(key, rid)
             return
-        
-        self.indexes[index_key] = BPlusTree()
-        col_idx = self._get_column_index(table_schema, column_name)
-        
-        data = getattr(table_schema, "data", [])
-        for row in data:
-            if column_name in row:
-                self.indexes[index_key].insert(row[column_name], row)
+        if info.unique and not isinstance(postings, list):
+            postings = [postings]
+        if postings is None:
+            tree.insert(key, [rid])
+        elif rid not in postings:
+            tree.insert(key, postings + [rid])
+
+    def remove_entry(self, name: str, key, rid=None) -> bool:
+        tree, info = self.indexes[name], self.definitions[name]
+        postings = tree.search(key)
+        if info.unique and not isinstance(postings, list):
+            # Only remove the entry if it still points at the row being removed.
+            if rid is not None and postings != rid:
+                return False
+            return tree.delete(key)
+        if not postings or (rid is not None and rid not in postings):
+            return False
+        remaining = [] if rid is None else [r for r in postings if r != rid]
+        if info.unique and len(remaining) == 1:
+            tree.insert(key, remaining[0])
+        elif remaining:
+            tree.insert(key, remaining)
+        else:
+            tree.delete(key)
+        return True
+
+    def lookup(self, name: str, key) -> Iterator[tuple[Any, Any]]:
+        info = self.definitions[name]
+        if info.composite and not isinstance(key, tuple):
+            return self.scan(name, key, key)
+        value = self.indexes[name].search(key)
+        return self._entries(info, () if value is None else [(key, value)])
+
+    def scan(self, name: str, low=None, high=None, low_inclusive: bool = True, high_inclusive: bool = True,
+             reverse: bool = False) -> Iterator[tuple[Any, Any]]:
+        info = self.definitions[name]
+        if not info.ordered:
+            raise ValueError(f"Index {name} is a hash index and cannot scan a range")
+        if info.composite:
+            # Scalar bounds apply to the leading column of a composite key.
+            if low is not None and not isinstance(low, tuple):
+                low = (low,) if low_inclusive else (low, _TOP)
+            if high is not None and not isinstance(high, tuple):
+                high = (high, _TOP) if high_inclusive else (high,)
+        return self._entries(info, self.indexes[name].range_scan(low, high, low_inclusive, high_inclusive, reverse))
 
     def insert(self, table_name: str, column_name: str, key, value):
         index_key = f"{table_name}.{column_name}"
         if index_key in self.indexes:
-            self.indexes[index_key].insert(key, value)
+            self.add_entry(index_key, key, value)
+
+    def delete(self, table_name: str, column_name: str, key, value=None) -> bool:
+        index_key = f"{table_name}.{column_name}"
+        if index_key not in self.indexes:
+            return False
+        return self.remove_entry(index_key, key, value)
+
+    def truncate(self, table_name: str):
+        self.indexes = {**self.indexes, **{info.name: self._new_tree(info, self._order(info))
+                                           for info in self.table_indexes(table_name)}}
+
+    def drop(self, name: str):
+        if name not in self.indexes:
+            raise ValueError(f"No index named {name}")
+        info = self.definitions[name]
+        self.indexes = {key: tree for key, tree in self.indexes.items() if key != name}
+        self.definitions = {key: d for key, d in self.definitions.items() if key != name}
+        self.version += 1
+        self._delete_file(info.filename)
 
     def drop_index(self, table_name: str, column_name: str):
         index_key = f"{table_name}.{column_name}"
         if index_key not in self.indexes:
             raise ValueError(f"No index found on {index_key}")
-        del self.indexes[index_key]
+        self.drop(index_key)
+
+    def drop_table(self, table_name: str):
+        for info in self.table_indexes(table_name):
+            self.drop(info.name)
 
     def search_index(self, table_name: str, column_name: str, value):
-        index_key = f"{table_name}.{column_name}"
-        if index_key not in self.indexes:
+        info = self.find_index(table_name, [column_name])
+        if info is None:
             return None
-        return self.indexes[index_key].search(value)
+        return self.indexes[info.name].search(value)
+
+    def range_search(self, table_name: str, column_name: str, low=None, high=None,
+                     low_inclusive: bool = True, high_inclusive: bool = True, reverse: bool = False):
+        info = self.leading_index(table_name, column_name, ordered=True)
+        if info is None:
+            return iter(())
+        return self.scan(info.name, low, high, low_inclusive, high_inclusive, reverse)
+
+    def has_index(self, table_name: str, column_name: str) -> bool:
+        return self.find_index(table_name, [column_name]) is not None
+
+    def indexed_columns(self, table_name: str) -> list[str]:
+        return list(dict.fromkeys(info.columns[0] for info in self.table_indexes(table_name)))
+
+    def flush(self) -> None:
+        if self.file_manager is None:
+            return
+        for info in self.definitions.values():
+            self.buffer_pool.flush_file(self.file_manager, info.filename)
+        self.file_manager.sync()
+
+    def close(self) -> None:
+        self.flush()
+        if self.file_manager is not None:
+            self.file_manager.close()
+
+    def _collect(self, infos: list[IndexInfo], rows) -> dict[str, dict]:
+        entries: dict[str, dict] = {info.name: {} for info in infos}
+        for rid, row in rows:
+            for info in infos:
+                key = info.key(row)
+                if key is None:
+                    continue
+                keyed = entries[info.name]
+                if not info.unique:
+                    keyed.setdefault(key, []).append(rid)
+                elif key not in keyed:
+                    keyed[key] = rid
+                else:
+                    # Versions of rows with the key; at most one is current.
+                    keyed[key] = (keyed[key] if isinstance(keyed[key], list) else [keyed[key]]) + [rid]
+        return entries
+
+    def _order(self, info: IndexInfo) -> int:
+        index = self.indexes[info.name]
+        return index.bucket_size if info.kind == HASH else index.order
+
+    def _entries(self, info: IndexInfo, pairs: Iterable[tuple[Any, Any]]) -> Iterator[tuple[Any, Any]]:
+        for key, postings in pairs:
+            if not isinstance(postings, list):
+                yield key, postings
+                continue
+            for rid in postings:
+                yield key, rid
+
+    def _best(self, candidates: Iterable[IndexInfo], columns: Sequence[str],
+              unique: Optional[bool] = None) -> Optional[IndexInfo]:
+        wanted = tuple(c.lower() for c in columns)
+        matches = [info for info in candidates
+                   if info.columns == wanted and (unique is None or info.unique == unique)]
+        return max(matches, key=lambda info: (info.unique, info.kind == HASH), default=None)
+
+    def _open_indexes(self):
+        for filename in sorted(self.file_manager.list_files()):
+            if filename.endswith(INDEX_SUFFIX):
+                name, tree = filename[:-len(INDEX_SUFFIX)], PagedBPlusTree(self.file_manager, filename,
+                                                                           self.buffer_pool)
+            elif filename.endswith(HASH_SUFFIX):
+                name, tree = filename[:-len(HASH_SUFFIX)], PagedHashIndex(self.file_manager, filename,
+                                                                          self.buffer_pool)
+            else:
+                continue
+            if not tree.ready:
+                # The build never finished; the index is recreated on next use.
+                self._delete_file(filename)
+                continue
+            if tree.descriptor is None:
+                table, column = name.split(".", 1)
+                info = IndexInfo(name, table, (column,))
+            else:
+                table, columns, unique, *kind = tree.descriptor
+                info = IndexInfo(name, table, tuple(columns), unique, kind[0] if kind else BTREE)
+            self.indexes[name] = tree
+            self.definitions[name] = info
+
+    def _new_tree(self, info: IndexInfo, order: int, entries=(),
+                  fill_factor: float = 1.0) -> Union[BPlusTree, HashIndex]:
+        structure = HashIndex if info.kind == HASH else BPlusTree
+        if self.file_manager is None:
+            return structure.bulk_load(entries, order, fill_factor)
+        structure = PagedHashIndex if info.kind == HASH else PagedBPlusTree
+        self._delete_file(info.filename)
+        tree = structure.bulk_load(entries, order, fill_factor, file_manager=self.file_manager,
+                                   filename=info.filename, buffer_pool=self.buffer_pool,
+                                   descriptor=[info.table, list(info.columns), info.unique, info.kind])
+        tree.mark_ready()
+        return tree
+
+    def _delete_file(self, filename: str):
+        if self.file_manager is None:
+            return
+        self.buffer_pool.discard_file(self.file_manager, filename)
+        self.file_manager.delete_file(filename)
 
     def _get_column_index(self, table_schema: TableSchema, column_name: str):
         for idx, col in enumerate(table_schema.columns):
-            if col.name == column_name:
+            if col.name.lower() == column_name.lower():
                 return idx
-        raise ValueError(f"Column {column_name} does not exist in table {table_schema.table_name}")
\ No newline at end of file
+        raise ValueError(f"Column {column_name} does not exist in table {table_schema.name}")
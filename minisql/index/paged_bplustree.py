@@ -0,0 +1,99 @@
+import struct
+from typing import Any, Optional
+from minisql.cache.buffer_pool import BufferPool
+from minisql.cache.lru_cache import LRUCache
+from minisql.config.settings import INDEX_NODE_CACHE_SIZE
+from minisql.storage.file_manager import FileManager
+from .bplustree import BPlusNode, BPlusTree
+from .paged_file import PagedFile, decode_list, encode_list
+
+
+class PagedBPlusTree(PagedFile, BPlusTree):
+    # Every page after the meta page holds one node, or a piece of one. Node
+    # references are page ids.
+    MAGIC = b"BPT1"
+    # Meta: magic, build state, order, root page, entry count, free list head,
+    # page count, followed by the tagged descriptor value.
+    META = struct.Struct("<4sBIIQII")
+    # Node: leaf flag, key encoding, value encoding, key count, value count,
+    # key bytes, next leaf, first overflow page.
+    NODE = struct.Struct("<BBBIIIII")
+
+    def __init__(self, file_manager: FileManager, filename: str, buffer_pool: Optional[BufferPool] = None,
+                 order: int = 4, cache_size: int = INDEX_NODE_CACHE_SIZE, descriptor: Any = None):
+        PagedFile.__init__(self, file_manager, filename, buffer_pool)
+        self.nodes = LRUCache(cache_size)
+
+        if self._exists():
+            # Opening only reads the meta page; nodes load on first access.
+            state, order, self._root_id, self.size, self._free_head, self.num_pages, self.descriptor = \
+                self._read_meta()
+            self._set_order(order)
+            self.ready = state == self.READY
+            return
+
+        self._set_order(order)
+        self.descriptor = descriptor
+        self.size = 0
+        self._create_meta_page()
+        root = self._new_node(is_leaf=True)
+        self._touch(root)
+        self._set_root(root)
+
+    @property
+    def root(self) -> BPlusNode:
+        return self._load(self._root_id)
+
+    def insert(self, key: Any, value: Any):
+        super().insert(key, value)
+        self._write_meta()
+
+    def delete(self, key: Any) -> bool:
+        deleted = super().delete(key)
+        if deleted:
+            self._write_meta()
+        return deleted
+
+    def _load(self, ref: int) -> BPlusNode:
+        node = self.nodes.get(ref)
+        if node is not None:
+            return node
+        (is_leaf, key_codec, value_codec, key_count, value_count, key_bytes, next_leaf), body = \
+            self._read_chained(ref, self.NODE)
+        node = BPlusNode(
+            is_leaf=bool(is_leaf),
+            keys=decode_list(key_codec, body[:key_bytes], key_count),
+            children=decode_list(value_codec, body[key_bytes:], value_count),
+            next=next_leaf or None,
+            page_id=ref,
+        )
+        self.nodes.put(ref, node)
+        return node
+
+    def _ref(self, node: BPlusNode) -> int:
+        return node.page_id
+
+    def _new_node(self, is_leaf: bool) -> BPlusNode:
+        node = BPlusNode(is_leaf=is_leaf, page_id=self._allocate())
+        self.nodes.put(node.page_id, node)
+        return node
+
+    def _touch(self, node: BPlusNode) -> None:
+        key_codec, keys = encode_list(node.keys)
+        value_codec, values = encode_list(node.children)
+        self._write_chained(node.page_id, self.NODE, (node.is_leaf, key_codec, value_codec, len(node.keys),
+                                                      len(node.children), len(keys), node.next or 0),
+                            keys + values)
+        self.nodes.put(node.page_id, node)
+
+    def _free(self, node: BPlusNode) -> None:
+        self.nodes.pop(node.page_id)
+        self._release_chained(node.page_id)
+
+    def _set_root(self, node: BPlusNode) -> None:
+        self._root_id = node.page_id
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        self._write_meta_record(self.READY if self.ready else self.BUILDING, self.order, self._root_id,
+                                self.size, self._free_head, self.num_pages)
@@ -0,0 +1,236 @@
+import struct
+from array import array
+from itertools import chain
+from typing import Any, Optional
+from minisql.cache.buffer_pool import BufferPool
+from minisql.config.settings import MAX_RECORD_SIZE
+from minisql.storage.file_manager import FileManager
+from minisql.storage.page import PAGE_SIZE
+from minisql.utils.exceptions import StorageError
+
+# Key/value list encodings: int64 arrays and (int, int) pairs such as RIDs get
+# packed arrays; anything else is written value by value with a type tag.
+TAGGED, INTS, PAIRS = 0, 1, 2
+
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LEN = struct.Struct("<I")
+
+
+class PagedFile:
+    # Shared page handling for index structures kept in one file read through
+    # the buffer pool. Page 0 holds the owner's meta record (MAGIC, build
+    # state, its own fields, then a tagged descriptor); every other page holds
+    # one record, or a piece of one. Page id 0 doubles as "no page" in links.
+    MAGIC = b""
+    META: struct.Struct
+    # Overflow and free pages start with the next page in their chain.
+    LINK = struct.Struct("<I")
+    META_PAGE = 0
+    BUILDING, READY = 0, 1
+
+    def __init__(self, file_manager: FileManager, filename: str, buffer_pool: Optional[BufferPool] = None):
+        self.file_manager = file_manager
+        self.filename = filename
+        self.buffer_pool = buffer_pool or BufferPool()
+        self._overflow: dict[int, list[int]] = {}
+        self._free_head = 0
+        self.num_pages = 1
+        self.ready = False
+        # Whatever the owner wants kept with the index, e.g. its definition.
+        self.descriptor: Any = None
+
+    def _exists(self) -> bool:
+        return bool(self.file_manager.page_count(self.filename, PAGE_SIZE))
+
+    def _create_meta_page(self) -> None:
+        self.buffer_pool.new_page(self.file_manager, self.filename, self.META_PAGE)
+        self.buffer_pool.unpin_page(self.file_manager, self.filename, self.META_PAGE, dirty=True)
+
+    def mark_ready(self) -> None:
+        # Every page reaches the file before the meta record says the index is
+        # complete, so a crash mid-build leaves a BUILDING index that gets
+        # rebuilt instead of a truncated one that looks valid.
+        self.buffer_pool.flush_file(self.file_manager, self.filename)
+        self.ready = True
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        raise NotImplementedError
+
+    def _read_meta(self) -> tuple:
+        # Returns the META fields after the magic, with the descriptor appended.
+        record = self._read_record(self.META_PAGE)
+        if record is None or len(record) < self.META.size or record[:4] != self.MAGIC:
+            raise StorageError(f"{self.filename} is not a {type(self).__name__} index")
+        descriptor = decode_value(record, self.META.size)[0] if len(record) > self.META.size else None
+        return self.META.unpack_from(record, 0)[1:] + (descriptor,)
+
+    def _write_meta_record(self, *fields) -> None:
+        record = bytearray(self.META.pack(self.MAGIC, *fields))
+        encode_value(self.descriptor, record)
+        self._write_record(self.META_PAGE, bytes(record))
+
+    def _read_chained(self, page_id: int, header: struct.Struct) -> tuple[tuple, bytes | memoryview]:
+        # The header's last field is the first overflow page of the record.
+        # Pieces are sliced as views, so a chained body is copied once, by
+        # the join, and an unchained one not at all.
+        record = memoryview(self._read_record(page_id))
+        fields = header.unpack_from(record, 0)
+        pieces = [record[header.size:]]
+        overflow, chained = fields[-1], []
+        while overflow:
+            chained.append(overflow)
+            record = memoryview(self._read_record(overflow))
+            pieces.append(record[self.LINK.size:])
+            overflow = self.LINK.unpack_from(record, 0)[0]
+        if chained:
+            self._overflow[page_id] = chained
+            return fields[:-1], b"".join(pieces)
+        return fields[:-1], pieces[0]
+
+    def _write_chained(self, page_id: int, header: struct.Struct, fields: tuple, body: bytes) -> None:
+        head_room = MAX_RECORD_SIZE - header.size
+        room = MAX_RECORD_SIZE - self.LINK.size
+        # Records too big for one page (long string keys, long posting lists)
+        # continue on a chain of overflow pages.
+        pieces = [body[start:start + room] for start in range(head_room, len(body), room)]
+        overflow = self._overflow.pop(page_id, [])
+        while len(overflow) < len(pieces):
+            overflow.append(self._allocate())
+        while len(overflow) > len(pieces):
+            self._release(overflow.pop())
+        for i, piece in enumerate(pieces):
+            following = overflow[i + 1] if i + 1 < len(overflow) else 0
+            self._write_record(overflow[i], self.LINK.pack(following) + piece)
+        if overflow:
+            self._overflow[page_id] = overflow
+        self._write_record(page_id, header.pack(*fields, overflow[0] if overflow else 0) + body[:head_room])
+
+    def _release_chained(self, page_id: int) -> None:
+        for overflow in self._overflow.pop(page_id, []):
+            self._release(overflow)
+        self._release(page_id)
+
+    def _allocate(self) -> int:
+        if self._free_head:
+            page_id = self._free_head
+            self._free_head = self.LINK.unpack_from(self._read_record(page_id), 0)[0]
+            return page_id
+        page_id = self.num_pages
+        self.num_pages += 1
+        self.buffer_pool.new_page(self.file_manager, self.filename, page_id)
+        self.buffer_pool.unpin_page(self.file_manager, self.filename, page_id, dirty=True)
+        return page_id
+
+    def _release(self, page_id: int) -> None:
+        self._write_record(page_id, self.LINK.pack(self._free_head))
+        self._free_head = page_id
+
+    def _read_record(self, page_id: int) -> Optional[bytes]:
+        page = self.buffer_pool.fetch_page(self.file_manager, self.filename, page_id)
+        try:
+            return page.get(0)
+        finally:
+            self.buffer_pool.unpin_page(self.file_manager, self.filename, page_id)
+
+    def _write_record(self, page_id: int, record: bytes) -> None:
+        page = self.buffer_pool.fetch_page(self.file_manager, self.filename, page_id)
+        try:
+            if page.get(0) is None:
+                page.insert(record)
+            else:
+                page.update(0, record)
+        finally:
+            self.buffer_pool.unpin_page(self.file_manager, self.filename, page_id, dirty=True)
+
+
+def encode_list(values: list) -> tuple[int, bytes]:
+    if all(type(v) is int for v in values):
+        try:
+            return INTS, array("q", values).tobytes()
+        except OverflowError:
+            pass
+    elif all(type(v) is tuple and len(v) == 2 and type(v[0]) is int and type(v[1]) is int for v in values):
+        try:
+            return PAIRS, array("q", chain.from_iterable(values)).tobytes()
+        except OverflowError:
+            pass
+    out = bytearray()
+    for value in values:
+        encode_value(value, out)
+    return TAGGED, bytes(out)
+
+
+def decode_list(codec: int, data: bytes | memoryview, count: int) -> list:
+    if codec == INTS:
+        return decode_array("q", data).tolist()
+    if codec == PAIRS:
+        flat = decode_array("q", data)
+        return list(zip(flat[0::2].tolist(), flat[1::2].tolist()))
+    values, offset = [], 0
+    for _ in range(count):
+        value, offset = decode_value(data, offset)
+        values.append(value)
+    return values
+
+
+def decode_array(typecode: str, data: bytes | memoryview) -> array:
+    # array(typecode, data) iterates a memoryview byte by byte.
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+def encode_value(value: Any, out: bytearray) -> None:
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int):
+        try:
+            out += b"i" + _INT.pack(value)
+        except struct.error:
+            raise StorageError(f"Integer {value} does not fit in an index page")
+    elif isinstance(value, float):
+        out += b"d" + _FLOAT.pack(value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out += b"s" + _LEN.pack(len(data)) + data
+    elif isinstance(value, (tuple, list)):
+        out += (b"t" if isinstance(value, tuple) else b"l") + _LEN.pack(len(value))
+        for item in value:
+            encode_value(item, out)
+    else:
+        raise StorageError(f"Cannot store a {type(value).__name__} in an index page")
+
+
+def decode_value(data: bytes | memoryview, offset: int) -> tuple[Any, int]:
+    tag = bytes(data[offset:offset + 1])
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag == b"T":
+        return True, offset
+    if tag == b"F":
+        return False, offset
+    if tag == b"i":
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag == b"d":
+        return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+    if tag == b"s":
+        length = _LEN.unpack_from(data, offset)[0]
+        offset += _LEN.size
+        return str(data[offset:offset + length], "utf-8"), offset + length
+    if tag in (b"t", b"l"):
+        count = _LEN.unpack_from(data, offset)[0]
+        offset += _LEN.size
+        items = []
+        for _ in range(count):
+            item, offset = decode_value(data, offset)
+            items.append(item)
+        return (tuple(items) if tag == b"t" else items), offset
+    raise StorageError(f"Corrupt index record: unknown tag {tag!r}")
+
@@ -0,0 +1,117 @@
+import struct
+from array import array
+from typing import Any, Optional
+from minisql.cache.buffer_pool import BufferPool
+from minisql.cache.lru_cache import LRUCache
+from minisql.config.settings import HASH_BUCKET_SIZE, INDEX_NODE_CACHE_SIZE, MAX_RECORD_SIZE
+from minisql.storage.file_manager import FileManager
+from .hash_index import HashBucket, HashIndex
+from .paged_file import PagedFile, decode_array, decode_list, encode_list
+
+
+class PagedHashIndex(PagedFile, HashIndex):
+    # Buckets are pages (plus overflow pages for oversized ones) and bucket
+    # references are page ids. The directory is cut into chunk pages of page
+    # ids, listed in order by the directory page, so a split rewrites only the
+    # chunks whose slots changed.
+    MAGIC = b"HSH1"
+    # Meta: magic, build state, bucket size, directory depth, entry count,
+    # free list head, page count, directory page, then the tagged descriptor.
+    META = struct.Struct("<4sBIIQIII")
+    # Bucket: local depth, key encoding, value encoding, entry count, key
+    # bytes, first overflow page.
+    BUCKET = struct.Struct("<IBBIII")
+    # Directory page: first overflow page; the chunk page ids follow.
+    DIRECTORY = struct.Struct("<I")
+    CHUNK_SLOTS = MAX_RECORD_SIZE // 4
+
+    def __init__(self, file_manager: FileManager, filename: str, buffer_pool: Optional[BufferPool] = None,
+                 bucket_size: int = HASH_BUCKET_SIZE, cache_size: int = INDEX_NODE_CACHE_SIZE,
+                 descriptor: Any = None):
+        PagedFile.__init__(self, file_manager, filename, buffer_pool)
+        self.buckets = LRUCache(cache_size)
+
+        if self._exists():
+            state, bucket_size, self.depth, self.size, self._free_head, self.num_pages, self._directory_page, \
+                self.descriptor = self._read_meta()
+            self._set_bucket_size(bucket_size)
+            self.ready = state == self.READY
+            # The directory is one page id per slot, small next to the
+            # buckets, so it is read whole.
+            _, body = self._read_chained(self._directory_page, self.DIRECTORY)
+            self._chunks = decode_array("I", body).tolist()
+            self.directory = []
+            for chunk in self._chunks:
+                self.directory.extend(array("I", self._read_record(chunk)).tolist())
+            del self.directory[1 << self.depth:]
+            return
+
+        self._set_bucket_size(bucket_size)
+        self.descriptor = descriptor
+        self.depth = 0
+        self.size = 0
+        self._create_meta_page()
+        self._directory_page = self._allocate()
+        self._chunks = []
+        self.directory = [self._ref(self._new_bucket(0))]
+        self._touch(self._load(self.directory[0]))
+        self._set_slots(range(1))
+
+    def insert(self, key: Any, value: Any):
+        super().insert(key, value)
+        self._write_meta()
+
+    def delete(self, key: Any) -> bool:
+        deleted = super().delete(key)
+        if deleted:
+            self._write_meta()
+        return deleted
+
+    def _load(self, ref: int) -> HashBucket:
+        bucket = self.buckets.get(ref)
+        if bucket is not None:
+            return bucket
+        (depth, key_codec, value_codec, count, key_bytes), body = self._read_chained(ref, self.BUCKET)
+        keys = decode_list(key_codec, body[:key_bytes], count)
+        values = decode_list(value_codec, body[key_bytes:], count)
+        bucket = HashBucket(depth, dict(zip(keys, values)), ref)
+        self.buckets.put(ref, bucket)
+        return bucket
+
+    def _ref(self, bucket: HashBucket) -> int:
+        return bucket.page_id
+
+    def _new_bucket(self, depth: int) -> HashBucket:
+        bucket = HashBucket(depth, page_id=self._allocate())
+        self.buckets.put(bucket.page_id, bucket)
+        return bucket
+
+    def _touch(self, bucket: HashBucket) -> None:
+        key_codec, keys = encode_list(list(bucket.entries))
+        value_codec, values = encode_list(list(bucket.entries.values()))
+        self._write_chained(bucket.page_id, self.BUCKET,
+                            (bucket.depth, key_codec, value_codec, len(bucket.entries), len(keys)), keys + values)
+        self.buckets.put(bucket.page_id, bucket)
+
+    def _set_slots(self, slots: range) -> None:
+        if not slots:
+            return
+        first, last = slots[0] // self.CHUNK_SLOTS, slots[-1] // self.CHUNK_SLOTS
+        # Slots closer together than a chunk touch every chunk in between.
+        chunks = range(first, last + 1) if slots.step < self.CHUNK_SLOTS else \
+            sorted({slot // self.CHUNK_SLOTS for slot in slots})
+        grew = False
+        while len(self._chunks) <= last:
+            self._chunks.append(self._allocate())
+            grew = True
+        for chunk in chunks:
+            start = chunk * self.CHUNK_SLOTS
+            piece = self.directory[start:start + self.CHUNK_SLOTS]
+            self._write_record(self._chunks[chunk], array("I", piece).tobytes())
+        if grew:
+            self._write_chained(self._directory_page, self.DIRECTORY, (), array("I", self._chunks).tobytes())
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        self._write_meta_record(self.READY if self.ready else self.BUILDING, self.bucket_size, self.depth,
+                                self.size, self._free_head, self.num_pages, self._directory_page)
@@ -1,7 +1,7 @@
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 
 class ASTNode:
-    def __init__(self, node_type: str, value: Optional[Union[str, int, float]] = None):
+    def __init__(self, node_type: str, value: Any = None):
         self.node_type = node_type
         self.value = value
         self.children: List[ASTNode] = []
@@ -19,7 +19,7 @@ class SelectNode(ASTNode):
         super().__init__("SELECT")
         self.columns: List[str] = []
         self.table: Optional[str] = None
-        self.where: Optional[str] = None
+        self.where: Optional["Expression"] = None
 
     def set_table(self, table: str):
         self.table = table
@@ -27,7 +27,7 @@ class SelectNode(ASTNode):
     def set_columns(self, columns: List[str]):
         self.columns = columns
 
-    def set_where(self, condition: str):
+    def set_where(self, condition: "Expression"):
         self.where = condition
 
 class InsertNode(ASTNode):
@@ -42,10 +42,166 @@ class UpdateNode(ASTNode):
         super().__init__("UPDATE")
         self.table: Optional[str] = None
         self.assignments: List[str] = []
-        self.where: Optional[str] = None
+        self.where: Optional["Expression"] = None
 
 class DeleteNode(ASTNode):
     def __init__(self):
         super().__init__("DELETE")
         self.table: Optional[str] = None
-        self.where: Optional[str] = None
+        self.where: Optional["Expression"] = None
+
+
+class Expression(ASTNode):
+    def to_sql(self) -> str:
+        raise NotImplementedError
+
+class ColumnRef(Expression):
+    def __init__(self, name: str):
+        super().__init__("COLUMN", name)
+
+    def to_sql(self) -> str:
+        return self.value
+
+class Literal(Expression):
+    def __init__(self, value: Union[str, int, float, bool, None]):
+        super().__init__("LITERAL", value)
+
+    def to_sql(self) -> str:
+        if self.value is None:
+            return "NULL"
+        if isinstance(self.value, bool):
+            return "TRUE" if self.value else "FALSE"
+        if isinstance(self.value, str):
+            return "'" + self.value + "'"
+        return str(self.value)
+
+class Parameter(Expression):
+    # A placeholder bound at execution: `?` parameters are numbered from 0 in
+    # order of appearance, `:name` parameters keep their name.
+    def __init__(self, key: Union[int, str]):
+        super().__init__("PARAMETER", key)
+
+    def to_sql(self) -> str:
+        return "?" if isinstance(self.value, int) else f":{self.value}"
+
+class Comparison(Expression):
+    OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+
+    def __init__(self, op: str, left: Expression, right: Expression):
+        super().__init__("COMPARISON", op)
+        self.add_child(left)
+        self.add_child(right)
+
+    @property
+    def left(self) -> Expression:
+        return self.children[0]
+
+    @property
+    def right(self) -> Expression:
+        return self.children[1]
+
+    def to_sql(self) -> str:
+        return f"{self.left.to_sql()} {self.value} {self.right.to_sql()}"
+
+class BooleanOp(Expression):
+    def __init__(self, op: str, operands: List[Expression]):
+        super().__init__("BOOLEAN", op)
+        for operand in operands:
+            self.add_child(operand)
+
+    @property
+    def operands(self) -> List[Expression]:
+        return self.children
+
+    def to_sql(self) -> str:
+        return "(" + f" {self.value} ".join(operand.to_sql() for operand in self.operands) + ")"
+
+class Not(Expression):
+    def __init__(self, operand: Expression):
+        super().__init__("NOT")
+        self.add_child(operand)
+
+    @property
+    def operand(self) -> Expression:
+        return self.children[0]
+
+    def to_sql(self) -> str:
+        return f"NOT {self.operand.to_sql()}"
+
+class InList(Expression):
+    def __init__(self, column: Expression, values: List[Expression], negated: bool = False):
+        super().__init__("IN", "NOT IN" if negated else "IN")
+        self.negated = negated
+        self.add_child(column)
+        for value in values:
+            self.add_child(value)
+
+    @property
+    def column(self) -> Expression:
+        return self.children[0]
+
+    @property
+    def values(self) -> List[Expression]:
+        return self.children[1:]
+
+    def to_sql(self) -> str:
+        return f"{self.column.to_sql()} {self.value} (" + ", ".join(v.to_sql() for v in self.values) + ")"
+
+class Between(Expression):
+    def __init__(self, column: Expression, low: Expression, high: Expression, negated: bool = False):
+        super().__init__("BETWEEN", "NOT BETWEEN" if negated else "BETWEEN")
+        self.negated = negated
+        self.add_child(column)
+        self.add_child(low)
+        self.add_child(high)
+
+    @property
+    def column(self) -> Expression:
+        return self.children[0]
+
+    @property
+    def low(self) -> Expression:
+        return self.children[1]
+
+    @property
+    def high(self) -> Expression:
+        return self.children[2]
+
+    def to_sql(self) -> str:
+        return f"{self.column.to_sql()} {self.value} {self.low.to_sql()} AND {self.high.to_sql()}"
+
+class IsNull(Expression):
+    def __init__(self, column: Expression, negated: bool = False):
+        super().__init__("IS_NULL", "IS NOT NULL" if negated else "IS NULL")
+        self.negated = negated
+        self.add_child(column)
+
+    @property
+    def column(self) -> Expression:
+        return self.children[0]
+
+    def to_sql(self) -> str:
+        return f"{self.column.to_sql()} {self.value}"
+
+class AggregateCall(Expression):
+    FUNCTIONS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+    def __init__(self, func: str, argument: Optional[Expression] = None, alias: Optional[str] = None):
+        super().__init__("AGGREGATE", func.upper())
+        self.alias = alias
+        if argument is not None:
+            self.add_child(argument)
+
+    @property
+    def argument(self) -> Optional[Expression]:
+        return self.children[0] if self.children else None
+
+    @property
+    def name(self) -> str:
+        if self.alias:
+            return self.alias.lower()
+        return f"{self.value.lower()}({self.argument.to_sql().lower() if self.argument else '*'})"
+
+    def to_sql(self) -> str:
+        sql = f"{self.value}({self.argument.to_sql() if self.argument else '*'})"
+        return f"{sql} AS {self.alias}" if self.alias else sql
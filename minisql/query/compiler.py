@@ -0,0 +1,332 @@
+import itertools
+import operator
+import types
+from typing import Any, Callable, Iterable, Mapping, Sequence, Union
+from minisql.catalog.schema import Column, TableSchema
+from minisql.query.ast import (
+    Between, BooleanOp, ColumnRef, Comparison, Expression, InList, IsNull, Literal, Not, Parameter,
+)
+from minisql.utils.exceptions import QueryError
+
+Predicate = Callable[[dict], bool]
+ParameterValues = Union[Sequence[Any], Mapping[str, Any]]
+
+PYTHON_OPERATORS = {"=": "==", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+FLIPPED_OPERATORS = {"=": "=", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+NEGATED_OPERATORS = {"=": "!=", "!=": "=", "<": ">=", "<=": ">", ">": "<=", ">=": "<"}
+OPERATOR_FUNCTIONS = {"=": operator.eq, "!=": operator.ne, "<": operator.lt,
+                      "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+# Rough selectivity guesses used to order conjuncts and disjuncts.
+UNIQUE_EQUALITY_SELECTIVITY = 0.001
+INDEXED_EQUALITY_SELECTIVITY = 0.01
+EQUALITY_SELECTIVITY = 0.1
+RANGE_SELECTIVITY = 0.33
+BETWEEN_SELECTIVITY = 0.25
+NULL_SELECTIVITY = 0.05
+
+
+class NullParameter(Exception):
+    # Plans for parameterized statements are made once for any non-NULL
+    # values; a NULL changes what the predicate means, so it needs a plan of
+    # its own.
+    pass
+
+
+def bind_value(values: ParameterValues, key, column: Column) -> Any:
+    value = values[key]
+    if value is None:
+        raise NullParameter(key)
+    try:
+        return column.operand(value)
+    except (TypeError, ValueError):
+        raise QueryError(f"Invalid value {value!r} for column {column.name} ({column.type})")
+
+
+def bind_predicate(predicate: Predicate, values: ParameterValues) -> Predicate:
+    # Parameter constants are globals of the compiled function, so binding
+    # only builds a new namespace around the same code.
+    if not predicate.parameters:
+        return predicate
+    namespace = dict(predicate.__globals__)
+    for name, resolve in predicate.parameters.items():
+        namespace[name] = resolve(values)
+    bound = types.FunctionType(predicate.__code__, namespace)
+    bound.source = predicate.source
+    bound.expression = predicate.expression
+    bound.parameters = {}
+    return bound
+
+
+def compile_predicate(expr: Expression, schema: TableSchema, indexed_columns: Iterable[str] = ()) -> Predicate:
+    return PredicateCompiler(schema, indexed_columns).compile(expr)
+
+
+def normalize(expr: Expression, negate: bool = False) -> Expression:
+    # Push NOT down to the leaves and flatten nested AND/OR. Under SQL's
+    # three-valued logic a row passes a WHERE clause only when it is TRUE, so
+    # once no NOT sits above a leaf, UNKNOWN can be treated as FALSE.
+    if isinstance(expr, Not):
+        return normalize(expr.operand, not negate)
+    if isinstance(expr, BooleanOp):
+        op = expr.value
+        if negate:
+            op = "OR" if op == "AND" else "AND"
+        operands = []
+        for operand in expr.operands:
+            operand = normalize(operand, negate)
+            if isinstance(operand, BooleanOp) and operand.value == op:
+                operands.extend(operand.operands)
+            else:
+                operands.append(operand)
+        return BooleanOp(op, operands)
+    if not negate:
+        return expr
+    if isinstance(expr, Comparison):
+        return Comparison(NEGATED_OPERATORS[expr.value], expr.left, expr.right)
+    if isinstance(expr, InList):
+        return InList(expr.column, expr.values, not expr.negated)
+    if isinstance(expr, Between):
+        return Between(expr.column, expr.low, expr.high, not expr.negated)
+    if isinstance(expr, IsNull):
+        return IsNull(expr.column, not expr.negated)
+    if isinstance(expr, Literal):
+        return Literal(None if expr.value is None else not expr.value)
+    return Not(expr)
+
+
+def conjuncts(expr: Expression) -> list[Expression]:
+    if isinstance(expr, BooleanOp) and expr.value == "AND":
+        return list(expr.operands)
+    return [expr]
+
+
+class PredicateCompiler:
+    def __init__(self, schema: TableSchema, indexed_columns: Iterable[str] = ()):
+        self.schema = schema
+        self.indexed_columns = {name.lower() for name in indexed_columns}
+        self.namespace: dict[str, Any] = {"__builtins__": {}, "_type": type, "_at": tuple.__getitem__,
+                                          "_layout": schema.row_type}
+        self._positional = False
+        # Namespace names filled in from parameter values by bind_predicate.
+        self.parameters: dict[str, Callable[[ParameterValues], Any]] = {}
+        self._names = itertools.count()
+
+    def compile(self, expr: Expression) -> Predicate:
+        expr = self.reorder(normalize(expr))
+        # Rows in the table's layout are read by position; rows kept as
+        # dicts by name.
+        self._positional = True
+        positional = self._emit(expr)
+        self._positional = False
+        source = f"lambda row: ({positional}) if _type(row) is _layout else ({self._emit(expr)})"
+        predicate = eval(compile(source, "<where>", "eval"), self.namespace)
+        predicate.source = source
+        predicate.expression = expr
+        predicate.parameters = dict(self.parameters)
+        return predicate
+
+    def reorder(self, expr: Expression) -> Expression:
+        if not isinstance(expr, BooleanOp):
+            return expr
+        operands = [self.reorder(operand) for operand in expr.operands]
+        if expr.value == "AND":
+            # Cheap, selective tests first: they reject most rows early.
+            key = lambda e: self.cost(e) / max(1.0 - self.selectivity(e), 1e-6)
+        else:
+            # Cheap tests that are likely true first: they accept most rows early.
+            key = lambda e: self.cost(e) / max(self.selectivity(e), 1e-6)
+        return BooleanOp(expr.value, sorted(operands, key=key))
+
+    def selectivity(self, expr: Expression) -> float:
+        if isinstance(expr, BooleanOp):
+            parts = [self.selectivity(operand) for operand in expr.operands]
+            if expr.value == "AND":
+                return _product(parts)
+            return 1.0 - _product(1.0 - p for p in parts)
+        if isinstance(expr, Not):
+            return 1.0 - self.selectivity(expr.operand)
+        if isinstance(expr, Literal):
+            return 1.0 if expr.value else 0.0
+        if isinstance(expr, IsNull):
+            return 1.0 - NULL_SELECTIVITY if expr.negated else NULL_SELECTIVITY
+        if isinstance(expr, Between):
+            return 1.0 - BETWEEN_SELECTIVITY if expr.negated else BETWEEN_SELECTIVITY
+        if isinstance(expr, InList):
+            selected = min(len(expr.values) * self._equality_selectivity(expr.column), 0.5)
+            return 1.0 - selected if expr.negated else selected
+        if isinstance(expr, Comparison):
+            column = expr.left if isinstance(expr.left, ColumnRef) else expr.right
+            if expr.value == "=":
+                return self._equality_selectivity(column)
+            if expr.value == "!=":
+                return 1.0 - self._equality_selectivity(column)
+            return RANGE_SELECTIVITY
+        return 0.5
+
+    def cost(self, expr: Expression) -> float:
+        if isinstance(expr, BooleanOp):
+            return sum(self.cost(operand) for operand in expr.operands)
+        if isinstance(expr, Not):
+            return self.cost(expr.operand)
+        if isinstance(expr, Literal):
+            return 0.0
+        columns = [child for child in expr.children if isinstance(child, ColumnRef)]
+        total = 0.0
+        for ref in columns:
+            column = self.schema.get_column(ref.value)
+            # String comparisons walk characters; numeric ones do not.
+            is_string = column is not None and column.type.upper() in ("STRING", "TEXT")
+            total += 2.0 if is_string else 1.0
+        if isinstance(expr, IsNull):
+            total *= 0.5
+        elif isinstance(expr, Between):
+            total *= 1.5
+        return total or 1.0
+
+    def _equality_selectivity(self, ref: Expression) -> float:
+        if not isinstance(ref, ColumnRef):
+            return EQUALITY_SELECTIVITY
+        column = self.schema.get_column(ref.value)
+        if column is not None and column.primary_key:
+            return UNIQUE_EQUALITY_SELECTIVITY
+        if ref.value.lower() in self.indexed_columns:
+            return INDEXED_EQUALITY_SELECTIVITY
+        return EQUALITY_SELECTIVITY
+
+    def _emit(self, expr: Expression) -> str:
+        if isinstance(expr, BooleanOp):
+            joiner = " and " if expr.value == "AND" else " or "
+            return "(" + joiner.join(self._emit(operand) for operand in expr.operands) + ")"
+        if isinstance(expr, Comparison):
+            return self._emit_comparison(expr)
+        if isinstance(expr, InList):
+            return self._emit_in(expr)
+        if isinstance(expr, Between):
+            return self._emit_between(expr)
+        if isinstance(expr, IsNull):
+            access = self._access(self._column(expr.column))
+            return f"({access} is not None)" if expr.negated else f"({access} is None)"
+        if isinstance(expr, Literal):
+            return "True" if expr.value else "False"
+        if isinstance(expr, ColumnRef):
+            return f"({self._access(self._column(expr))} is True)"
+        if isinstance(expr, Not) and isinstance(expr.operand, ColumnRef):
+            return f"({self._access(self._column(expr.operand))} is False)"
+        raise QueryError(f"Unsupported expression in WHERE clause: {expr}")
+
+    def _emit_comparison(self, expr: Comparison) -> str:
+        op, left, right = expr.value, expr.left, expr.right
+        if isinstance(left, (Literal, Parameter)) and isinstance(right, ColumnRef):
+            op, left, right = FLIPPED_OPERATORS[op], right, left
+        py_op = PYTHON_OPERATORS[op]
+
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            try:
+                result = left.value is not None and right.value is not None and \
+                    OPERATOR_FUNCTIONS[op](left.value, right.value)
+            except TypeError:
+                raise QueryError(f"Cannot compare {left.value!r} with {right.value!r}")
+            return "True" if result else "False"
+
+        column = self._column(left)
+        if isinstance(right, (Literal, Parameter)):
+            value = self._operand(column, right)
+            if value is None:
+                # Comparisons with NULL are never true.
+                return "False"
+            access = self._access(column)
+            if op == "=":
+                return f"({access} == {value})"
+            var = self._name("v")
+            return f"(({var} := {access}) is not None and {var} {py_op} {value})"
+
+        other = self._column(right)
+        lhs, rhs = self._name("v"), self._name("v")
+        return (f"(({lhs} := {self._access(column)}) is not None and "
+                f"({rhs} := {self._access(other)}) is not None and {lhs} {py_op} {rhs})")
+
+    def _emit_in(self, expr: InList) -> str:
+        column = self._column(expr.column)
+        if any(not isinstance(value, (Literal, Parameter)) for value in expr.values):
+            raise QueryError("IN lists may only contain literals")
+        if any(isinstance(value, Parameter) for value in expr.values):
+            name = self._name("p")
+            # NULL parameters never get here, so the list has no NULLs.
+            self.parameters[name] = lambda params: frozenset(
+                bind_value(params, v.value, column) if isinstance(v, Parameter) else self._coerce(column, v.value)
+                for v in expr.values)
+            var = self._name("v")
+            op = "not in" if expr.negated else "in"
+            return f"(({var} := {self._access(column)}) is not None and {var} {op} {name})"
+        values = [value.value for value in expr.values]
+        non_null = [self._coerce(column, value) for value in values if value is not None]
+        if expr.negated and len(non_null) != len(values):
+            # x NOT IN (..., NULL) is never true.
+            return "False"
+        name = self._name("c")
+        try:
+            self.namespace[name] = frozenset(non_null)
+        except TypeError:
+            self.namespace[name] = tuple(non_null)
+        var = self._name("v")
+        op = "not in" if expr.negated else "in"
+        return f"(({var} := {self._access(column)}) is not None and {var} {op} {name})"
+
+    def _emit_between(self, expr: Between) -> str:
+        column = self._column(expr.column)
+        if not isinstance(expr.low, (Literal, Parameter)) or not isinstance(expr.high, (Literal, Parameter)):
+            raise QueryError("BETWEEN bounds must be literals")
+        low = self._operand(column, expr.low)
+        high = self._operand(column, expr.high)
+        if low is None or high is None:
+            return "False"
+        var = self._name("v")
+        test = f"{low} <= {var} <= {high}"
+        if expr.negated:
+            test = f"not ({test})"
+        return f"(({var} := {self._access(column)}) is not None and {test})"
+
+    def _column(self, expr: Expression) -> Column:
+        if not isinstance(expr, ColumnRef):
+            raise QueryError(f"Expected a column reference, got {expr}")
+        column = self.schema.get_column(expr.value)
+        if column is None:
+            raise QueryError(f"Unknown column {expr.value} in table {self.schema.name}")
+        return column
+
+    def _operand(self, column: Column, expr: Expression) -> Any:
+        if isinstance(expr, Parameter):
+            name = self._name("p")
+            self.parameters[name] = lambda values, key=expr.value: bind_value(values, key, column)
+            return name
+        return self._constant(column, expr.value)
+
+    def _constant(self, column: Column, value: Any) -> Any:
+        if value is None:
+            return None
+        name = self._name("c")
+        self.namespace[name] = self._coerce(column, value)
+        return name
+
+    def _coerce(self, column: Column, value: Any) -> Any:
+        try:
+            return column.operand(value)
+        except (TypeError, ValueError):
+            raise QueryError(f"Invalid value {value!r} for column {column.name} ({column.type})")
+
+    def _access(self, column: Column) -> str:
+        position = self.schema.row_type.positions.get(column.name.lower())
+        if self._positional and position is not None:
+            return f"_at(row, {position})"
+        return f"row.get({column.name.lower()!r})"
+
+    def _name(self, prefix: str) -> str:
+        return f"{prefix}{next(self._names)}"
+
+
+def _product(values: Iterable[float]) -> float:
+    result = 1.0
+    for value in values:
+        result *= value
+    return result
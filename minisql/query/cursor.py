@@ -0,0 +1,60 @@
+from typing import Iterable, Iterator, Optional
+from minisql.utils.exceptions import QueryError
+
+
+class Cursor:
+    # The rows of one query, pulled through the operator tree only as they
+    # are fetched. Closing the cursor closes the operators early.
+    def __init__(self, rows: Iterable[dict], arraysize: int = 1):
+        self._rows = iter(rows)
+        self.arraysize = arraysize
+        self.rownumber = 0
+        self.closed = False
+
+    def fetchone(self) -> Optional[dict]:
+        self._check_open()
+        row = next(self._rows, None)
+        if row is not None:
+            self.rownumber += 1
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> list[dict]:
+        self._check_open()
+        rows = []
+        for _ in range(self.arraysize if size is None else size):
+            row = next(self._rows, None)
+            if row is None:
+                break
+            rows.append(row)
+        self.rownumber += len(rows)
+        return rows
+
+    def fetchall(self) -> list[dict]:
+        self._check_open()
+        rows = list(self._rows)
+        self.rownumber += len(rows)
+        return rows
+
+    def close(self) -> None:
+        if not self.closed:
+            close = getattr(self._rows, "close", None)
+            if close is not None:
+                close()
+            self.closed = True
+
+    def __iter__(self) -> Iterator[dict]:
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _check_open(self) -> None:
+        if self.closed:
+            raise QueryError("Cursor is closed")
@@ -1,36 +1,349 @@
-from minisql.query.ast import ASTNode
-from minisql.catalog.schema import Column
+import csv
+import itertools
+import json
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+from minisql.cache.lru_cache import LRUCache
+from minisql.config.settings import (
+    BULK_INSERT_BATCH_SIZE, LOCKED_FETCH_ROWS, STATEMENT_CACHE_SIZE, VECTORIZED_EXECUTION, VECTOR_BATCH_SIZE,
+)
+from minisql.concurrency.lock_manager import CATALOG, EXCLUSIVE, SHARED, LockManager, table_resource
+from minisql.concurrency.mvcc import DELETED, INSERTED, LOADED, Session, Transaction
+from minisql.query import operators, planner, vectorized
+from minisql.query.ast import ASTNode, ColumnRef, Expression, Literal
+from minisql.query.compiler import NullParameter, ParameterValues
+from minisql.query.cursor import Cursor
+from minisql.query.parser import Parser
+from minisql.query.planner import Planner, bind_plan, explain
+from minisql.query.prepared import PreparedStatement, bind_parameters, normalize_sql
+from minisql.query.tokenizer import Tokenizer
+from minisql.catalog.row import Row, as_dict, make_row
+from minisql.catalog.schema import COLUMNAR, ROW, Column
+from minisql.index.index_manager import IndexInfo
+from minisql.utils.exceptions import ConstraintError, LockTimeoutError, QueryError, SchemaError, TransactionError
 
-class QueryError(Exception):
-    pass
+READS = ("SELECT", "COPY_TO", "EXPLAIN")
+WRITES = ("INSERT", "UPDATE", "DELETE", "COPY_FROM")
 
 class QueryExecutor:
-    def __init__(self, table_manager, index_manager=None, record_manager=None):
+    def __init__(self, table_manager, index_manager=None, record_manager=None,
+                 vectorized: bool = VECTORIZED_EXECUTION, batch_size: int = VECTOR_BATCH_SIZE,
+                 statement_cache_size: int = STATEMENT_CACHE_SIZE, lock_manager: Optional[LockManager] = None):
         self.table_manager = table_manager
         self.index_manager = index_manager
         self.record_manager = record_manager
+        self.vectorized = vectorized
+        self.batch_size = batch_size
+        self.planner = Planner(table_manager, index_manager)
+        # Reads take no table locks: they see the row versions of their
+        # snapshot. Writes hold the table exclusively until their transaction
+        # ends, and DDL holds the catalog exclusively. Writers to different
+        # tables still share the WAL, whose commit logs every dirty page, so
+        # each write statement also takes the write latch.
+        self.locks = lock_manager or LockManager()
+        self._write_latch = threading.RLock()
+        self._local = threading.local()
+        # Versions left dead by committed updates and deletes, per table,
+        # since the table was last vacuumed.
+        self.dead_versions: dict[str, int] = {}
+        # Prepared statements by SQL text, both as given and normalized.
+        self.statements = LRUCache(statement_cache_size)
 
-    def execute(self, node: ASTNode):
+    def prepare(self, sql: str) -> PreparedStatement:
+        statement = self.statements.get(sql)
+        if statement is not None:
+            return statement
+        tokens = Tokenizer(sql).tokenize()
+        key = normalize_sql(tokens)
+        statement = self.statements.get(key)
+        if statement is None:
+            parser = Parser(tokens)
+            statement = PreparedStatement(self, key, parser.parse(), parser.parameters)
+            self.statements.put(key, statement)
+        self.statements.put(sql, statement)
+        return statement
+
+    def execute_sql(self, sql: str, params: ParameterValues = ()):
+        return self.prepare(sql).execute(params)
+
+    def cursor(self, sql: str, params: ParameterValues = ()) -> Cursor:
+        # Rows of a SELECT, fetched on demand.
+        return self.prepare(sql).cursor(params)
+
+    @property
+    def rowcount(self) -> int:
+        # Rows written by the calling thread's last statement, -1 when it
+        # wrote none.
+        return getattr(self._local, "rowcount", -1)
+
+    @rowcount.setter
+    def rowcount(self, value: int) -> None:
+        self._local.rowcount = value
+
+    @contextmanager
+    def use_session(self, session: Session) -> Iterator[Session]:
+        # Runs the calling thread's statements in `session`'s transaction;
+        # threads otherwise each get a session of their own.
+        previous = getattr(self._local, "session", None)
+        self._local.session = session
+        try:
+            yield session
+        finally:
+            self._local.session = previous
+
+    def _session(self) -> Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = Session()
+        return session
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._session().transaction is not None
+
+    def begin(self) -> None:
+        session = self._session()
+        if session.transaction is not None:
+            raise TransactionError("A transaction is already in progress")
+        session.transaction = Transaction(explicit=True)
+
+    def commit(self) -> None:
+        self._end(self._close_transaction(), commit=True)
+
+    def rollback(self) -> None:
+        self._end(self._close_transaction(), commit=False)
+
+    def _close_transaction(self) -> Transaction:
+        session = self._session()
+        transaction, session.transaction = session.transaction, None
+        if transaction is None:
+            raise TransactionError("No transaction in progress")
+        return transaction
+
+    def execute_prepared(self, statement: PreparedStatement, params: ParameterValues = ()):
+        with self.locks.hold(self._lock_plan(statement.ast)):
+            return self.execute(*self._bind_statement(statement, params))
+
+    def stream_prepared(self, statement: PreparedStatement, params: ParameterValues = ()):
+        with self.locks.hold(self._lock_plan(statement.ast)):
+            node, plan = self._bind_statement(statement, params)
+        return self.stream(node, plan)
+
+    def _bind_statement(self, statement: PreparedStatement, params: ParameterValues):
+        values = statement.bind(params)
+        node = statement.ast
+        if statement.parameters and statement.node_type not in ("SELECT", "DELETE"):
+            node = bind_parameters(node, values)
+        if statement.node_type not in ("SELECT", "UPDATE", "DELETE"):
+            return node, None
+        if statement.plan is None or statement.version != self._catalog_version():
+            if statement.node_type == "SELECT":
+                statement.plan = self._plan_select(statement.ast)
+            else:
+                statement.plan = self._plan_modify(statement.node_type, statement.ast)
+            # Read after planning, which may create constraint indexes.
+            statement.version = self._catalog_version()
+        try:
+            # SELECT and DELETE read their WHERE from the bound plan alone.
+            return node, bind_plan(statement.plan, values)
+        except NullParameter:
+            # The cached plan assumes non-NULL values; plan this one as written.
+            return bind_parameters(statement.ast, values), None
+
+    def _catalog_version(self):
+        return self.table_manager.schema_version, self.index_manager.version if self.index_manager else 0
+
+    def _lock_plan(self, node: ASTNode) -> dict:
+        # Held while a statement is bound to its plan.
+        nt = node.node_type.upper()
+        if nt in READS or nt in WRITES or nt in ("BEGIN", "COMMIT", "ROLLBACK"):
+            return {CATALOG: SHARED}
+        # The transaction's own catalog lock would hold DDL off until it timed out.
+        self._check_outside_transaction(nt)
+        return {CATALOG: SHARED} if nt == "VACUUM" else {CATALOG: EXCLUSIVE}
+
+    def _check_outside_transaction(self, nt: str) -> None:
+        if self.in_transaction:
+            raise TransactionError(f"{nt.replace('_', ' ')} cannot run inside a transaction")
+
+    def execute(self, node: ASTNode, plan=None):
         if node is None:
             raise QueryError("Empty query")
-        
+        nt = node.node_type.upper()
+        self.rowcount = -1
+        if nt == "BEGIN":
+            self.begin()
+            return "Transaction started"
+        if nt in ("COMMIT", "ROLLBACK"):
+            self.commit() if nt == "COMMIT" else self.rollback()
+            return "Transaction committed" if nt == "COMMIT" else "Transaction rolled back"
+        if nt in READS:
+            return self._in_transaction(lambda transaction: self._read(transaction, node, plan))
+        if nt in WRITES:
+            return self._in_transaction(lambda transaction: self._write(
+                transaction, self._get_child_value(node, "TABLE"), lambda: self._execute(node, plan, transaction)))
+        self._check_outside_transaction(nt)
+        if nt == "VACUUM":
+            return self._execute_vacuum(node)
+        with self.locks.hold({CATALOG: EXCLUSIVE}), self._write_latch:
+            return self._execute(node, plan, None)
+
+    def _execute(self, node: ASTNode, plan=None, transaction: Optional[Transaction] = None):
         nt = node.node_type.upper()
         result = None
 
-        if nt == "INSERT": result = self._execute_insert(node)
-        elif nt == "SELECT": result = self._execute_select(node)
-        elif nt == "UPDATE": result = self._execute_update(node)
-        elif nt == "DELETE": result = self._execute_delete(node)
+        if nt == "INSERT": result = self._execute_insert(node, transaction)
+        elif nt == "SELECT": result = self._execute_select(node, plan, transaction)
+        elif nt == "UPDATE": result = self._execute_update(node, plan, transaction)
+        elif nt == "DELETE": result = self._execute_delete(node, plan, transaction)
         elif nt == "CREATE_TABLE": result = self._execute_create_table(node)
+        elif nt == "EXPLAIN": result = self._execute_explain(node)
         elif nt == "DROP_TABLE": result = self._execute_drop_table(node)
+        elif nt == "CREATE_INDEX": result = self._execute_create_index(node)
+        elif nt == "DROP_INDEX": result = self._execute_drop_index(node)
+        elif nt == "COPY_FROM": result = self._execute_copy_from(node, transaction)
+        elif nt == "COPY_TO": result = self._execute_copy_to(node, transaction)
         else:
             raise QueryError(f"Unsupported node type: {nt}")
 
-        if nt in ["INSERT", "UPDATE", "DELETE", "CREATE_TABLE", "DROP_TABLE"]:
-            self.table_manager.save()
+        if nt == "CREATE_INDEX":
+            self.table_manager.commit()
             
         return result
 
+    def _in_transaction(self, work: Callable[[Transaction], object]):
+        # Runs `work` in the session's open transaction, else in one of its
+        # own that commits if `work` returns and rolls back if it raises.
+        transaction = self._session().transaction
+        if transaction is not None:
+            return work(transaction)
+        transaction = Transaction()
+        try:
+            result = work(transaction)
+        except BaseException:
+            self._end(transaction, commit=False)
+            raise
+        self._end(transaction, commit=True)
+        return result
+
+    def _read(self, transaction: Transaction, node: ASTNode, plan):
+        self._snapshot(transaction)
+        with self.locks.hold({CATALOG: SHARED}):
+            return self._execute(node, plan, transaction)
+
+    def _write(self, transaction: Transaction, table_name: str, work: Callable[[], object]):
+        # One write statement. If it fails, its changes are undone and an
+        # explicit transaction stays open with its earlier statements.
+        if transaction.explicit:
+            self._snapshot(transaction)
+        self._lock(transaction, {CATALOG: SHARED, table_resource(table_name): EXCLUSIVE})
+        # A statement on its own takes its snapshot once it holds the table,
+        # so it sees what the writer it waited for committed.
+        self._snapshot(transaction)
+        with self._write_latch:
+            if transaction.xid is None:
+                self.table_manager.begin(transaction)
+            mark = len(transaction.undo)
+            try:
+                return work()
+            except BaseException:
+                self._undo(transaction, mark)
+                raise
+
+    def _snapshot(self, transaction: Transaction):
+        # Explicit transactions read from the snapshot of their first
+        # statement; statements on their own get a fresh one.
+        if transaction.snapshot is None:
+            transaction.snapshot = self.table_manager.transactions.snapshot(transaction)
+        return transaction.snapshot
+
+    def _lock(self, transaction: Transaction, resources: dict) -> None:
+        # Locks stay with the transaction until it ends.
+        for resource in sorted(resources, key=str):
+            held = self.locks.mode(resource, transaction)
+            if held == EXCLUSIVE or held == resources[resource]:
+                continue
+            self.locks.acquire(resource, resources[resource], transaction)
+            transaction.locks.append(resource)
+
+    def _end(self, transaction: Transaction, commit: bool) -> None:
+        try:
+            if transaction.xid is not None and commit:
+                with self._write_latch:
+                    lsn = self.table_manager.log_commit(transaction.xid)
+                # Waited for without the latch, so commits from other
+                # sessions share the fsync.
+                self.table_manager.wait_commit(lsn)
+                self.table_manager.transactions.finish(transaction)
+                with self._write_latch:
+                    self._prune(transaction)
+                    self.table_manager.checkpoint_if_due()
+            elif transaction.xid is not None:
+                with self._write_latch:
+                    self._undo(transaction)
+        finally:
+            self.table_manager.transactions.finish(transaction)
+            for resource in reversed(transaction.locks):
+                self.locks.release(resource, transaction)
+            transaction.locks.clear()
+
+    def _prune(self, transaction: Transaction) -> None:
+        # The versions a committed transaction replaced go at once if no
+        # snapshot can still see them, else they are left for vacuum.
+        dead: dict[str, list] = {}
+        for action, table_name, rid in transaction.undo:
+            if action == DELETED:
+                dead.setdefault(table_name, []).append(rid)
+        horizon = self.table_manager.transactions.horizon()
+        for table_name, rids in dead.items():
+            if transaction.xid < horizon:
+                schema = self.table_manager.get_table_schema(table_name)
+                self.table_manager.prune(table_name, rids, horizon,
+                                         lambda rid, row: self._unindex_row(schema, rid, row))
+            else:
+                self.dead_versions[table_name] = self.dead_versions.get(table_name, 0) + len(rids)
+
+    def _undo(self, transaction: Transaction, mark: int = 0) -> None:
+        for action, table_name, rids in reversed(transaction.undo[mark:]):
+            schema = self.table_manager.get_table_schema(table_name)
+            with self.table_manager.latch(table_name):
+                if action == DELETED:
+                    self.table_manager.restore_row(table_name, rids, transaction.xid)
+                    continue
+                for rid in [rids] if action == INSERTED else rids:
+                    row = self.table_manager.get_version(table_name, rid)
+                    if row is not None:
+                        self._unindex_row(schema, rid, row)
+                        self.table_manager.remove_version(table_name, rid)
+        del transaction.undo[mark:]
+
+    def stream(self, node: ASTNode, plan=None):
+        if node is None or node.node_type.upper() != "SELECT":
+            raise QueryError("Only SELECT statements can be streamed")
+        transaction = self._session().transaction
+        own = transaction is None
+        if own:
+            transaction = Transaction()
+        snapshot = self._snapshot(transaction)
+        with self.locks.hold({CATALOG: SHARED}):
+            records = iter(self._build(plan or self._plan_select(node), snapshot))
+        return self._locked_rows(records, snapshot if own else None)
+
+    def _locked_rows(self, records, snapshot=None, size: int = LOCKED_FETCH_ROWS):
+        # Rows come out in batches, each read under a shared catalog lock so
+        # DDL cannot change the tables mid-batch; between batches nothing is
+        # held. `snapshot` is the stream's own, released when it ends.
+        try:
+            while True:
+                with self.locks.hold({CATALOG: SHARED}):
+                    batch = [as_dict(row) for _, row in itertools.islice(records, size)]
+                yield from batch
+                if len(batch) < size:
+                    return
+        finally:
+            self.table_manager.transactions.release(snapshot)
+
     def _execute_create_table(self, node: ASTNode):
         table_name = self._get_child_value(node, "TABLE")
         raw_columns = self._get_child_value(node, "COLUMNS")
@@ -41,136 +354,579 @@ class QueryExecutor:
             if len(parts) < 2: continue
             col_name = parts[0].strip().lower()
             col_type = parts[1].strip().upper()
-            pk = "PRIMARY" in [p.upper() for p in parts]
-            columns.append(Column(col_name, col_type, primary_key=pk))
-        self.table_manager.create_table(table_name, columns)
+            flags = [p.upper() for p in parts[2:]]
+            columns.append(Column(col_name, col_type, primary_key="PRIMARY" in flags, unique="UNIQUE" in flags))
+        options = self._get_child_value(node, "OPTIONS") or {}
+        unknown = set(options) - {"format"}
+        if unknown:
+            raise QueryError(f"Unsupported table option {sorted(unknown)[0]}")
+        storage = options.get("format", ROW)
+        if storage not in (ROW, COLUMNAR):
+            raise QueryError(f"Unsupported table format {storage}")
+        self.table_manager.create_table(table_name, columns, storage)
+        if self.index_manager:
+            # Index files left behind by an earlier table of the same name.
+            self.index_manager.drop_table(table_name)
         return f"Table {table_name} created"
 
+    def _execute_drop_table(self, node: ASTNode):
+        table_name = self._get_child_value(node, "TABLE")
+        self.table_manager.drop_table(table_name)
+        if self.index_manager:
+            self.index_manager.drop_table(table_name)
+        return f"Table {table_name} dropped"
 
-    def _execute_insert(self, node: ASTNode):
-            table_name = self._get_child_value(node, "TABLE")
-            raw_cols = self._get_child_value(node, "COLUMNS")
-            raw_vals = self._get_child_value(node, "VALUES")
-            schema = self.table_manager.get_table_schema(table_name)
-            col_names = [c.strip().lower() for c in (raw_cols.split(",") if isinstance(raw_cols, str) else raw_cols)]
-            input_vals = raw_vals.split(",") if isinstance(raw_vals, str) else raw_vals
-            val_list = [str(v).strip().replace("'", "").replace('"', "") for v in input_vals]
-
-            primary_key_col = None
-            for col in schema.columns:
-                if col.primary_key:
-                    primary_key_col = col.name.lower()
-                    break
+    def _execute_create_index(self, node: ASTNode):
+        name = self._get_child_value(node, "INDEX")
+        table_name = self._get_child_value(node, "TABLE")
+        columns = [c.lower() for c in self._get_child_value(node, "COLUMNS")]
+        unique = bool(self._get_child_value(node, "UNIQUE"))
+        kind = self._get_child_value(node, "USING") or "btree"
+        if not self.index_manager:
+            raise QueryError("CREATE INDEX needs an index manager")
+        schema = self.table_manager.get_table_schema(table_name)
+        for column in columns:
+            if schema.get_column(column) is None:
+                raise QueryError(f"Unknown column {column} in table {table_name}")
+        if self.index_manager.get_index(name) is not None:
+            raise QueryError(f"Index {name} already exists")
+        self._ensure_indexes(schema)
+        if unique:
+            # Only current rows must be unique; the index covers every
+            # version so that older snapshots can use it too.
+            index, keys = IndexInfo(name, table_name, tuple(columns), unique=True), set()
+            for _, row in self.table_manager.scan(table_name):
+                key = index.key(row)
+                if key is not None and key in keys:
+                    raise QueryError(f"Cannot build unique index {name}: duplicate key {key!r}")
+                keys.add(key)
+        self.index_manager.create_index(table_name, columns, schema, self.table_manager.versions(table_name),
+                                        name=name, unique=unique, kind=kind)
+        return f"Index {name} created on {table_name} ({', '.join(columns)}) using {kind}"
 
-            row = {}
-            for name, val in zip(col_names, val_list):
-                col_def = next((c for c in schema.columns if c.name.lower() == name), None)
-                row[name] = int(val) if (col_def and col_def.type == "INT") else val
+    def _execute_drop_index(self, node: ASTNode):
+        name = self._get_child_value(node, "INDEX")
+        if not self.index_manager or self.index_manager.get_index(name) is None:
+            raise QueryError(f"Index {name} does not exist")
+        # Checkpoint first: page images of the index still in the log would
+        # otherwise recreate its file during recovery.
+        self.table_manager.checkpoint()
+        self.index_manager.drop(name)
+        return f"Index {name} dropped"
 
-            if not hasattr(schema, "data"): 
-                schema.data = []
 
-            if primary_key_col and primary_key_col in row:
-                pk_value = row[primary_key_col]
-                if any(existing_row.get(primary_key_col) == pk_value for existing_row in schema.data):
-                    raise QueryError(f"Duplicate entry '{pk_value}' for primary key")
+    def _execute_vacuum(self, node: ASTNode):
+        table_name = self._get_child_value(node, "TABLE")
+        if table_name is not None:
+            self.table_manager.get_table_schema(table_name)
+        count = self.vacuum(table_name)
+        return f"Vacuumed {count} row versions"
 
-            if self.record_manager:
-                self.record_manager.insert(table_name, row, primary_key_col=primary_key_col)
+    def vacuum(self, table_name: Optional[str] = None, wait: bool = True) -> int:
+        # Removes the row versions no snapshot can see any more, and their
+        # index entries, from one table or all of them. Without `wait`, a
+        # table some transaction is writing is skipped.
+        removed = 0
+        for name in [table_name] if table_name is not None else self.table_manager.list_tables():
+            try:
+                with self.locks.hold({CATALOG: SHARED, table_resource(name): EXCLUSIVE},
+                                     timeout=None if wait else 0), self._write_latch:
+                    schema = self.table_manager.get_table_schema(name)
+                    count = self.table_manager.vacuum(name, self.table_manager.transactions.horizon(),
+                                                      lambda rid, row: self._unindex_row(schema, rid, row))
+                    self.table_manager.commit()
+                    if self.dead_versions.get(name, 0) > count:
+                        self.dead_versions[name] -= count
+                    else:
+                        self.dead_versions.pop(name, None)
+                removed += count
+            except (LockTimeoutError, SchemaError):
+                if wait:
+                    raise
+        return removed
 
-            schema.data.append(row)
+    def _execute_insert(self, node: ASTNode, transaction: Transaction):
+        table_name = self._get_child_value(node, "TABLE")
+        raw_cols = self._get_child_value(node, "COLUMNS")
+        raw_vals = self._get_child_value(node, "VALUES")
+        schema = self.table_manager.get_table_schema(table_name)
+        col_names = [c.strip().lower() for c in (raw_cols.split(",") if isinstance(raw_cols, str) else raw_cols)]
+        if isinstance(raw_vals, str):
+            raw_vals = [raw_vals.split(",")]
+        elif raw_vals and not isinstance(raw_vals[0], list):
+            raw_vals = [raw_vals]
+        rows = [self._make_row(schema, col_names, [self._value(v) for v in values]) for values in raw_vals]
 
-            if self.index_manager:
-                pk = schema.get_primary_key_column()
-                if pk and pk.name.lower() in row:
-                    self.index_manager.create_index(table_name, pk.name, schema)
-                    self.index_manager.insert(table_name, pk.name, row[pk.name.lower()], row)
+        self._ensure_indexes(schema)
+        self._check_unique(schema, rows)
+        self._record_rows(schema, rows)
+        for row in rows:
+            with self.table_manager.latch(table_name):
+                rid = self.table_manager.insert_row(table_name, row, transaction.xid)
+                transaction.undo.append((INSERTED, table_name, rid))
+                self._index_row(schema, rid, row)
 
-            self.table_manager.save()
+        self.rowcount = len(rows)
+        if len(rows) == 1:
             return f"Inserted into {table_name}"
+        return f"Inserted {len(rows)} rows into {table_name}"
 
-    def _execute_select(self, node: ASTNode):
-        table_name = self._get_child_value(node, "TABLE")
-        raw_cols = self._get_child_value(node, "COLUMNS")
-        where_node = self._get_child_node(node, "WHERE")
+    def bulk_insert(self, table_name: str, rows: Iterable, columns: Optional[Sequence[str]] = None,
+                    batch_size: int = BULK_INSERT_BATCH_SIZE) -> int:
+        # Loads value sequences (in `columns` order, else the table's) or
+        # dicts, as one write of the session's transaction or of its own.
+        # Each batch is checked as a whole before any of it is written and
+        # its pages are logged once; indexes are left alone during the load
+        # and bulk-built from the table when it succeeds. A batch that fails
+        # a check undoes the whole load.
+        return self._in_transaction(lambda transaction: self._write(
+            transaction, table_name, lambda: self._bulk_insert(transaction, table_name, rows, columns, batch_size)))
+
+    def _bulk_insert(self, transaction, table_name, rows, columns, batch_size) -> int:
         schema = self.table_manager.get_table_schema(table_name)
-        
-        rows = getattr(schema, "data", [])
-        if self.record_manager:
-            storage_rows = self.record_manager.select_all(table_name)
-            if storage_rows: rows = storage_rows
+        self._ensure_indexes(schema)
+        names = [c.lower() for c in columns] if columns else [c.name.lower() for c in schema.columns]
+        seen = self._loaded_keys(schema)
+        count = 0
+        for batch in _batches(rows, batch_size):
+            batch = [self._make_row(schema, list(values) if isinstance(values, dict) else names,
+                                    list(values.values()) if isinstance(values, dict) else values)
+                     for values in batch]
+            self._check_loaded(schema, batch, seen)
+            self._record_rows(schema, batch)
+            # Unindexed until the rebuild, so an undo must not look for
+            # their index entries before then.
+            loaded = []
+            transaction.undo.append((LOADED, table_name, loaded))
+            for row in batch:
+                loaded.append(self.table_manager.insert_row(table_name, row, transaction.xid))
+            self.table_manager.commit()
+            count += len(batch)
+        if count and self.index_manager:
+            # Log images of the old index pages must not be replayed
+            # over the rebuilt files.
+            self.table_manager.checkpoint()
+            with self.table_manager.latch(table_name):
+                self.index_manager.rebuild(table_name, self.table_manager.versions(table_name))
+            self.table_manager.commit()
+        return count
 
-        if where_node:
-            rows = [r for r in rows if self._evaluate_condition(r, where_node.value, schema)]
+    def _execute_copy_from(self, node: ASTNode, transaction: Transaction):
+        table_name = self._get_child_value(node, "TABLE")
+        columns = self._get_child_value(node, "COLUMNS")
+        path = self._get_child_value(node, "FILE")
+        options = self._get_child_value(node, "OPTIONS") or {}
+        fmt, delimiter = self._copy_format(options)
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                if fmt == "ndjson":
+                    rows = (json.loads(line) for line in f if line.strip())
+                    if columns:
+                        rows = ([row.get(c) for c in columns] if isinstance(row, dict) else row for row in rows)
+                else:
+                    reader = csv.reader(f, delimiter=delimiter)
+                    if options.get("header"):
+                        header = next(reader, None)
+                        if columns is None and header is not None:
+                            columns = [c.strip().lower() for c in header]
+                    # Empty fields load as NULL.
+                    rows = ([value if value != "" else None for value in record] for record in reader if record)
+                count = self._bulk_insert(transaction, table_name, rows, columns, BULK_INSERT_BATCH_SIZE)
+        except OSError as e:
+            raise QueryError(f"Cannot read {path}: {e}")
+        except json.JSONDecodeError as e:
+            raise QueryError(f"Invalid JSON in {path}: {e}")
+        self.rowcount = count
+        return f"Copied {count} rows into {table_name}"
 
-        if raw_cols and raw_cols != "*" and raw_cols != ["*"]:
-            target_cols = [c.strip().lower() for c in (raw_cols.split(",") if isinstance(raw_cols, str) else raw_cols)]
-            return [{c: r.get(c) for c in target_cols} for r in rows]
-        
-        return rows
+    def _execute_copy_to(self, node: ASTNode, transaction: Transaction):
+        query = self._get_child_node(node, "SELECT")
+        path = self._get_child_value(node, "FILE")
+        options = self._get_child_value(node, "OPTIONS") or {}
+        fmt, delimiter = self._copy_format(options)
+        # Rows go to the file as the plan produces them, never all at once.
+        rows = (as_dict(row) for _, row in self._build(self._plan_select(query), transaction.snapshot))
+        count = 0
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                if fmt == "ndjson":
+                    for row in rows:
+                        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                        count += 1
+                else:
+                    writer = csv.writer(f, delimiter=delimiter)
+                    fields = None
+                    if self._get_child_value(query, "COLUMNS") in ("*", ["*"]):
+                        schema = self.table_manager.get_table_schema(self._get_child_value(query, "TABLE"))
+                        fields = [c.name.lower() for c in schema.columns]
+                        if options.get("header"):
+                            writer.writerow(fields)
+                    for row in rows:
+                        if fields is None:
+                            fields = list(row)
+                            if options.get("header"):
+                                writer.writerow(fields)
+                        # NULLs are written as empty fields, as COPY FROM reads them.
+                        writer.writerow(["" if row.get(f) is None else row.get(f) for f in fields])
+                        count += 1
+        except OSError as e:
+            raise QueryError(f"Cannot write {path}: {e}")
+        finally:
+            rows.close()
+        self.rowcount = count
+        return f"Copied {count} rows to {path}"
 
-    def _execute_update(self, node: ASTNode):
+    def _copy_format(self, options: dict) -> tuple[str, str]:
+        fmt = options.get("format", "csv")
+        if fmt not in ("csv", "ndjson"):
+            raise QueryError(f"Unsupported COPY format {fmt}")
+        delimiter = options.get("delimiter", ",")
+        if not isinstance(delimiter, str) or len(delimiter) != 1:
+            raise QueryError("COPY delimiter must be a single character")
+        return fmt, delimiter
+
+    def _execute_select(self, node: ASTNode, plan, transaction: Transaction):
+        # Rows become dicts only here, on their way out.
+        return [as_dict(row) for _, row in self._build(plan or self._plan_select(node), transaction.snapshot)]
+
+    def _execute_update(self, node: ASTNode, plan, transaction: Transaction):
         table_name = self._get_child_value(node, "TABLE")
         set_node = self._get_child_node(node, "SET")
-        where_node = self._get_child_node(node, "WHERE")
         schema = self.table_manager.get_table_schema(table_name)
-        
-        parts = set_node.value.split("=")
-        set_col = parts[0].strip().lower()
-        set_val = parts[1].strip().replace("'", "").replace('"', "")
-        
-        rows = getattr(schema, "data", [])
-        updated_count = 0
-        col_def = next((c for c in schema.columns if c.name.lower() == set_col), None)
-        final_val = int(set_val) if (col_def and col_def.type == "INT") else set_val
 
-        for row in rows:
-            if not where_node or self._evaluate_condition(row, where_node.value, schema):
-                row[set_col] = final_val
-                updated_count += 1
+        assignments = {}
+        raw_sets = set_node.value.split(",") if isinstance(set_node.value, str) else set_node.value
+        for item in raw_sets:
+            set_col, set_val = item.split("=", 1) if isinstance(item, str) else item
+            set_col = set_col.strip().lower()
+            col_def = schema.get_column(set_col)
+            value = self._value(set_val)
+            final_val = self._coerce(col_def, value) if col_def else value
+            if col_def is not None and col_def.primary_key and final_val is None:
+                raise ConstraintError(f"Primary key column {set_col} cannot be NULL")
+            assignments[set_col] = final_val
+
+        plan = plan or self._plan_modify("UPDATE", node)
+        matches = list(self._build(plan.child, transaction.snapshot))
+        new_rows = [self._assign(schema, row, assignments) for _, row in matches]
+        self._check_unique(schema, new_rows, {rid for rid, _ in matches}, set(assignments))
+        for (rid, row), new_row in zip(matches, new_rows):
+            # The old version stays, indexed, for snapshots that still see it.
+            with self.table_manager.latch(table_name):
+                old_rid, new_rid = self.table_manager.update_row(table_name, rid, new_row, transaction.xid)
+                if old_rid != rid:
+                    self._unindex_row(schema, rid, row)
+                    self._index_row(schema, old_rid, row)
+                transaction.undo.append((DELETED, table_name, old_rid))
+                transaction.undo.append((INSERTED, table_name, new_rid))
+                self._index_row(schema, new_rid, new_row)
         
-        return f"Updated {updated_count} rows"
+        self.rowcount = len(matches)
+        return f"Updated {len(matches)} rows"
 
-    def _execute_delete(self, node: ASTNode):
+    def _execute_delete(self, node: ASTNode, plan, transaction: Transaction):
+        # Deleted versions keep their index entries until vacuum removes them.
         table_name = self._get_child_value(node, "TABLE")
-        where_node = self._get_child_node(node, "WHERE")
+        plan = plan or self._plan_modify("DELETE", node)
         schema = self.table_manager.get_table_schema(table_name)
-        
-        rows = getattr(schema, "data", [])
-        if not where_node:
-            count = len(rows)
-            schema.data = []
-            return f"Deleted {count} rows"
-
-        kept = [r for r in rows if not self._evaluate_condition(r, where_node.value, schema)]
-        deleted_count = len(rows) - len(kept)
-        schema.data = kept
-        return f"Deleted {deleted_count} rows"
-
-    def _evaluate_condition(self, row: dict, condition: str, schema) -> bool:
-        ops = [">=", "<=", "!=", "=", ">", "<"]
-        op = next((o for o in ops if o in condition), None)
-        if not op: return False
-        
-        parts = condition.split(op)
-        col_name = parts[0].strip().lower()
-        target = parts[1].strip().replace("'", "").replace('"', "")
-        actual = row.get(col_name)
-        
-        col_def = next((c for c in schema.columns if c.name.lower() == col_name), None)
-        if col_def and col_def.type == "INT":
-            try:
-                actual, target = int(actual), int(target)
-            except: pass
-
-        if op == "=": return actual == target
-        if op == "!=": return actual != target
-        if op == ">": return actual > target
-        if op == "<": return actual < target
-        if op == ">=": return actual >= target
-        if op == "<=": return actual <= target
+        doomed = list(self._build(plan.child, transaction.snapshot))
+        for rid, row in doomed:
+            with self.table_manager.latch(table_name):
+                old_rid = self.table_manager.delete_row(table_name, rid, transaction.xid)
+                if old_rid != rid:
+                    self._unindex_row(schema, rid, row)
+                    self._index_row(schema, old_rid, row)
+                transaction.undo.append((DELETED, table_name, old_rid))
+        self.rowcount = len(doomed)
+        return f"Deleted {len(doomed)} rows"
+
+    def _execute_explain(self, node: ASTNode):
+        statement = node.children[0]
+        nt = statement.node_type.upper()
+        if nt == "SELECT":
+            plan = self._plan_select(statement)
+        elif nt in ("UPDATE", "DELETE"):
+            plan = self._plan_modify(nt, statement)
+        else:
+            raise QueryError(f"Cannot EXPLAIN {nt}")
+        return "\n".join(explain(plan))
+
+    def _plan_select(self, node: ASTNode):
+        table_name = self._get_child_value(node, "TABLE")
+        raw_cols = self._get_child_value(node, "COLUMNS")
+        where_node = self._get_child_node(node, "WHERE")
+        self._ensure_indexes(self.table_manager.get_table_schema(table_name))
+
+        columns = None
+        if raw_cols and raw_cols != "*" and raw_cols != ["*"]:
+            items = raw_cols.split(",") if isinstance(raw_cols, str) else raw_cols
+            columns = [ColumnRef(c.strip()) if isinstance(c, str) else c for c in items]
+        return self.planner.plan_select(
+            table_name, columns, where_node.value if where_node else None,
+            group_by=self._get_child_value(node, "GROUP_BY"),
+            order_by=self._get_child_value(node, "ORDER_BY"),
+            limit=self._get_child_value(node, "LIMIT"),
+            offset=self._get_child_value(node, "OFFSET") or 0,
+        )
+
+    def _plan_modify(self, operation: str, node: ASTNode):
+        table_name = self._get_child_value(node, "TABLE")
+        where_node = self._get_child_node(node, "WHERE")
+        self._ensure_indexes(self.table_manager.get_table_schema(table_name))
+        return self.planner.plan_modify(operation, table_name, where_node.value if where_node else None)
+
+    def _build(self, plan, snapshot=None, columns=None) -> operators.Operator:
+        # Columnar tables run column-at-a-time whether or not the executor
+        # is vectorized. `columns` is what the parent reads, as for batches.
+        if self.vectorized or self._columnar(plan):
+            batches = self._build_batches(plan, snapshot, columns)
+            if batches is not None:
+                return vectorized.Unbatch(batches)
+        if isinstance(plan, planner.Project):
+            return operators.Project(self._build(plan.child, snapshot), plan.columns)
+        if isinstance(plan, planner.Filter):
+            return operators.Filter(self._build(plan.child, snapshot), plan.predicate)
+        if isinstance(plan, planner.Sort):
+            return operators.Sort(self._build(plan.child, snapshot), plan.keys)
+        if isinstance(plan, planner.Limit):
+            return operators.Limit(self._build(plan.child, snapshot), plan.limit, plan.offset)
+        if isinstance(plan, planner.Aggregate):
+            needed = set(plan.group_by) | {column for _, column, _ in plan.aggregates if column is not None}
+            if not plan.group_by and (self.vectorized or self._columnar(plan.child)):
+                batches = self._build_batches(plan.child, snapshot, needed)
+                if batches is not None and self._has_columns(plan.child, needed):
+                    return vectorized.BatchAggregate(batches, plan.aggregates)
+            return operators.Aggregate(self._build(plan.child, snapshot, needed), plan.group_by, plan.aggregates)
+        if isinstance(plan, planner.SeqScan):
+            return operators.SeqScan(lambda: self._scan(plan.table, snapshot))
+        if isinstance(plan, (planner.IndexLookup, planner.IndexRangeScan)):
+            index = self.index_manager.get_index(plan.index or f"{plan.table}.{plan.column}")
+            return operators.IndexScan(lambda: self._index_entries(plan, index),
+                                       lambda rid: self.table_manager.get_row(plan.table, rid, snapshot),
+                                       index.columns)
+        raise QueryError(f"Cannot execute plan node {plan.explain()}")
+
+    def _index_entries(self, plan, index: IndexInfo, size: int = LOCKED_FETCH_ROWS):
+        # Entries are read under the table latch, a range a chunk at a time
+        # so writers get in between chunks. A chunk resumes from the last
+        # key read rather than a position in the tree, skipping the entries
+        # of that key already returned.
+        latch = self.table_manager.latch(plan.table)
+        if isinstance(plan, planner.IndexLookup):
+            with latch:
+                entries = [entry for key in plan.keys for entry in self.index_manager.lookup(index.name, key)]
+            yield from entries
+            return
+        low, high, low_inclusive, high_inclusive = plan.low, plan.high, plan.low_inclusive, plan.high_inclusive
+        last, returned = None, set()
+        while True:
+            limit = size + len(returned)
+            with latch:
+                chunk = list(itertools.islice(self.index_manager.scan(
+                    index.name, low, high, low_inclusive, high_inclusive, plan.descending), limit))
+            for key, rid in chunk:
+                if key != last:
+                    last, returned = key, set()
+                elif rid in returned:
+                    continue
+                returned.add(rid)
+                yield key, rid
+            if len(chunk) < limit:
+                return
+            if plan.descending:
+                high, high_inclusive = last, True
+            else:
+                low, low_inclusive = last, True
+
+    def _build_batches(self, plan, snapshot=None, columns=None) -> Optional[operators.Operator]:
+        # Only scan/filter/project pipelines run column-at-a-time; everything
+        # above them consumes rows again. `columns` is what the parent reads,
+        # None meaning whole rows.
+        if isinstance(plan, planner.Project):
+            child = self._build_batches(plan.child, snapshot, plan.columns)
+            return child and vectorized.BatchProject(child, plan.columns)
+        if isinstance(plan, planner.Filter):
+            if not isinstance(plan.child, planner.SeqScan):
+                return None
+            needed = None if columns is None else set(columns) | vectorized.referenced_columns(plan.expression)
+            schema = self.table_manager.get_table_schema(plan.child.table)
+            predicate = vectorized.VectorCompiler(schema).compile(plan.expression)
+            return vectorized.BatchFilter(self._build_batches(plan.child, snapshot, needed), predicate)
+        if isinstance(plan, planner.SeqScan):
+            schema = self.table_manager.get_table_schema(plan.table)
+            if schema.storage == COLUMNAR:
+                # Only the chunks of the columns read are fetched at all.
+                names = [c.name.lower() for c in schema.columns if columns is None or c.name.lower() in columns]
+                return vectorized.ColumnScan(lambda: self.table_manager.scan_columns(plan.table, names, snapshot))
+            return vectorized.BatchScan(lambda: self._scan(plan.table, snapshot), schema, self.batch_size, columns)
+        return None
+
+    def _columnar(self, plan) -> bool:
+        while isinstance(plan, (planner.Project, planner.Filter)):
+            plan = plan.child
+        return (isinstance(plan, planner.SeqScan)
+                and self.table_manager.get_table_schema(plan.table).storage == COLUMNAR)
+
+    def _has_columns(self, plan, columns) -> bool:
+        while isinstance(plan, (planner.Project, planner.Filter)):
+            plan = plan.child
+        schema = self.table_manager.get_table_schema(plan.table)
+        return set(columns) <= {c.name.lower() for c in schema.columns}
+
+    def _scan(self, table_name: str, snapshot=None):
+        if self.record_manager:
+            storage_rows = self.record_manager.select_all(table_name)
+            if storage_rows:
+                return ((None, row) for row in storage_rows)
+        return self.table_manager.scan(table_name, snapshot)
+
+    def _ensure_indexes(self, schema):
+        if not self.index_manager:
+            return
+        for column in schema.get_unique_columns():
+            if self.index_manager.find_index(schema.name, [column.name], unique=True) is None:
+                # Readers plan too, so the first of them to get here builds it.
+                with self._write_latch:
+                    if self.index_manager.find_index(schema.name, [column.name], unique=True) is None:
+                        self.index_manager.create_index(schema.name, column.name, schema,
+                                                        self.table_manager.versions(schema.name))
+
+    def _unique_indexes(self, schema) -> list[IndexInfo]:
+        if self.index_manager:
+            return [index for index in self.index_manager.table_indexes(schema.name) if index.unique]
+        return [IndexInfo(f"{schema.name}.{c.name.lower()}", schema.name, (c.name.lower(),))
+                for c in schema.get_unique_columns()]
+
+    def _check_unique(self, schema, rows, replaced=frozenset(), columns=None):
+        # `rows` are about to be written in place of the rows at `replaced`;
+        # `columns` limits the check to indexes over the columns an UPDATE sets.
+        for index in self._unique_indexes(schema):
+            if columns is not None and not columns.intersection(index.columns):
+                continue
+            seen = set()
+            for row in rows:
+                key = index.key(row)
+                if key is None:
+                    continue
+                if key in seen or self._conflicts(index, key, replaced):
+                    raise self._duplicate(schema, index, key)
+                seen.add(key)
+
+    def _loaded_keys(self, schema) -> dict[str, set]:
+        # Keys a bulk load has written, per unique index; seeded with the
+        # whole table when there are no indexes to probe.
+        seen = {index.name: set() for index in self._unique_indexes(schema)}
+        if not self.index_manager and seen:
+            for _, row in self.table_manager.scan(schema.name):
+                for index in self._unique_indexes(schema):
+                    key = index.key(row)
+                    if key is not None:
+                        seen[index.name].add(key)
+        return seen
+
+    def _check_loaded(self, schema, rows, seen):
+        # Like _check_unique, but the indexes do not yet hold the rows loaded
+        # so far, so those keys are checked against `seen` instead.
+        for index in self._unique_indexes(schema):
+            keys, batch = seen[index.name], set()
+            for row in rows:
+                key = index.key(row)
+                if key is None:
+                    continue
+                if key in keys or key in batch or (self.index_manager and self._conflicts(index, key, ())):
+                    raise self._duplicate(schema, index, key)
+                batch.add(key)
+            keys |= batch
+
+    def _conflicts(self, index, key, replaced) -> bool:
+        # One index probe per key; the table is only scanned when there is no
+        # index manager to keep the indexes.
+        if not self.index_manager:
+            return any(rid not in replaced and index.key(row) == key
+                       for rid, row in self.table_manager.scan(index.table))
+        for _, rid in self.index_manager.lookup(index.name, key):
+            if rid in replaced:
+                continue
+            # Skip an entry left behind by a row that has since changed.
+            row = self.table_manager.get_row(index.table, rid)
+            if row is not None and index.key(row) == key:
+                return True
         return False
 
+    def _duplicate(self, schema, index, key) -> ConstraintError:
+        column = schema.get_column(index.columns[0]) if not index.composite else None
+        if column is not None and column.primary_key:
+            target = "primary key"
+        elif column is not None and column.unique:
+            target = f"unique column {column.name.lower()}"
+        else:
+            target = f"unique index {index.name}"
+        return ConstraintError(f"Duplicate entry '{key}' for {target}")
+
+    def _index_row(self, schema, rid, row):
+        if not self.index_manager:
+            return
+        for index in self.index_manager.table_indexes(schema.name):
+            key = index.key(row)
+            if key is not None:
+                self.index_manager.add_entry(index.name, key, rid)
+
+    def _unindex_row(self, schema, rid, row):
+        if not self.index_manager:
+            return
+        for index in self.index_manager.table_indexes(schema.name):
+            key = index.key(row)
+            if key is not None:
+                self.index_manager.remove_entry(index.name, key, rid)
+
+    def _make_row(self, schema, names, values) -> Row | dict:
+        # A Row in the table's layout, columns left out being NULL; a dict
+        # only when `names` go beyond the table's columns.
+        if len(names) != len(values):
+            raise QueryError(f"Expected {len(names)} values, got {len(values)}")
+        row = {}
+        for name, value in zip(names, values):
+            col_def = schema.get_column(name)
+            row[name] = self._coerce(col_def, value) if col_def else value
+        for col_def in schema.columns:
+            if col_def.primary_key and row.get(col_def.name.lower()) is None:
+                raise ConstraintError(f"Primary key column {col_def.name.lower()} cannot be NULL")
+        layout = schema.row_type
+        if not all(name in layout.positions for name in row):
+            return row
+        return make_row(layout, [row.get(name) for name in layout.names])
+
+    def _assign(self, schema, row, assignments: dict) -> Row | dict:
+        layout = schema.row_type
+        if type(row) is not layout or not all(name in layout.positions for name in assignments):
+            return dict(as_dict(row), **assignments)
+        values = list(row)
+        for name, value in assignments.items():
+            values[layout.positions[name]] = value
+        return make_row(layout, values)
+
+    def _record_rows(self, schema, rows):
+        if not self.record_manager:
+            return
+        primary_key_col = next((c.name.lower() for c in schema.columns if c.primary_key), None)
+        unique_cols = [c.name.lower() for c in schema.columns if c.unique and not c.primary_key]
+        self.record_manager.insert_many(schema.name, [as_dict(row) for row in rows], primary_key_col=primary_key_col,
+                                        unique_cols=unique_cols)
+
+    def _value(self, value):
+        # VALUES and SET items are expressions; older ASTs carry raw text.
+        if isinstance(value, Literal):
+            return value.value
+        if isinstance(value, Expression):
+            raise QueryError(f"Expected a value, got {value.to_sql()}")
+        return str(value).strip().replace("'", "").replace('"', "")
+
+    def _coerce(self, col_def: Column, value):
+        try:
+            return col_def.coerce(value)
+        except (TypeError, ValueError):
+            raise QueryError(f"Invalid value {value!r} for column {col_def.name} ({col_def.type})")
+
     def _get_child_value(self, node, c_type):
         child = self._get_child_node(node, c_type)
         return child.value if child else None
@@ -179,4 +935,13 @@ class QueryExecutor:
         if not node or not hasattr(node, 'children'): return None
         for child in node.children:
             if child.node_type.upper() == c_type.upper(): return child
-        return None
\ No newline at end of file
+        return None
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,249 @@
+import itertools
+import operator
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Union
+from minisql.catalog.row import Row, make_row, row_type
+
+# Every operator yields (rid, row) pairs; operators that build new rows
+# (projections, aggregates) pass None as the rid. Rows are Row tuples, or
+# dicts for rows stored before the table had a binary layout.
+Record = tuple[Any, Union[Row, dict]]
+
+
+class Operator:
+    def __init__(self, *children: "Operator"):
+        self.children = list(children)
+        self._rows: Optional[Iterator[Record]] = None
+
+    def open(self) -> None:
+        for child in self.children:
+            child.open()
+        self._rows = self.produce()
+
+    def next(self) -> Optional[Record]:
+        if self._rows is None:
+            raise RuntimeError(f"{type(self).__name__} is not open")
+        return next(self._rows, None)
+
+    def close(self) -> None:
+        if self._rows is not None:
+            self._rows.close()
+            self._rows = None
+        for child in self.children:
+            child.close()
+
+    def produce(self) -> Iterator[Record]:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[Record]:
+        self.open()
+        try:
+            while True:
+                record = self.next()
+                if record is None:
+                    return
+                yield record
+        finally:
+            self.close()
+
+    def _pull(self, child: "Operator") -> Iterator[Record]:
+        while True:
+            record = child.next()
+            if record is None:
+                return
+            yield record
+
+
+class SeqScan(Operator):
+    def __init__(self, source: Callable[[], Iterable[Record]]):
+        super().__init__()
+        self.source = source
+
+    def produce(self) -> Iterator[Record]:
+        yield from self.source()
+
+
+class IndexScan(Operator):
+    def __init__(self, entries: Callable[[], Iterable[tuple[Any, Any]]], fetch: Callable[[Any], Optional[dict]],
+                 columns: Union[str, Sequence[str]]):
+        super().__init__()
+        self.entries = entries
+        self.fetch = fetch
+        self.columns = tuple(c.lower() for c in ([columns] if isinstance(columns, str) else columns))
+
+    def produce(self) -> Iterator[Record]:
+        columns = self.columns
+        for key, rid in self.entries():
+            if rid is None:
+                continue
+            row = self.fetch(rid)
+            if row is None:
+                continue
+            # Skip entries left behind by rows that were deleted or changed key.
+            current = row.get(columns[0]) if len(columns) == 1 else tuple(row.get(c) for c in columns)
+            if current == key:
+                yield rid, row
+
+
+class Filter(Operator):
+    def __init__(self, child: Operator, predicate: Callable[[dict], bool]):
+        super().__init__(child)
+        self.predicate = predicate
+
+    def produce(self) -> Iterator[Record]:
+        predicate = self.predicate
+        for rid, row in self._pull(self.children[0]):
+            if predicate(row):
+                yield rid, row
+
+
+class Project(Operator):
+    def __init__(self, child: Operator, columns: Optional[list[str]]):
+        super().__init__(child)
+        self.columns = columns
+
+    def produce(self) -> Iterator[Record]:
+        columns = self.columns
+        if columns is None:
+            yield from self._pull(self.children[0])
+            return
+        layout = row_type(tuple(columns))
+        # Column positions are looked up once per input layout, not per row.
+        pickers: dict[type, Callable] = {}
+        for rid, row in self._pull(self.children[0]):
+            picker = pickers.get(type(row))
+            if picker is None:
+                picker = pickers[type(row)] = _picker(type(row), columns)
+            yield rid, make_row(layout, picker(row))
+
+
+class Limit(Operator):
+    def __init__(self, child: Operator, limit: Optional[int], offset: int = 0):
+        super().__init__(child)
+        self.limit = limit
+        self.offset = offset
+
+    def produce(self) -> Iterator[Record]:
+        stop = None if self.limit is None else self.offset + self.limit
+        # islice stops pulling from the child as soon as the limit is reached.
+        yield from itertools.islice(self._pull(self.children[0]), self.offset, stop)
+
+
+class Sort(Operator):
+    def __init__(self, child: Operator, keys: list[tuple[str, bool]]):
+        super().__init__(child)
+        self.keys = keys
+
+    def produce(self) -> Iterator[Record]:
+        records = list(self._pull(self.children[0]))
+        # Stable sorts applied from the last key to the first give a
+        # multi-key ordering with per-key direction. NULLs sort first.
+        for column, descending in reversed(self.keys):
+            records.sort(key=_sort_getter(records, column), reverse=descending)
+        yield from records
+
+
+class Aggregate(Operator):
+    def __init__(self, child: Operator, group_by: list[str], aggregates: list[tuple[str, Optional[str], str]]):
+        super().__init__(child)
+        self.group_by = group_by
+        self.aggregates = aggregates
+
+    def produce(self) -> Iterator[Record]:
+        groups: dict[tuple, list[Accumulator]] = {}
+        # Each row is read once for the group by columns, then the columns
+        # the aggregates take, in that order.
+        width = len(self.group_by)
+        columns = list(self.group_by) + [column for _, column, _ in self.aggregates if column is not None]
+        pickers: dict[type, Callable] = {}
+        for _, row in self._pull(self.children[0]):
+            picker = pickers.get(type(row))
+            if picker is None:
+                picker = pickers[type(row)] = _picker(type(row), columns)
+            values = picker(row)
+            key = values[:width]
+            states = groups.get(key)
+            if states is None:
+                states = groups[key] = [Accumulator(func) for func, _, _ in self.aggregates]
+            position = width
+            for state, (_, column, _) in zip(states, self.aggregates):
+                if column is None:
+                    state.add(row, True)
+                else:
+                    state.add(values[position])
+                    position += 1
+
+        if not groups and not self.group_by:
+            groups[()] = [Accumulator(func) for func, _, _ in self.aggregates]
+        layout = row_type(tuple(self.group_by) + tuple(alias for _, _, alias in self.aggregates))
+        for key, states in groups.items():
+            yield None, make_row(layout, key + tuple(state.result() for state in states))
+
+
+class Accumulator:
+    FUNCTIONS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+    def __init__(self, func: str):
+        self.func = func
+        self.count = 0
+        self.value: Any = None
+
+    def add(self, value: Any, count_star: bool = False) -> None:
+        if value is None and not count_star:
+            return
+        self.count += 1
+        if self.func in ("SUM", "AVG"):
+            self.value = value if self.value is None else self.value + value
+        elif self.func == "MIN":
+            self.value = value if self.value is None or value < self.value else self.value
+        elif self.func == "MAX":
+            self.value = value if self.value is None or value > self.value else self.value
+
+    def add_all(self, values: Sequence) -> None:
+        # add() for each of `values`, none of them NULL, in one go.
+        if not values:
+            return
+        self.count += len(values)
+        if self.func in ("SUM", "AVG"):
+            self.value = sum(values) if self.value is None else sum(values, self.value)
+        elif self.func == "MIN":
+            low = min(values)
+            self.value = low if self.value is None or low < self.value else self.value
+        elif self.func == "MAX":
+            high = max(values)
+            self.value = high if self.value is None or high > self.value else self.value
+
+    def result(self) -> Any:
+        if self.func == "COUNT":
+            return self.count
+        if self.func == "AVG":
+            return None if not self.count else self.value / self.count
+        return self.value
+
+
+def _picker(source: type, columns: list[str]) -> Callable[[Any], tuple]:
+    # The values of `columns` in a row of type `source`, as a tuple.
+    positions = getattr(source, "positions", {})
+    if not columns:
+        return lambda row: ()
+    if issubclass(source, Row) and all(c in positions for c in columns):
+        if len(columns) == 1:
+            position = positions[columns[0]]
+            return lambda row: (tuple.__getitem__(row, position),)
+        # itemgetter over a plain tuple runs in C; over a Row it would go
+        # through Row.__getitem__.
+        getter = operator.itemgetter(*(positions[c] for c in columns))
+        return lambda row: getter(tuple(row))
+    return lambda row: tuple([row.get(c) for c in columns])
+
+
+def _sort_getter(records: list[Record], column: str) -> Callable[[Record], tuple]:
+    layout = type(records[0][1]) if records else None
+    position = getattr(layout, "positions", {}).get(column)
+    if position is not None and all(type(row) is layout for _, row in records):
+        at = tuple.__getitem__
+        return lambda r: _sort_key(at(r[1], position))
+    return lambda r: _sort_key(r[1].get(column))
+
+
+def _sort_key(value: Any) -> tuple:
+    return (value is not None, value if value is not None else 0)
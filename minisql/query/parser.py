@@ -1,5 +1,8 @@
 from typing import List, Optional
 from minisql.query.tokenizer import Token
+from minisql.query.ast import (
+    AggregateCall, Between, BooleanOp, ColumnRef, Comparison, Expression, InList, IsNull, Literal, Not, Parameter,
+)
 
 class ASTNode:
     def __init__(self, node_type: str, value: Optional[str] = None):
@@ -19,6 +22,8 @@ class Parser:
     def __init__(self, tokens: List[Token]):
         self.tokens = tokens
         self.position = 0
+        # Parameter keys in order of first appearance.
+        self.parameters: list = []
 
     def parse(self) -> ASTNode:
         if not self.tokens:
@@ -36,10 +41,33 @@ class Parser:
             elif command == "DELETE":
                 return self._parse_delete()
             elif command == "CREATE":
+                if self._peek_value("INDEX", 1) or self._peek_value("UNIQUE", 1):
+                    return self._parse_create_index()
                 return self._parse_create_table()
+            elif command == "DROP":
+                return self._parse_drop()
+            elif command == "EXPLAIN":
+                return self._parse_explain()
+            elif command == "COPY":
+                return self._parse_copy()
+            elif command in ("BEGIN", "COMMIT", "ROLLBACK"):
+                self._consume()
+                self._accept_keyword("TRANSACTION")
+                return ASTNode(command)
+            elif command == "VACUUM":
+                return self._parse_vacuum()
         
         return ASTNode("UNKNOWN")
 
+    def _parse_explain(self) -> ASTNode:
+        node = ASTNode("EXPLAIN")
+        self._expect_keyword("EXPLAIN")
+        statement = self.parse()
+        if statement.node_type not in ("SELECT", "UPDATE", "DELETE"):
+            raise ValueError("EXPLAIN supports SELECT, UPDATE and DELETE statements")
+        node.add_child(statement)
+        return node
+
     def _parse_create_table(self) -> ASTNode:
             node = ASTNode("CREATE_TABLE")
             self._expect_keyword("CREATE")
@@ -60,7 +88,11 @@ class Parser:
                 
                 current_col = [col_name, col_type]
                 
-                if self._peek_value("PRIMARY"):
+                while self._peek_value("PRIMARY") or self._peek_value("UNIQUE"):
+                    if self._peek_value("UNIQUE"):
+                        self._expect_keyword("UNIQUE")
+                        current_col.append("UNIQUE")
+                        continue
                     self._expect_keyword("PRIMARY")
                     self._expect_keyword("KEY")
                     current_col.append("PRIMARY KEY")
@@ -74,8 +106,51 @@ class Parser:
             
             node.add_child(ASTNode("COLUMNS", ",".join(column_definitions)))
             self._expect_punctuation(")")
+            node.add_child(ASTNode("OPTIONS", self._parse_options()))
             return node
 
+    def _parse_create_index(self) -> ASTNode:
+        node = ASTNode("CREATE_INDEX")
+        self._expect_keyword("CREATE")
+        node.add_child(ASTNode("UNIQUE", self._accept_keyword("UNIQUE")))
+        self._expect_keyword("INDEX")
+        node.add_child(ASTNode("INDEX", self._expect_identifier()))
+        self._expect_keyword("ON")
+        node.add_child(ASTNode("TABLE", self._expect_identifier()))
+        # USING may come before the column list or after it.
+        method = self._parse_index_method()
+        self._expect_punctuation("(")
+        node.add_child(ASTNode("COLUMNS", self._parse_column_list()))
+        self._expect_punctuation(")")
+        node.add_child(ASTNode("USING", method or self._parse_index_method() or "btree"))
+        return node
+
+    def _parse_index_method(self) -> Optional[str]:
+        if not self._accept_keyword("USING"):
+            return None
+        method = self._expect_identifier().lower()
+        if method not in ("btree", "hash"):
+            raise ValueError(f"Unknown index type {method}, expected BTREE or HASH")
+        return method
+
+    def _parse_drop(self) -> ASTNode:
+        self._expect_keyword("DROP")
+        if self._accept_keyword("INDEX"):
+            node = ASTNode("DROP_INDEX")
+            node.add_child(ASTNode("INDEX", self._expect_identifier()))
+            return node
+        self._expect_keyword("TABLE")
+        node = ASTNode("DROP_TABLE")
+        node.add_child(ASTNode("TABLE", self._expect_identifier()))
+        return node
+
+    def _parse_vacuum(self) -> ASTNode:
+        self._expect_keyword("VACUUM")
+        node = ASTNode("VACUUM")
+        if self._peek().type == "IDENTIFIER":
+            node.add_child(ASTNode("TABLE", self._expect_identifier()))
+        return node
+
     def _parse_select(self) -> ASTNode:
             node = ASTNode("SELECT")
             self._expect_keyword("SELECT")            
@@ -83,8 +158,7 @@ class Parser:
                 self._consume() 
                 node.add_child(ASTNode("COLUMNS", "*"))
             else:
-                columns = self._parse_column_list()
-                node.add_child(ASTNode("COLUMNS", ",".join(columns)))
+                node.add_child(ASTNode("COLUMNS", self._parse_select_list()))
                 
             self._expect_keyword("FROM")
             table = self._expect_identifier()
@@ -94,6 +168,16 @@ class Parser:
                 self._expect_keyword("WHERE")
                 condition = self._parse_condition()
                 node.add_child(ASTNode("WHERE", condition))
+            if self._accept_keyword("GROUP"):
+                self._expect_keyword("BY")
+                node.add_child(ASTNode("GROUP_BY", [c.lower() for c in self._parse_column_list()]))
+            if self._accept_keyword("ORDER"):
+                self._expect_keyword("BY")
+                node.add_child(ASTNode("ORDER_BY", self._parse_order_list()))
+            if self._accept_keyword("LIMIT"):
+                node.add_child(ASTNode("LIMIT", self._expect_count()))
+                if self._accept_keyword("OFFSET"):
+                    node.add_child(ASTNode("OFFSET", self._expect_count()))
             return node
 
     def _parse_insert(self) -> ASTNode:
@@ -110,11 +194,86 @@ class Parser:
         self._expect_punctuation(")")
         
         self._expect_keyword("VALUES")
+        # One value list per row: VALUES (...), (...), ...
+        rows = []
+        while True:
+            self._expect_punctuation("(")
+            rows.append(self._parse_value_list())
+            self._expect_punctuation(")")
+            if not self._peek_value(","):
+                break
+            self._expect_punctuation(",")
+        node.add_child(ASTNode("VALUES", rows))
+        return node
+
+    def _parse_copy(self) -> ASTNode:
+        # COPY table [(columns)] FROM 'file', or COPY table / COPY (SELECT ...)
+        # TO 'file'; the export's query is the node's first child.
+        self._expect_keyword("COPY")
+        if self._peek_value("("):
+            self._expect_punctuation("(")
+            query = self._parse_select()
+            self._expect_punctuation(")")
+            node = ASTNode("COPY_TO")
+            node.add_child(query)
+            self._expect_keyword("TO")
+        else:
+            table = self._expect_identifier()
+            columns = None
+            if self._peek_value("("):
+                self._expect_punctuation("(")
+                columns = [c.lower() for c in self._parse_column_list()]
+                self._expect_punctuation(")")
+            if self._accept_keyword("TO"):
+                node = ASTNode("COPY_TO")
+                query = ASTNode("SELECT")
+                query.add_child(ASTNode("COLUMNS", [ColumnRef(c) for c in columns] if columns else "*"))
+                query.add_child(ASTNode("TABLE", table))
+                node.add_child(query)
+            else:
+                self._expect_keyword("FROM")
+                node = ASTNode("COPY_FROM")
+                node.add_child(ASTNode("TABLE", table))
+                if columns:
+                    node.add_child(ASTNode("COLUMNS", columns))
+        node.add_child(ASTNode("FILE", self._expect_string()))
+        node.add_child(ASTNode("OPTIONS", self._parse_options()))
+        return node
+
+    def _parse_options(self) -> dict:
+        # WITH (name value, ...), also written name = value; a bare name
+        # means true. Names are case-insensitive.
+        options = {}
+        if not self._accept_keyword("WITH"):
+            return options
         self._expect_punctuation("(")
-        values = self._parse_value_list()
-        node.add_child(ASTNode("VALUES", ",".join(values)))
+        while True:
+            name = self._expect_identifier().lower()
+            if self._peek_value("="):
+                self._expect_operator("=")
+            if self._peek_value(",") or self._peek_value(")"):
+                options[name] = True
+            else:
+                token = self._consume()
+                if token.type == "LITERAL":
+                    options[name] = self._literal_value(token.value)
+                elif token.type == "KEYWORD" and token.value.upper() in ("TRUE", "FALSE"):
+                    options[name] = token.value.upper() == "TRUE"
+                elif token.type == "IDENTIFIER":
+                    options[name] = token.value.lower()
+                else:
+                    raise ValueError(f"Expected a value for option {name}, got {token.value}")
+            if not self._peek_value(","):
+                break
+            self._expect_punctuation(",")
         self._expect_punctuation(")")
-        return node
+        return options
+
+    def _expect_string(self) -> str:
+        token = self._consume()
+        if token.type != "LITERAL" or token.value[:1] not in ("'", '"'):
+            raise ValueError(f"Expected a quoted string, got {token.value}")
+        return token.value[1:-1]
 
     def _parse_update(self) -> ASTNode:
         node = ASTNode("UPDATE")
@@ -123,8 +282,7 @@ class Parser:
         node.add_child(ASTNode("TABLE", table))
         
         self._expect_keyword("SET")
-        assignments = self._parse_assignments()
-        node.add_child(ASTNode("SET", ",".join(assignments)))
+        node.add_child(ASTNode("SET", self._parse_assignments()))
         
         if self._peek_value("WHERE"):
             self._expect_keyword("WHERE")
@@ -155,44 +313,194 @@ class Parser:
                 break
         return columns
 
-    def _parse_value_list(self) -> List[str]:
+    def _parse_select_list(self) -> List[Expression]:
+        items = [self._parse_select_item()]
+        while self._peek_value(","):
+            self._expect_punctuation(",")
+            items.append(self._parse_select_item())
+        return items
+
+    def _parse_select_item(self) -> Expression:
+        name = self._expect_identifier()
+        if not (self._peek_value("(") and name.upper() in AggregateCall.FUNCTIONS):
+            return ColumnRef(name)
+        self._expect_punctuation("(")
+        argument = None
+        if self._peek_value("*") and name.upper() == "COUNT":
+            self._consume()
+        else:
+            argument = ColumnRef(self._expect_identifier())
+        self._expect_punctuation(")")
+        alias = self._expect_identifier() if self._accept_keyword("AS") else None
+        return AggregateCall(name, argument, alias)
+
+    def _parse_order_list(self) -> List[tuple]:
+        keys = []
+        while True:
+            item = self._parse_select_item()
+            name = item.name if isinstance(item, AggregateCall) else item.value.lower()
+            descending = self._accept_keyword("DESC")
+            if not descending:
+                self._accept_keyword("ASC")
+            keys.append((name, descending))
+            if self._peek_value(","):
+                self._expect_punctuation(",")
+            else:
+                break
+        return keys
+
+    def _expect_count(self) -> int:
+        token = self._consume()
+        if token.type != "LITERAL" or not token.value.isdigit():
+            raise ValueError(f"Expected a non-negative integer, got {token.value}")
+        return int(token.value)
+
+    def _parse_value_list(self) -> List[Expression]:
         values = []
         while True:
-            values.append(self._expect_literal_or_identifier())
+            values.append(self._parse_value())
             if self._peek_value(","):
                 self._expect_punctuation(",")
             else:
                 break
         return values
 
-    def _parse_assignments(self) -> List[str]:
+    def _parse_assignments(self) -> List[tuple]:
         assignments = []
         while True:
             column = self._expect_identifier()
             self._expect_operator("=")
-            value = self._expect_literal_or_identifier()
-            assignments.append(f"{column}={value}")
+            assignments.append((column, self._parse_value()))
             if self._peek_value(","):
                 self._expect_punctuation(",")
             else:
                 break
         return assignments
 
-    def _parse_condition(self) -> str:
-        left = self._expect_identifier()
-        op = self._expect_operator()
-        right = self._expect_literal_or_identifier()
-        return f"{left} {op} {right}"
+    def _parse_condition(self) -> Expression:
+        return self._parse_or()
 
-    def _peek(self) -> Token:
-        if self.position < len(self.tokens):
-            return self.tokens[self.position]
-        return Token("EOF", "")
+    def _parse_or(self) -> Expression:
+        operands = [self._parse_and()]
+        while self._peek_keyword("OR"):
+            self._consume()
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else BooleanOp("OR", operands)
+
+    def _parse_and(self) -> Expression:
+        operands = [self._parse_not()]
+        while self._peek_keyword("AND"):
+            self._consume()
+            operands.append(self._parse_not())
+        return operands[0] if len(operands) == 1 else BooleanOp("AND", operands)
+
+    def _parse_not(self) -> Expression:
+        if self._peek_keyword("NOT"):
+            self._consume()
+            return Not(self._parse_not())
+        return self._parse_predicate()
 
-    def _peek_value(self, value: str) -> bool:
+    def _parse_predicate(self) -> Expression:
+        if self._peek_value("(") and self._peek().type == "PUNCTUATION":
+            self._consume()
+            expr = self._parse_or()
+            self._expect_punctuation(")")
+            return expr
+
+        left = self._parse_operand()
         token = self._peek()
+        if token.type == "OPERATOR":
+            op = self._consume().value
+            if op == "<>":
+                op = "!="
+            if op not in Comparison.OPERATORS:
+                raise ValueError(f"Unsupported comparison operator {op}")
+            return Comparison(op, left, self._parse_operand())
+
+        if self._peek_keyword("IS"):
+            self._consume()
+            negated = self._accept_keyword("NOT")
+            self._expect_keyword("NULL")
+            return IsNull(left, negated)
+
+        negated = self._accept_keyword("NOT")
+        if self._peek_keyword("IN"):
+            self._consume()
+            self._expect_punctuation("(")
+            values = [self._parse_operand()]
+            while self._peek_value(","):
+                self._expect_punctuation(",")
+                values.append(self._parse_operand())
+            self._expect_punctuation(")")
+            return InList(left, values, negated)
+        if self._peek_keyword("BETWEEN"):
+            self._consume()
+            low = self._parse_operand()
+            self._expect_keyword("AND")
+            high = self._parse_operand()
+            return Between(left, low, high, negated)
+        if negated:
+            raise ValueError(f"Expected IN or BETWEEN after NOT, got {self._peek().value}")
+        return left
+
+    def _parse_value(self) -> Expression:
+        # VALUES and SET take bare words as strings.
+        if self._peek().type == "IDENTIFIER":
+            return Literal(self._consume().value)
+        return self._parse_operand()
+
+    def _parse_operand(self) -> Expression:
+        token = self._consume()
+        if token.type == "PARAMETER":
+            return self._parameter(token.value)
+        if token.type == "KEYWORD" and token.value.upper() in ("NULL", "TRUE", "FALSE"):
+            return Literal({"NULL": None, "TRUE": True, "FALSE": False}[token.value.upper()])
+        if token.type == "IDENTIFIER":
+            return ColumnRef(token.value)
+        if token.type == "LITERAL":
+            return Literal(self._literal_value(token.value))
+        raise ValueError(f"Expected literal or identifier, got {token.value}")
+
+    def _parameter(self, text: str) -> Parameter:
+        positional = text == "?"
+        if self.parameters and isinstance(self.parameters[0], int) != positional:
+            raise ValueError("Cannot mix ? and :name parameters in one statement")
+        key = len(self.parameters) if positional else text[1:]
+        if key not in self.parameters:
+            self.parameters.append(key)
+        return Parameter(key)
+
+    def _literal_value(self, text: str):
+        if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+            return text[1:-1]
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+    def _peek(self, ahead: int = 0) -> Token:
+        if self.position + ahead < len(self.tokens):
+            return self.tokens[self.position + ahead]
+        return Token("EOF", "")
+
+    def _peek_value(self, value: str, ahead: int = 0) -> bool:
+        token = self._peek(ahead)
         return token.value.upper() == value.upper()
 
+    def _peek_keyword(self, value: str) -> bool:
+        token = self._peek()
+        return token.type == "KEYWORD" and token.value.upper() == value
+
+    def _accept_keyword(self, value: str) -> bool:
+        if self._peek_keyword(value):
+            self._consume()
+            return True
+        return False
+
     def _consume(self) -> Token:
         token = self._peek()
         self.position += 1
@@ -221,9 +529,3 @@ class Parser:
         if token.type != "PUNCTUATION" or token.value != value:
             raise ValueError(f"Expected punctuation {value}, got {token.value}")
         return token.value
-
-    def _expect_literal_or_identifier(self) -> str:
-        token = self._consume()
-        if token.type not in {"LITERAL", "IDENTIFIER"}:
-            raise ValueError(f"Expected literal or identifier, got {token.value}")
-        return token.value
\ No newline at end of file
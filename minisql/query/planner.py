@@ -0,0 +1,438 @@
+from copy import copy
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Optional
+from minisql.catalog.schema import Column, TableSchema
+from minisql.index.index_manager import IndexInfo
+from minisql.query.ast import AggregateCall, Between, ColumnRef, Comparison, Expression, InList, Literal, Parameter
+from minisql.query.compiler import (
+    FLIPPED_OPERATORS, ParameterValues, PredicateCompiler, bind_predicate, bind_value, conjuncts, normalize,
+)
+from minisql.utils.exceptions import QueryError
+
+
+@dataclass(frozen=True)
+class Slot:
+    # A parameter standing in for an index key until the plan is bound.
+    key: Any
+    column: Column = field(compare=False)
+
+    def __repr__(self) -> str:
+        return "?" if isinstance(self.key, int) else f":{self.key}"
+
+
+@dataclass
+class PlanNode:
+    def explain(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def children(self) -> list["PlanNode"]:
+        return []
+
+
+@dataclass
+class SeqScan(PlanNode):
+    table: str
+
+    def explain(self) -> str:
+        return f"SeqScan({self.table})"
+
+
+@dataclass
+class IndexLookup(PlanNode):
+    table: str
+    column: str
+    keys: list[Any]
+    index: Optional[str] = None
+
+    def explain(self) -> str:
+        keys = ", ".join(repr(k) for k in self.keys)
+        target = f"{self.table}.{self.column} IN [{keys}]" if len(self.keys) > 1 \
+            else f"{self.table}.{self.column} = {keys}"
+        return f"IndexLookup({target}{_using(self.table, self.column, self.index)})"
+
+
+@dataclass
+class IndexRangeScan(PlanNode):
+    table: str
+    column: str
+    low: Any = None
+    high: Any = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+    descending: bool = False
+    index: Optional[str] = None
+
+    def explain(self) -> str:
+        parts = []
+        if self.low is not None:
+            parts.append(f"{self.column} {'>=' if self.low_inclusive else '>'} {self.low!r}")
+        if self.high is not None:
+            parts.append(f"{self.column} {'<=' if self.high_inclusive else '<'} {self.high!r}")
+        bounds = " AND ".join(parts) if parts else f"all {self.column}"
+        using = _using(self.table, self.column, self.index)
+        return f"IndexRangeScan({self.table}: {bounds}{' DESC' if self.descending else ''}{using})"
+
+
+def _using(table: str, column: str, index: Optional[str]) -> str:
+    # Indexes the executor creates for key columns are named after the column.
+    return "" if index is None or index == f"{table}.{column}" else f" using {index}"
+
+
+@dataclass
+class Filter(PlanNode):
+    child: PlanNode
+    expression: Expression
+    predicate: Callable[[dict], bool] = field(repr=False, compare=False)
+
+    def explain(self) -> str:
+        return f"Filter({self.expression.to_sql()})"
+
+    @property
+    def children(self) -> list[PlanNode]:
+        return [self.child]
+
+
+@dataclass
+class Project(PlanNode):
+    child: PlanNode
+    columns: Optional[list[str]]
+
+    def explain(self) -> str:
+        return f"Project({', '.join(self.columns) if self.columns else '*'})"
+
+    @property
+    def children(self) -> list[PlanNode]:
+        return [self.child]
+
+
+@dataclass
+class Sort(PlanNode):
+    child: PlanNode
+    keys: list[tuple[str, bool]]
+
+    def explain(self) -> str:
+        return "Sort(" + ", ".join(f"{c} DESC" if desc else c for c, desc in self.keys) + ")"
+
+    @property
+    def children(self) -> list[PlanNode]:
+        return [self.child]
+
+
+@dataclass
+class Limit(PlanNode):
+    child: PlanNode
+    limit: Optional[int]
+    offset: int = 0
+
+    def explain(self) -> str:
+        parts = [] if self.limit is None else [str(self.limit)]
+        if self.offset:
+            parts.append(f"OFFSET {self.offset}")
+        return f"Limit({' '.join(parts)})"
+
+    @property
+    def children(self) -> list[PlanNode]:
+        return [self.child]
+
+
+@dataclass
+class Aggregate(PlanNode):
+    child: PlanNode
+    group_by: list[str]
+    aggregates: list[tuple[str, Optional[str], str]]
+
+    def explain(self) -> str:
+        calls = ", ".join(name for _, _, name in self.aggregates)
+        if self.group_by:
+            return f"HashAggregate(group by {', '.join(self.group_by)}: {calls})"
+        return f"Aggregate({calls})"
+
+    @property
+    def children(self) -> list[PlanNode]:
+        return [self.child]
+
+
+@dataclass
+class Modify(PlanNode):
+    child: PlanNode
+    operation: str
+    table: str
+
+    def explain(self) -> str:
+        return f"{self.operation.capitalize()}({self.table})"
+
+    @property
+    def children(self) -> list[PlanNode]:
+        return [self.child]
+
+
+def bind_plan(plan: PlanNode, values: ParameterValues) -> PlanNode:
+    # A copy of a parameterized plan with the values in place; nodes without
+    # parameters are shared. Raises NullParameter for a NULL value.
+    if isinstance(plan, IndexLookup):
+        if not any(_has_slot(key) for key in plan.keys):
+            return plan
+        # Two parameters may bind to the same key; each row is fetched once.
+        keys = [_bind_key(key, values) for key in plan.keys]
+        return replace(plan, keys=sorted(set(keys)) if len(keys) > 1 else keys)
+    if isinstance(plan, IndexRangeScan):
+        if not _has_slot(plan.low) and not _has_slot(plan.high):
+            return plan
+        return replace(plan, low=_bind_key(plan.low, values), high=_bind_key(plan.high, values))
+    if isinstance(plan, Filter):
+        return replace(plan, child=bind_plan(plan.child, values), expression=bind_expression(plan.expression, values),
+                       predicate=bind_predicate(plan.predicate, values))
+    if plan.children:
+        return replace(plan, child=bind_plan(plan.child, values))
+    return plan
+
+
+def bind_expression(expr: Expression, values: ParameterValues) -> Expression:
+    # Subtrees without parameters are shared.
+    if isinstance(expr, Parameter):
+        return Literal(values[expr.value])
+    children = [bind_expression(child, values) if isinstance(child, Expression) else child
+                for child in expr.children]
+    if all(new is old for new, old in zip(children, expr.children)):
+        return expr
+    bound = copy(expr)
+    bound.children = children
+    return bound
+
+
+def _has_slot(key) -> bool:
+    return isinstance(key, Slot) or (isinstance(key, tuple) and any(isinstance(k, Slot) for k in key))
+
+
+def _bind_key(key, values: ParameterValues):
+    if isinstance(key, Slot):
+        return bind_value(values, key.key, key.column)
+    if isinstance(key, tuple):
+        return tuple(_bind_key(k, values) for k in key)
+    return key
+
+
+def explain(plan: PlanNode, depth: int = 0) -> list[str]:
+    lines = ["  " * depth + ("-> " if depth else "") + plan.explain()]
+    for child in plan.children:
+        lines.extend(explain(child, depth + 1))
+    return lines
+
+
+class Planner:
+    def __init__(self, table_manager, index_manager=None):
+        self.table_manager = table_manager
+        self.index_manager = index_manager
+
+    def plan_select(self, table_name: str, columns: Optional[list[Expression]], where: Optional[Expression],
+                    group_by: Optional[list[str]] = None, order_by: Optional[list[tuple[str, bool]]] = None,
+                    limit: Optional[int] = None, offset: int = 0) -> PlanNode:
+        schema = self.table_manager.get_table_schema(table_name)
+        plan = self.plan_scan(table_name, where)
+        group_by = [self._column(schema, name).name.lower() for name in group_by or []]
+        aggregates = [c for c in columns or [] if isinstance(c, AggregateCall)]
+        names = None if columns is None else [self._output_name(schema, c) for c in columns]
+
+        if aggregates or group_by:
+            for name in names or []:
+                if name not in group_by and not any(a.name == name for a in aggregates):
+                    raise QueryError(f"Column {name} must appear in GROUP BY or be used in an aggregate")
+            plan = Aggregate(plan, group_by, [self._aggregate(schema, a) for a in aggregates])
+            available = set(group_by) | {a.name for a in aggregates}
+        else:
+            available = {c.name.lower() for c in schema.columns}
+
+        if order_by:
+            for name, _ in order_by:
+                if name not in available:
+                    raise QueryError(f"Cannot ORDER BY {name}: not available in this query")
+            if not isinstance(plan, Aggregate):
+                plan, order_by = self._order_by_index(schema, plan, order_by)
+        if order_by:
+            plan = Sort(plan, order_by)
+        if limit is not None or offset:
+            plan = Limit(plan, limit, offset)
+        return Project(plan, names)
+
+    def plan_modify(self, operation: str, table_name: str, where: Optional[Expression]) -> PlanNode:
+        return Modify(self.plan_scan(table_name, where), operation, table_name)
+
+    def plan_scan(self, table_name: str, where: Optional[Expression]) -> PlanNode:
+        schema = self.table_manager.get_table_schema(table_name)
+        if where is None:
+            return SeqScan(table_name)
+
+        compiler = PredicateCompiler(schema, self._indexed_columns(schema))
+        predicate = compiler.compile(where)
+        access = self._choose_access_path(schema, normalize(where), compiler)
+        # The full predicate is re-checked on top of index paths, so stale
+        # index entries can never leak rows that no longer match.
+        return Filter(access, predicate.expression, predicate)
+
+    def _choose_access_path(self, schema: TableSchema, where: Expression, compiler: PredicateCompiler) -> PlanNode:
+        best, best_selectivity = SeqScan(schema.name), 1.0
+        ranges: dict[str, IndexRangeScan] = {}
+        equalities: dict[str, tuple[Any, float]] = {}
+
+        for conjunct in conjuncts(where):
+            equality = self._equality(schema, conjunct)
+            if equality is not None:
+                equalities[equality[0]] = (equality[1], compiler.selectivity(conjunct))
+            sargable = self._sargable(schema, conjunct)
+            if sargable is None:
+                continue
+            index, column, kind, payload = sargable
+            if kind == "range":
+                ranges[index.name] = self._merge_range(ranges.get(index.name), schema.name, column.name,
+                                                       *payload, index=index.name)
+                continue
+            selectivity = compiler.selectivity(conjunct)
+            if selectivity < best_selectivity:
+                best, best_selectivity = IndexLookup(schema.name, column.name, payload, index.name), selectivity
+
+        # A composite index answers equality on all of its columns with one probe.
+        for index in self.index_manager.table_indexes(schema.name) if self.index_manager else ():
+            if not index.composite or not all(c in equalities for c in index.columns):
+                continue
+            selectivity = 1.0
+            for c in index.columns:
+                selectivity *= equalities[c][1]
+            if selectivity < best_selectivity:
+                key = tuple(equalities[c][0] for c in index.columns)
+                best = IndexLookup(schema.name, f"({', '.join(index.columns)})", [key], index.name)
+                best_selectivity = selectivity
+
+        for scan in ranges.values():
+            bounded = scan.low is not None and scan.high is not None
+            selectivity = 0.25 if bounded else 0.33
+            if selectivity < best_selectivity:
+                best, best_selectivity = scan, selectivity
+        return best
+
+    def _equality(self, schema: TableSchema, expr: Expression):
+        # column = literal on any column, for matching composite indexes.
+        if not isinstance(expr, Comparison) or expr.value != "=":
+            return None
+        left, right = expr.left, expr.right
+        if isinstance(left, (Literal, Parameter)):
+            left, right = right, left
+        if not isinstance(left, ColumnRef):
+            return None
+        column = schema.get_column(left.value)
+        key = None if column is None else self._constant_key(column, right)
+        return None if key is None else (column.name.lower(), key)
+
+    def _sargable(self, schema: TableSchema, expr: Expression):
+        if isinstance(expr, Comparison):
+            op, left, right = expr.value, expr.left, expr.right
+            if isinstance(left, (Literal, Parameter)) and isinstance(right, ColumnRef):
+                op, left, right = FLIPPED_OPERATORS[op], right, left
+            index, column = self._index_on(schema, left, ordered=op != "=")
+            key = None if index is None or op == "!=" else self._constant_key(column, right)
+            if key is None:
+                return None
+            if op == "=":
+                return index, column, "lookup", [key]
+            if op in (">", ">="):
+                return index, column, "range", (key, None, op == ">=", True)
+            return index, column, "range", (None, key, True, op == "<=")
+
+        if isinstance(expr, InList) and not expr.negated:
+            index, column = self._index_on(schema, expr.column)
+            keys = [] if index is None else [self._constant_key(column, v) for v in expr.values]
+            if not keys or any(key is None for key in keys):
+                return None
+            if any(isinstance(key, Slot) for key in keys):
+                return index, column, "lookup", list(dict.fromkeys(keys))
+            return index, column, "lookup", sorted(set(keys))
+
+        if isinstance(expr, Between) and not expr.negated:
+            index, column = self._index_on(schema, expr.column, ordered=True)
+            if index is None:
+                return None
+            low, high = self._constant_key(column, expr.low), self._constant_key(column, expr.high)
+            if low is None or high is None:
+                return None
+            return index, column, "range", (low, high, True, True)
+        return None
+
+    def _merge_range(self, scan: Optional[IndexRangeScan], table: str, column: str,
+                     low, high, low_inclusive: bool, high_inclusive: bool, index: Optional[str] = None) -> IndexRangeScan:
+        if scan is None:
+            return IndexRangeScan(table, column, low, high, low_inclusive, high_inclusive, index=index)
+        # Parameter bounds cannot be compared before they are bound; keeping
+        # the first one is safe because the Filter rechecks every condition.
+        if low is not None and (scan.low is None or (not _has_slot(low) and not _has_slot(scan.low) and (
+                low > scan.low or (low == scan.low and not low_inclusive)))):
+            scan.low, scan.low_inclusive = low, low_inclusive
+        if high is not None and (scan.high is None or (not _has_slot(high) and not _has_slot(scan.high) and (
+                high < scan.high or (high == scan.high and not high_inclusive)))):
+            scan.high, scan.high_inclusive = high, high_inclusive
+        return scan
+
+    def _order_by_index(self, schema: TableSchema, plan: PlanNode,
+                        order_by: list[tuple[str, bool]]) -> tuple[PlanNode, list[tuple[str, bool]]]:
+        # An index already returns rows in key order, so a scan of the leading
+        # ORDER BY column makes the sort unnecessary. Later ORDER BY columns
+        # only matter on ties, which a unique single-column index never has.
+        name, descending = order_by[0]
+        index, column = self._index_on(schema, ColumnRef(name), ordered=True)
+        if index is None or (len(order_by) > 1 and (index.composite or not index.unique)):
+            return plan, order_by
+        access = plan.child if isinstance(plan, Filter) else plan
+        if isinstance(access, IndexRangeScan) and access.column == column.name:
+            access.descending = descending
+        elif isinstance(access, IndexLookup) and access.column == column.name:
+            if len(access.keys) > 1 and any(_has_slot(key) for key in access.keys):
+                # Parameter keys cannot be put in order until they are bound.
+                return plan, order_by
+            access.keys = sorted(access.keys, reverse=descending)
+        elif isinstance(access, SeqScan) and column.primary_key:
+            # Only primary keys can be walked in full: other indexes skip NULLs.
+            scan = IndexRangeScan(schema.name, column.name, descending=descending, index=index.name)
+            plan = Filter(scan, plan.expression, plan.predicate) if isinstance(plan, Filter) else scan
+        else:
+            return plan, order_by
+        return plan, []
+
+    def _output_name(self, schema: TableSchema, item: Expression) -> str:
+        if isinstance(item, AggregateCall):
+            return item.name
+        return self._column(schema, item.value).name.lower()
+
+    def _aggregate(self, schema: TableSchema, call: AggregateCall) -> tuple[str, Optional[str], str]:
+        column = None if call.argument is None else self._column(schema, call.argument.value).name.lower()
+        return call.value, column, call.name
+
+    def _column(self, schema: TableSchema, name: str) -> Column:
+        column = schema.get_column(name)
+        if column is None:
+            raise QueryError(f"Unknown column {name} in table {schema.name}")
+        return column
+
+    def _index_on(self, schema: TableSchema, expr: Expression,
+                  ordered: bool = False) -> tuple[Optional[IndexInfo], Optional[Column]]:
+        if not isinstance(expr, ColumnRef) or self.index_manager is None:
+            return None, None
+        column = schema.get_column(expr.value)
+        index = None if column is None else self.index_manager.leading_index(schema.name, column.name, ordered)
+        return (index, column) if index is not None else (None, None)
+
+    def _indexed_columns(self, schema: TableSchema) -> list[str]:
+        return self.index_manager.indexed_columns(schema.name) if self.index_manager else []
+
+    def _constant_key(self, column: Column, expr: Expression) -> Any:
+        # The index key for a literal or parameter operand; None when the
+        # operand is NULL or not a constant.
+        if isinstance(expr, Parameter):
+            return Slot(expr.value, column)
+        if isinstance(expr, Literal) and expr.value is not None:
+            return self._key(column, expr.value)
+        return None
+
+    def _key(self, column: Column, value: Any) -> Any:
+        try:
+            return column.operand(value)
+        except (TypeError, ValueError):
+            raise QueryError(f"Invalid value {value!r} for column {column.name} ({column.type})")
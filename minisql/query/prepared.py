@@ -0,0 +1,78 @@
+from collections.abc import Mapping
+from typing import Any, Optional
+from minisql.query.ast import Expression
+from minisql.query.compiler import ParameterValues
+from minisql.query.cursor import Cursor
+from minisql.query.parser import ASTNode
+from minisql.query.planner import PlanNode, bind_expression
+from minisql.query.tokenizer import Token
+from minisql.utils.exceptions import QueryError
+
+
+class PreparedStatement:
+    # A parsed statement kept by the executor's statement cache, with the plan
+    # made for it the first time it ran. `version` records the catalog and
+    # index versions the plan was made against.
+    def __init__(self, executor, sql: str, ast: ASTNode, parameters: list):
+        self.executor = executor
+        self.sql = sql
+        self.ast = ast
+        self.parameters = parameters
+        self.plan: Optional[PlanNode] = None
+        self.version: Any = None
+
+    @property
+    def node_type(self) -> str:
+        return self.ast.node_type.upper()
+
+    def execute(self, params: ParameterValues = ()):
+        return self.executor.execute_prepared(self, params)
+
+    def stream(self, params: ParameterValues = ()):
+        return self.executor.stream_prepared(self, params)
+
+    def cursor(self, params: ParameterValues = ()) -> Cursor:
+        if self.node_type != "SELECT":
+            raise QueryError("Only SELECT statements return a cursor")
+        return Cursor(self.stream(params))
+
+    def bind(self, params: ParameterValues) -> ParameterValues:
+        if self.parameters and isinstance(self.parameters[0], str):
+            if not isinstance(params, Mapping):
+                raise QueryError("Named parameters need a mapping of values")
+            missing = [name for name in self.parameters if name not in params]
+            if missing:
+                raise QueryError(f"No value for parameter :{missing[0]}")
+            return params
+        if isinstance(params, Mapping):
+            if params and not self.parameters:
+                raise QueryError("Statement takes no parameters")
+            if self.parameters:
+                raise QueryError("Positional parameters need a sequence of values")
+            return ()
+        if len(params) != len(self.parameters):
+            raise QueryError(f"Statement takes {len(self.parameters)} parameters, got {len(params)}")
+        return params
+
+
+def bind_parameters(node: ASTNode, values: ParameterValues) -> ASTNode:
+    # A copy of the statement with every parameter replaced by its value.
+    bound = ASTNode(node.node_type, _bind(node.value, values))
+    for child in node.children:
+        bound.add_child(bind_parameters(child, values))
+    return bound
+
+
+def _bind(value, values: ParameterValues):
+    if isinstance(value, Expression):
+        return bind_expression(value, values)
+    if isinstance(value, list):
+        return [_bind(item, values) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_bind(item, values) for item in value)
+    return value
+
+
+def normalize_sql(tokens: list[Token]) -> str:
+    # Statements that differ only in spacing or keyword case share one entry.
+    return " ".join(token.value.upper() if token.type == "KEYWORD" else token.value for token in tokens)
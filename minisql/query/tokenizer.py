@@ -1,6 +1,28 @@
 import re
 from typing import List
 
+KEYWORDS = frozenset({
+    "SELECT", "FROM", "WHERE", "INSERT", "INTO",
+    "VALUES", "UPDATE", "SET", "DELETE", "CREATE", "TABLE",
+    "PRIMARY", "KEY", "UNIQUE", "INT", "STRING", "TEXT",
+    "EXPLAIN", "AND", "OR", "NOT", "IN", "BETWEEN", "IS", "NULL", "TRUE", "FALSE",
+    "ORDER", "GROUP", "BY", "ASC", "DESC", "LIMIT", "OFFSET", "AS",
+    "INDEX", "ON", "DROP", "USING", "COPY", "WITH", "TO",
+    "BEGIN", "COMMIT", "ROLLBACK", "TRANSACTION", "VACUUM"
+})
+
+TOKEN_SPECIFICATION = [
+    ("LITERAL", r"'[^']*'|\"[^\"]*\"|-?\d+(?:\.\d+)?"),
+    ("PARAMETER", r"\?|:[a-zA-Z_][a-zA-Z0-9_]*"),
+    ("KEYWORD", r"[a-zA-Z_][a-zA-Z0-9_]*"),
+    ("OPERATOR", r">=|<=|!=|<>|[>=<=]"),
+    ("PUNCTUATION", r"[(),*]"),
+    ("SKIP", r"[ \t\n]+"),
+    ("MISMATCH", r"."),
+]
+# Compiled once at import: every statement is tokenized.
+TOKEN_REGEX = re.compile("|".join("(?P<%s>%s)" % pair for pair in TOKEN_SPECIFICATION))
+
 class Token:
     def __init__(self, type: str, value: str):
         self.type = type
@@ -13,24 +35,10 @@ class Tokenizer:
     def __init__(self, text: str):
         self.text = text
         self.tokens: List[Token] = []
-        self.keywords = {
-            "SELECT", "FROM", "WHERE", "INSERT", "INTO", 
-            "VALUES", "UPDATE", "SET", "DELETE", "CREATE", "TABLE", 
-            "PRIMARY", "KEY", "INT", "STRING", "TEXT"
-        }
+        self.keywords = KEYWORDS
 
     def tokenize(self) -> List[Token]:
-        token_specification = [
-            ("LITERAL", r"'[^']*'|\d+"),              
-            ("KEYWORD", r"[a-zA-Z_][a-zA-Z0-9_]*"),  
-            ("OPERATOR", r">=|<=|!=|[>=<=]"),         
-            ("PUNCTUATION", r"[(),*]"),               
-            ("SKIP", r"[ \t\n]+"),                    
-            ("MISMATCH", r"."),                     
-        ]
-        
-        tok_regex = "|".join("(?P<%s>%s)" % pair for pair in token_specification)
-        for mo in re.finditer(tok_regex, self.text):
+        for mo in TOKEN_REGEX.finditer(self.text):
             kind = mo.lastgroup
             value = mo.group()
             
@@ -41,6 +49,8 @@ class Tokenizer:
                     self.tokens.append(Token("IDENTIFIER", value))
             elif kind == "LITERAL":
                 self.tokens.append(Token("LITERAL", value))
+            elif kind == "PARAMETER":
+                self.tokens.append(Token("PARAMETER", value))
             elif kind == "OPERATOR":
                 self.tokens.append(Token("OPERATOR", value))
             elif kind == "PUNCTUATION":
@@ -50,4 +60,4 @@ class Tokenizer:
             elif kind == "MISMATCH":
                 raise RuntimeError(f"Unexpected character: {value}")
         
-        return self.tokens
\ No newline at end of file
+        return self.tokens
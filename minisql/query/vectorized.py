@@ -0,0 +1,337 @@
+import functools
+import operator
+from array import array
+from itertools import compress, islice, repeat
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+from minisql.catalog.row import make_row, row_type
+from minisql.catalog.schema import Column, TableSchema
+from minisql.config.settings import VECTOR_BATCH_SIZE
+from minisql.query.ast import Between, BooleanOp, ColumnRef, Comparison, Expression, InList, IsNull, Literal
+from minisql.query.compiler import FLIPPED_OPERATORS, OPERATOR_FUNCTIONS, PredicateCompiler, normalize
+from minisql.query.operators import Accumulator, Operator, Record
+from minisql.utils.exceptions import QueryError
+
+# Fixed-width column types are packed into typed arrays; a batch column that
+# holds a NULL (or does not fit the type) stays a plain list.
+TYPECODES = {"INT": "q", "FLOAT": "d", "BOOL": "b"}
+
+# A selection is the list of row positions in a batch that are still
+# candidates; None stands for every row.
+Selection = Optional[list[int]]
+VectorPredicate = Callable[["Batch", Selection], list[int]]
+
+
+class Batch:
+    __slots__ = ("columns", "rids", "size")
+
+    def __init__(self, columns: dict[str, Sequence], rids: Sequence, size: int):
+        self.columns = columns
+        self.rids = rids
+        self.size = size
+
+    def take(self, selection: list[int]) -> "Batch":
+        columns = {}
+        for name, values in self.columns.items():
+            kept = map(values.__getitem__, selection)
+            columns[name] = array(values.typecode, kept) if isinstance(values, array) else list(kept)
+        return Batch(columns, list(map(self.rids.__getitem__, selection)), len(selection))
+
+    def gather(self, name: str, selection: Selection) -> Sequence:
+        values = self.columns[name]
+        return values if selection is None else list(map(values.__getitem__, selection))
+
+    def positions(self, selection: Selection) -> Sequence[int]:
+        return range(self.size) if selection is None else selection
+
+    def values(self, name: str) -> Iterable[Any]:
+        values = self.columns[name]
+        if isinstance(values, array) and values.typecode == "b":
+            return map(bool, values)
+        return values
+
+    def rows(self) -> Iterator[Record]:
+        names = tuple(self.columns)
+        layout = row_type(names)
+        if not names:
+            return zip(self.rids, repeat(make_row(layout, ()), self.size))
+        return zip(self.rids, map(functools.partial(make_row, layout), zip(*(self.values(name) for name in names))))
+
+
+def column_vector(column: Column, values: list) -> Sequence:
+    typecode = TYPECODES.get(column.type.upper())
+    if typecode is None:
+        return values
+    try:
+        return array(typecode, values)
+    except (OverflowError, TypeError):
+        return values
+
+
+def referenced_columns(expr: Expression) -> set[str]:
+    if isinstance(expr, ColumnRef):
+        return {expr.value.lower()}
+    return set().union(*(referenced_columns(child) for child in expr.children))
+
+
+class BatchScan(Operator):
+    def __init__(self, source: Callable[[], Iterable[Record]], schema: TableSchema,
+                 batch_size: int = VECTOR_BATCH_SIZE, columns: Optional[Iterable[str]] = None):
+        super().__init__()
+        self.source = source
+        self.schema = schema
+        self.batch_size = batch_size
+        self.columns = None if columns is None else {c.lower() for c in columns}
+
+    def produce(self) -> Iterator[Batch]:
+        records = iter(self.source())
+        # Only the columns the pipeline reads are materialized.
+        columns = [(column.name.lower(), column) for column in self.schema.columns
+                   if self.columns is None or column.name.lower() in self.columns]
+        layout = self.schema.row_type
+        while True:
+            chunk = list(islice(records, self.batch_size))
+            if not chunk:
+                return
+            rids = list(map(operator.itemgetter(0), chunk))
+            rows = list(map(operator.itemgetter(1), chunk))
+            if all(type(row) is layout for row in rows):
+                # Rows in the table's layout transpose straight into columns.
+                vectors = dict(zip(layout.names, zip(*rows)))
+                values = lambda name: list(vectors[name])
+            else:
+                values = lambda name: [row.get(name) for row in rows]
+            yield Batch({name: column_vector(column, values(name)) for name, column in columns}, rids, len(chunk))
+
+
+class ColumnScan(Operator):
+    # Batches straight from the row groups of a columnar table, whose
+    # columns are stored as the vectors a batch holds.
+    def __init__(self, source: Callable[[], Iterable[tuple[Sequence, dict[str, Sequence]]]]):
+        super().__init__()
+        self.source = source
+
+    def produce(self) -> Iterator[Batch]:
+        for rids, columns in self.source():
+            yield Batch(columns, rids, len(rids))
+
+
+class BatchFilter(Operator):
+    def __init__(self, child: Operator, predicate: VectorPredicate):
+        super().__init__(child)
+        self.predicate = predicate
+
+    def produce(self) -> Iterator[Batch]:
+        for batch in self._pull(self.children[0]):
+            selection = self.predicate(batch, None)
+            if len(selection) == batch.size:
+                yield batch
+            elif selection:
+                yield batch.take(selection)
+
+
+class BatchProject(Operator):
+    def __init__(self, child: Operator, columns: Optional[list[str]]):
+        super().__init__(child)
+        self.columns = columns
+
+    def produce(self) -> Iterator[Batch]:
+        for batch in self._pull(self.children[0]):
+            if self.columns is not None:
+                batch = Batch({c: batch.columns[c] for c in self.columns}, batch.rids, batch.size)
+            yield batch
+
+
+class BatchAggregate(Operator):
+    # An aggregate without GROUP BY, folded a column of a batch at a time.
+    def __init__(self, child: Operator, aggregates: list[tuple[str, Optional[str], str]]):
+        super().__init__(child)
+        self.aggregates = aggregates
+
+    def produce(self) -> Iterator[Record]:
+        states = [Accumulator(func) for func, _, _ in self.aggregates]
+        for batch in self._pull(self.children[0]):
+            for state, (_, column, _) in zip(states, self.aggregates):
+                if column is None:
+                    state.count += batch.size
+                elif _not_null(batch, column):
+                    values = batch.columns[column]
+                    state.add_all(list(map(bool, values)) if values.typecode == "b" else values)
+                else:
+                    state.add_all([v for v in batch.columns[column] if v is not None])
+        layout = row_type(tuple(alias for _, _, alias in self.aggregates))
+        yield None, make_row(layout, [state.result() for state in states])
+
+
+class Unbatch(Operator):
+    def produce(self) -> Iterator[Record]:
+        for batch in self._pull(self.children[0]):
+            yield from batch.rows()
+
+
+class VectorCompiler:
+    def __init__(self, schema: TableSchema):
+        self.schema = schema
+
+    def compile(self, expr: Expression) -> VectorPredicate:
+        return self._select(normalize(expr))
+
+    def _select(self, expr: Expression) -> VectorPredicate:
+        if isinstance(expr, BooleanOp):
+            parts = [self._select(operand) for operand in expr.operands]
+            return self._and(parts) if expr.value == "AND" else self._or(parts)
+        if isinstance(expr, Comparison):
+            return self._comparison(expr)
+        if isinstance(expr, InList) and all(isinstance(v, Literal) for v in expr.values):
+            return self._in(expr)
+        if isinstance(expr, Between) and isinstance(expr.low, Literal) and isinstance(expr.high, Literal):
+            return self._between(expr)
+        if isinstance(expr, IsNull):
+            return self._is_null(expr)
+        if isinstance(expr, Literal):
+            if expr.value:
+                return lambda batch, selection: list(batch.positions(selection))
+            return _select_none
+        return self._rowwise(expr)
+
+    def _and(self, parts: list[VectorPredicate]) -> VectorPredicate:
+        # Each conjunct only looks at the rows that survived the previous one.
+        def conjunction(batch: Batch, selection: Selection) -> list[int]:
+            for part in parts:
+                selection = part(batch, selection)
+                if not selection:
+                    break
+            return selection
+        return conjunction
+
+    def _or(self, parts: list[VectorPredicate]) -> VectorPredicate:
+        # Each disjunct only looks at the rows no earlier one accepted.
+        def disjunction(batch: Batch, selection: Selection) -> list[int]:
+            remaining = list(batch.positions(selection))
+            accepted: list[int] = []
+            for part in parts:
+                if not remaining:
+                    break
+                matched = part(batch, remaining)
+                if matched:
+                    accepted.extend(matched)
+                    matched = set(matched)
+                    remaining = [i for i in remaining if i not in matched]
+            accepted.sort()
+            return accepted
+        return disjunction
+
+    def _comparison(self, expr: Comparison) -> VectorPredicate:
+        op, left, right = expr.value, expr.left, expr.right
+        if isinstance(left, Literal) and isinstance(right, ColumnRef):
+            op, left, right = FLIPPED_OPERATORS[op], right, left
+        if not isinstance(left, ColumnRef):
+            return self._rowwise(expr)
+        func = OPERATOR_FUNCTIONS[op]
+        name = self._column(left).name.lower()
+
+        if isinstance(right, ColumnRef):
+            other = self._column(right).name.lower()
+
+            def compare_columns(batch: Batch, selection: Selection) -> list[int]:
+                a, b = batch.gather(name, selection), batch.gather(other, selection)
+                if _not_null(batch, name) and _not_null(batch, other):
+                    mask = map(func, a, b)
+                else:
+                    mask = [x is not None and y is not None and func(x, y) for x, y in zip(a, b)]
+                return list(compress(batch.positions(selection), mask))
+            return compare_columns
+
+        if right.value is None:
+            return _select_none
+        constant = self._coerce(self._column(left), right.value)
+
+        def compare(batch: Batch, selection: Selection) -> list[int]:
+            values = batch.gather(name, selection)
+            if _not_null(batch, name):
+                mask = map(func, values, repeat(constant))
+            else:
+                mask = [v is not None and func(v, constant) for v in values]
+            return list(compress(batch.positions(selection), mask))
+        return compare
+
+    def _in(self, expr: InList) -> VectorPredicate:
+        column = self._column(expr.column)
+        name = column.name.lower()
+        raw = [v.value for v in expr.values]
+        if expr.negated and None in raw:
+            return _select_none
+        members = frozenset(self._coerce(column, v) for v in raw if v is not None)
+        negated = expr.negated
+
+        def contains(batch: Batch, selection: Selection) -> list[int]:
+            values = batch.gather(name, selection)
+            if _not_null(batch, name):
+                mask = map(members.__contains__, values)
+                if negated:
+                    mask = map(operator.not_, mask)
+            else:
+                mask = [v is not None and (v in members) != negated for v in values]
+            return list(compress(batch.positions(selection), mask))
+        return contains
+
+    def _between(self, expr: Between) -> VectorPredicate:
+        column = self._column(expr.column)
+        name = column.name.lower()
+        if expr.low.value is None or expr.high.value is None:
+            return _select_none
+        low, high = self._coerce(column, expr.low.value), self._coerce(column, expr.high.value)
+        negated = expr.negated
+
+        def between(batch: Batch, selection: Selection) -> list[int]:
+            values = batch.gather(name, selection)
+            if _not_null(batch, name):
+                mask = map(operator.and_, map(operator.ge, values, repeat(low)), map(operator.le, values, repeat(high)))
+                if negated:
+                    mask = map(operator.not_, mask)
+            else:
+                mask = [v is not None and (low <= v <= high) != negated for v in values]
+            return list(compress(batch.positions(selection), mask))
+        return between
+
+    def _is_null(self, expr: IsNull) -> VectorPredicate:
+        name = self._column(expr.column).name.lower()
+        test = operator.is_not if expr.negated else operator.is_
+
+        def is_null(batch: Batch, selection: Selection) -> list[int]:
+            if _not_null(batch, name):
+                return list(batch.positions(selection)) if expr.negated else []
+            mask = map(test, batch.gather(name, selection), repeat(None))
+            return list(compress(batch.positions(selection), mask))
+        return is_null
+
+    def _rowwise(self, expr: Expression) -> VectorPredicate:
+        # Anything without a column-at-a-time form falls back to the row predicate.
+        predicate = PredicateCompiler(self.schema).compile(expr)
+
+        def rowwise(batch: Batch, selection: Selection) -> list[int]:
+            candidates = batch if selection is None else batch.take(selection)
+            mask = map(predicate, (row for _, row in candidates.rows()))
+            return list(compress(batch.positions(selection), mask))
+        return rowwise
+
+    def _column(self, expr: Expression) -> Column:
+        if not isinstance(expr, ColumnRef):
+            raise QueryError(f"Expected a column reference, got {expr}")
+        column = self.schema.get_column(expr.value)
+        if column is None:
+            raise QueryError(f"Unknown column {expr.value} in table {self.schema.name}")
+        return column
+
+    def _coerce(self, column: Column, value: Any) -> Any:
+        try:
+            return column.operand(value)
+        except (TypeError, ValueError):
+            raise QueryError(f"Invalid value {value!r} for column {column.name} ({column.type})")
+
+
+def _not_null(batch: Batch, name: str) -> bool:
+    return isinstance(batch.columns[name], array)
+
+
+def _select_none(batch: Batch, selection: Selection) -> list[int]:
+    return []
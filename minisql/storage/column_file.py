@@ -0,0 +1,348 @@
+import struct
+import threading
+from array import array
+from itertools import compress
+from typing import Any, Callable, Iterator, Optional, Sequence
+from minisql.cache.buffer_pool import BufferPool
+from minisql.cache.lru_cache import LRUCache
+from minisql.catalog.row import Row, make_row, row_type
+from minisql.config.settings import COLUMNAR_CACHE_CHUNKS, COLUMNAR_GROUP_ROWS
+from minisql.index.paged_file import PagedFile, decode_array, decode_list, encode_list
+from minisql.storage.file_manager import FileManager
+from minisql.utils.exceptions import RecordNotFoundError, StorageError
+
+# Fixed-width column types are stored as packed arrays of this typecode.
+TYPECODES = {"INT": "q", "FLOAT": "d", "BOOL": "b"}
+
+# The xmin of a removed version. Row numbers are never reused, so a removed
+# row keeps its place in every column.
+REMOVED = -1
+
+# Chunk encodings: a packed array; strings as a dictionary of distinct values
+# and an array of codes into it; strings as an offset array into one UTF-8
+# blob; anything else value by value with a type tag.
+PLAIN, DICTIONARY, OFFSETS, TAGGED = 1, 2, 3, 4
+
+# Every row group stores these before the table's own columns.
+XMIN, XMAX = 0, 1
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+_LEN = struct.Struct("<I")
+
+# (rids, xmins, xmaxs, {column: values}) for the kept rows of one row group.
+Group = tuple[Sequence[int], Sequence[int], Sequence[int], dict[str, Sequence]]
+
+
+class ColumnFile(PagedFile):
+    # A table stored column by column. Rows are numbered in insert order and
+    # the number is the rid. Every `group_rows` rows form a row group, which
+    # holds each column as one chunk record (with overflow pages when it
+    # outgrows a page), so a scan reads the pages of the columns it asks for
+    # and no others. Chunks go through the buffer pool like heap pages, so
+    # the WAL covers them. Changed chunks stay decoded in memory until
+    # write_pending() encodes them at commit.
+    MAGIC = b"COL1"
+    # Meta: magic, build state, free list head, page count, row count, rows
+    # per group, directory page, then the tagged descriptor.
+    META = struct.Struct("<4sBIIQII")
+    # Chunk: encoding, flags (the NULL mask is present, or the TAGGED codec),
+    # value count, first overflow page.
+    CHUNK = struct.Struct("<BBII")
+    # Directory page: first overflow page; then the chunk page of each
+    # column of each group, group by group, 0 where none is written yet.
+    DIRECTORY = struct.Struct("<I")
+
+    def __init__(self, file_manager: FileManager, filename: str, columns: Sequence[tuple[str, str]],
+                 buffer_pool: Optional[BufferPool] = None, group_rows: int = COLUMNAR_GROUP_ROWS,
+                 cache_size: int = COLUMNAR_CACHE_CHUNKS):
+        PagedFile.__init__(self, file_manager, filename, buffer_pool)
+        self.names = [name.lower() for name, _ in columns]
+        self.layout = row_type(tuple(self.names))
+        self.typecodes = ["q", "q"] + [TYPECODES.get(col_type.upper()) for _, col_type in columns]
+        self.width = len(self.typecodes)
+        self.latch = threading.RLock()
+        self._chunks = LRUCache(cache_size)
+        # Decoded chunks changed since they were last written, by (group, column).
+        self._pending: dict[tuple[int, int], list] = {}
+        if self._exists():
+            _, self._free_head, self.num_pages, self.rows, self.group_rows, self._directory_page, \
+                self.descriptor = self._read_meta()
+            _, body = self._read_chained(self._directory_page, self.DIRECTORY)
+            self.directory = decode_array("I", body).tolist()
+        else:
+            self.group_rows = group_rows
+            self.rows = 0
+            self.directory = []
+            self._create_meta_page()
+            self._directory_page = self._allocate()
+            self._write_chained(self._directory_page, self.DIRECTORY, (), b"")
+            self._write_meta()
+        self.ready = True
+
+    def insert(self, row: dict, xmin: int) -> int:
+        # Chunks are written at commit, too late to refuse a value; ints
+        # that no chunk encoding holds are refused here instead.
+        for name in self.names:
+            value = row.get(name)
+            if type(value) is int and not INT64_MIN <= value <= INT64_MAX:
+                raise StorageError(f"Integer {value} does not fit in a column chunk")
+        with self.latch:
+            rid = self.rows
+            group = rid // self.group_rows
+            self._mutable(group, XMIN).append(xmin)
+            self._mutable(group, XMAX).append(0)
+            for column, name in enumerate(self.names, 2):
+                self._mutable(group, column).append(row.get(name))
+            self.rows += 1
+            return rid
+
+    def read(self, rid: int) -> Optional[tuple[int, int, Row]]:
+        with self.latch:
+            if not isinstance(rid, int) or not 0 <= rid < self.rows:
+                return None
+            group, offset = divmod(rid, self.group_rows)
+            xmin = self._chunk(group, XMIN)[offset]
+            if xmin == REMOVED:
+                return None
+            values = [self._chunk(group, column)[offset] for column in range(2, self.width)]
+            for column in range(2, self.width):
+                if self.typecodes[column] == "b" and values[column - 2] is not None:
+                    values[column - 2] = bool(values[column - 2])
+            return xmin, self._chunk(group, XMAX)[offset], make_row(self.layout, values)
+
+    def set_xmax(self, rid: int, xmax: int) -> None:
+        with self.latch:
+            self._check_rid(rid)
+            group, offset = divmod(rid, self.group_rows)
+            self._mutable(group, XMAX)[offset] = xmax
+
+    def delete(self, rid: int) -> None:
+        with self.latch:
+            self._check_rid(rid)
+            group, offset = divmod(rid, self.group_rows)
+            xmins = self._mutable(group, XMIN)
+            xmins[offset] = REMOVED
+            if self._sealed(group) and xmins.count(REMOVED) == len(xmins):
+                self._reclaim(group)
+
+    def scan(self, names: Optional[Sequence[str]] = None,
+             keep: Optional[Callable[[int, int], bool]] = None) -> Iterator[Group]:
+        # Group by group, the rows `keep(xmin, xmax)` accepts, with only the
+        # columns in `names` (all of them by default) read and decoded.
+        columns = [(name, self.names.index(name) + 2) for name in (self.names if names is None else names)]
+        for group in range(self._groups()):
+            with self.latch:
+                count = min(self.group_rows, self.rows - group * self.group_rows)
+                # Copied: deletes and rollbacks change them in place.
+                xmins, xmaxs = self._chunk(group, XMIN)[:count], self._chunk(group, XMAX)[:count]
+                kept = {pair: pair[0] != REMOVED and (keep is None or keep(*pair)) for pair in set(zip(xmins, xmaxs))}
+                if not any(kept.values()):
+                    continue
+                vectors = {name: self._head(group, column, count) for name, column in columns}
+            base = group * self.group_rows
+            if all(kept.values()):
+                yield range(base, base + count), xmins, xmaxs, vectors
+                continue
+            # Taken outside the latch: the vectors of sealed groups never
+            # change, and tail vectors were copied by _head.
+            selection = list(compress(range(count), map(kept.__getitem__, zip(xmins, xmaxs))))
+            yield ([base + i for i in selection], _take(xmins, selection), _take(xmaxs, selection),
+                   {name: _take(values, selection) for name, values in vectors.items()})
+
+    def records(self, keep: Optional[Callable[[int, int], bool]] = None) -> Iterator[tuple[int, int, int, Row]]:
+        for rids, xmins, xmaxs, vectors in self.scan(keep=keep):
+            columns = [map(bool, values) if isinstance(values, array) and values.typecode == "b" else values
+                       for values in vectors.values()]
+            for rid, xmin, xmax, values in zip(rids, xmins, xmaxs, zip(*columns) if columns else
+                                               ((),) * len(rids)):
+                yield rid, xmin, xmax, make_row(self.layout, values)
+
+    def vacuum(self, horizon: int, on_remove: Optional[Callable[[int, dict], None]] = None) -> int:
+        removed = 0
+        for group in range(self._groups()):
+            with self.latch:
+                count = min(self.group_rows, self.rows - group * self.group_rows)
+                xmaxs = self._head(group, XMAX, count)
+                if not any(xmaxs):
+                    continue
+                xmins = self._head(group, XMIN, count)
+                base = group * self.group_rows
+                for offset in [i for i in range(count) if xmaxs[i] and xmins[i] != REMOVED and xmaxs[i] < horizon]:
+                    if on_remove is not None:
+                        on_remove(base + offset, self.read(base + offset)[2])
+                    self.delete(base + offset)
+                    removed += 1
+        return removed
+
+    def count(self) -> int:
+        return sum(len(rids) for rids, _, _, _ in self.scan(names=()))
+
+    def write_pending(self) -> None:
+        # Encodes the chunks changed since the last call into their pages.
+        with self.latch:
+            if not self._pending:
+                return
+            grew = False
+            for (group, column), values in sorted(self._pending.items()):
+                slot = group * self.width + column
+                if slot >= len(self.directory):
+                    self.directory.extend([0] * (slot + 1 - len(self.directory)))
+                if not self.directory[slot]:
+                    self.directory[slot] = self._allocate()
+                    grew = True
+                encoding, flags, body = self._encode(column, values)
+                self._write_chained(self.directory[slot], self.CHUNK, (encoding, flags, len(values)), body)
+                self._chunks.put((group, column), values)
+            self._pending.clear()
+            if grew:
+                self._write_directory()
+            self._write_meta()
+
+    def truncate(self) -> None:
+        with self.latch:
+            self.buffer_pool.discard_file(self.file_manager, self.filename)
+            self.file_manager.truncate_file(self.filename)
+            self._chunks.clear()
+            self._pending.clear()
+            self._overflow.clear()
+            self._free_head, self.num_pages, self.rows, self.directory = 0, 1, 0, []
+            self._create_meta_page()
+            self._directory_page = self._allocate()
+            self._write_directory()
+            self._write_meta()
+
+    def flush(self) -> None:
+        self.write_pending()
+        self.buffer_pool.flush_file(self.file_manager, self.filename)
+
+    def _groups(self) -> int:
+        return -(-self.rows // self.group_rows)
+
+    def _sealed(self, group: int) -> bool:
+        # Full groups take no more rows.
+        return (group + 1) * self.group_rows <= self.rows
+
+    def _chunk(self, group: int, column: int) -> Sequence:
+        key = (group, column)
+        values = self._pending.get(key)
+        if values is None:
+            values = self._chunks.get(key)
+        if values is None:
+            slot = group * self.width + column
+            page_id = self.directory[slot] if slot < len(self.directory) else 0
+            values = self._decode(column, page_id) if page_id else []
+            self._chunks.put(key, values)
+        return values
+
+    def _head(self, group: int, column: int, count: int) -> Sequence:
+        # The chunk as of now: the tail group's chunks keep growing, so they
+        # are copied.
+        values = self._chunk(group, column)
+        return values[:count] if not self._sealed(group) or len(values) > count else values
+
+    def _mutable(self, group: int, column: int) -> list:
+        key = (group, column)
+        values = self._pending.get(key)
+        if values is None:
+            values = self._chunk(group, column)
+            if not isinstance(values, list):
+                values = [bool(v) for v in values] if self.typecodes[column] == "b" else values.tolist()
+            self._chunks.pop(key)
+            self._pending[key] = values
+        return values
+
+    def _reclaim(self, group: int) -> None:
+        # Every row of the group is removed: only its xmin chunk, which says
+        # so, is kept.
+        for column in range(1, self.width):
+            slot = group * self.width + column
+            self._pending.pop((group, column), None)
+            self._chunks.pop((group, column))
+            if slot < len(self.directory) and self.directory[slot]:
+                self._release_chained(self.directory[slot])
+                self.directory[slot] = 0
+        self._write_directory()
+
+    def _check_rid(self, rid: int) -> None:
+        if self.read(rid) is None:
+            raise RecordNotFoundError(f"No record at {rid} in {self.filename}")
+
+    def _encode(self, column: int, values: list) -> tuple[int, int, bytes]:
+        typecode = self.typecodes[column]
+        nulls = None in values
+        mask = bytes(v is None for v in values) if nulls else b""
+        if typecode is not None:
+            try:
+                packed = array(typecode, [0 if v is None else v for v in values] if nulls else values)
+                return PLAIN, nulls, mask + packed.tobytes()
+            except (OverflowError, TypeError):
+                pass
+        elif all(v is None or type(v) is str for v in values):
+            distinct = dict.fromkeys(v for v in values if v is not None)
+            if len(distinct) * 2 <= len(values):
+                codes = {value: code for code, value in enumerate(distinct)}
+                codes[None] = -1
+                return DICTIONARY, False, (_LEN.pack(len(distinct)) + _pack_strings(list(distinct))
+                                           + array("i", map(codes.__getitem__, values)).tobytes())
+            return OFFSETS, nulls, mask + _pack_strings(["" if v is None else v for v in values])
+        codec, data = encode_list(values)
+        return TAGGED, codec, data
+
+    def _decode(self, column: int, page_id: int) -> Sequence:
+        # Columns without NULLs of a fixed-width type come back as arrays,
+        # which the vectorized operators take as they are; the rest as lists.
+        (encoding, flags, count), body = self._read_chained(page_id, self.CHUNK)
+        if encoding == PLAIN:
+            values = array(self.typecodes[column])
+            values.frombytes(body[count:] if flags else body)
+            if not flags:
+                return values
+            if values.typecode == "b":
+                return [None if null else bool(v) for null, v in zip(body[:count], values)]
+            return [None if null else v for null, v in zip(body[:count], values)]
+        if encoding == DICTIONARY:
+            size = _LEN.unpack_from(body, 0)[0]
+            distinct, end = _unpack_strings(body, _LEN.size, size)
+            codes = array("i")
+            codes.frombytes(body[end:])
+            # Code -1, a NULL, picks the None on the end.
+            return list(map((distinct + [None]).__getitem__, codes))
+        if encoding == OFFSETS:
+            strings, _ = _unpack_strings(body, count if flags else 0, count)
+            if flags:
+                return [None if null else s for null, s in zip(body[:count], strings)]
+            return strings
+        if encoding == TAGGED:
+            return decode_list(flags, body, count)
+        raise StorageError(f"Corrupt column chunk on page {page_id} of {self.filename}")
+
+    def _write_directory(self) -> None:
+        self._write_chained(self._directory_page, self.DIRECTORY, (), array("I", self.directory).tobytes())
+
+    def _write_meta(self) -> None:
+        self._write_meta_record(self.READY, self._free_head, self.num_pages, self.rows, self.group_rows,
+                                self._directory_page)
+
+
+def _take(values: Sequence, selection: list[int]) -> Sequence:
+    kept = map(values.__getitem__, selection)
+    return array(values.typecode, kept) if isinstance(values, array) else list(kept)
+
+
+def _pack_strings(strings: list[str]) -> bytes:
+    # An offset per string and one past the last, then the UTF-8 bytes.
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    total = 0
+    for data in encoded:
+        total += len(data)
+        offsets.append(total)
+    return offsets.tobytes() + b"".join(encoded)
+
+
+def _unpack_strings(body: bytes | memoryview, start: int, count: int) -> tuple[list[str], int]:
+    offsets = array("I")
+    offsets.frombytes(body[start:start + 4 * (count + 1)])
+    blob = start + 4 * (count + 1)
+    strings = [str(body[blob + offsets[i]:blob + offsets[i + 1]], "utf-8") for i in range(count)]
+    return strings, blob + offsets[count]
@@ -1,12 +1,24 @@
+import mmap
+import os
+import threading
 from pathlib import Path
 from typing import Union
 from minisql.utils.exceptions import FileManagerError
 from minisql.config.settings import DEFAULT_ENCODING, DEFAULT_FILE_MODE, BUFFER_SIZE
 
+_POSITIONAL = hasattr(os, "pread")
+
 class FileManager:
     def __init__(self, base_dir: Union[str, Path]):
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._handles = {}
+        # Read-only maps of files, as views: slices of them are reads that
+        # neither copy nor call into the OS once the pages are cached.
+        self._maps: dict[str, memoryview] = {}
+        # Positional reads and writes need no shared file offset, so threads
+        # can read pages at once; without them seek+read is serialized.
+        self._lock = threading.Lock()
 
     def read_file(self, filename: str, mode: str = DEFAULT_FILE_MODE) -> bytes:
         path = self.base_dir / filename
@@ -18,7 +30,16 @@ class FileManager:
         except Exception as e:
             raise FileManagerError(f"Failed to read file {filename}: {e}")
 
+    def view_file(self, filename: str) -> memoryview:
+        # The whole file without copying it. Like every view handed out here
+        # it reads what is in the file now, and must not be used after the
+        # file is truncated or deleted.
+        if not self.exists(filename):
+            raise FileManagerError(f"File not found: {filename}")
+        return self._map(filename, (self.base_dir / filename).stat().st_size)
+
     def write_file(self, filename: str, data: bytes, mode: str = "wb") -> None:
+        self._unmap(filename)
         path = self.base_dir / filename
         try:
             with open(path, mode) as f:
@@ -33,6 +54,7 @@ class FileManager:
         return (self.base_dir / filename).exists()
 
     def delete_file(self, filename: str) -> None:
+        self.close_file(filename)
         path = self.base_dir / filename
         if path.exists():
             try:
@@ -42,3 +64,114 @@ class FileManager:
 
     def list_files(self) -> list[str]:
         return [f.name for f in self.base_dir.iterdir() if f.is_file()]
+
+    def page_count(self, filename: str, page_size: int = BUFFER_SIZE) -> int:
+        path = self.base_dir / filename
+        if not path.exists():
+            return 0
+        return path.stat().st_size // page_size
+
+    def read_page(self, filename: str, page_no: int, page_size: int = BUFFER_SIZE) -> bytes:
+        f = self._handle(filename)
+        try:
+            if _POSITIONAL:
+                data = os.pread(f.fileno(), page_size, page_no * page_size)
+            else:
+                with self._lock:
+                    f.seek(page_no * page_size)
+                    data = f.read(page_size)
+        except Exception as e:
+            raise FileManagerError(f"Failed to read page {page_no} of {filename}: {e}")
+        if len(data) != page_size:
+            raise FileManagerError(f"Short read on page {page_no} of {filename}")
+        return data
+
+    def view_page(self, filename: str, page_no: int, page_size: int = BUFFER_SIZE) -> memoryview:
+        # read_page() without the copy, for callers that copy what they keep.
+        start = page_no * page_size
+        view = self._map(filename, start + page_size)
+        if len(view) < start + page_size:
+            raise FileManagerError(f"Short read on page {page_no} of {filename}")
+        return view[start:start + page_size]
+
+    def write_page(self, filename: str, page_no: int, data: bytes, page_size: int = BUFFER_SIZE) -> None:
+        if len(data) != page_size:
+            raise FileManagerError(f"Page {page_no} of {filename} has {len(data)} bytes, expected {page_size}")
+        f = self._handle(filename)
+        try:
+            if _POSITIONAL:
+                os.pwrite(f.fileno(), data, page_no * page_size)
+            else:
+                with self._lock:
+                    f.seek(page_no * page_size)
+                    f.write(data)
+        except Exception as e:
+            raise FileManagerError(f"Failed to write page {page_no} of {filename}: {e}")
+
+    def truncate_file(self, filename: str, size: int = 0) -> None:
+        f = self._handle(filename)
+        self._unmap(filename)
+        try:
+            f.truncate(size)
+        except Exception as e:
+            raise FileManagerError(f"Failed to truncate file {filename}: {e}")
+
+    def flush_file(self, filename: str) -> None:
+        f = self._handles.get(filename)
+        if f is not None:
+            f.flush()
+
+    def sync(self) -> None:
+        for f in self._handles.values():
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close_file(self, filename: str) -> None:
+        self._unmap(filename)
+        f = self._handles.pop(filename, None)
+        if f is not None:
+            f.close()
+
+    def close(self) -> None:
+        for filename in list(self._handles):
+            self.close_file(filename)
+
+    def _map(self, filename: str, size: int) -> memoryview:
+        # The file's map, remapped when it is shorter than `size` bytes.
+        view = self._maps.get(filename)
+        if view is not None and len(view) >= size:
+            return view
+        f = self._handle(filename)
+        with self._lock:
+            view = self._maps.get(filename)
+            if view is None or len(view) < size:
+                length = os.fstat(f.fileno()).st_size
+                if not length:
+                    return memoryview(b"")
+                try:
+                    view = memoryview(mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ))
+                except Exception as e:
+                    raise FileManagerError(f"Failed to map file {filename}: {e}")
+                self._maps[filename] = view
+        return view
+
+    def _unmap(self, filename: str) -> None:
+        # Views still held keep the old map alive until they are dropped.
+        with self._lock:
+            self._maps.pop(filename, None)
+
+    def _handle(self, filename: str):
+        f = self._handles.get(filename)
+        if f is None:
+            with self._lock:
+                f = self._handles.get(filename)
+                if f is None:
+                    path = self.base_dir / filename
+                    try:
+                        if not path.exists():
+                            path.touch()
+                        f = open(path, "r+b")
+                    except Exception as e:
+                        raise FileManagerError(f"Failed to open file {filename}: {e}")
+                    self._handles[filename] = f
+        return f
@@ -0,0 +1,129 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from minisql.cache.buffer_pool import BufferPool
+from minisql.storage.file_manager import FileManager
+from minisql.storage.page import Page, PAGE_SIZE
+from minisql.utils.exceptions import RecordNotFoundError
+
+RID = tuple[int, int]
+
+# Pages with at least this much free space are reconsidered for inserts.
+FREE_SPACE_THRESHOLD = PAGE_SIZE // 4
+
+
+class HeapFile:
+    def __init__(self, file_manager: FileManager, filename: str, buffer_pool: Optional[BufferPool] = None):
+        self.file_manager = file_manager
+        self.filename = filename
+        self.buffer_pool = buffer_pool or BufferPool()
+        self.num_pages = file_manager.page_count(filename, PAGE_SIZE)
+        self._free_pages: set[int] = set()
+        self._insert_page = self.num_pages - 1
+        # Held across each change to the file and each page read, so readers
+        # never see a page half-way through a change. Callers hold it to
+        # make several calls one step.
+        self.latch = threading.RLock()
+
+    @contextmanager
+    def page(self, page_id: int, dirty: bool = False) -> Iterator[Page]:
+        page = self.buffer_pool.fetch_page(self.file_manager, self.filename, page_id)
+        try:
+            yield page
+        finally:
+            self.buffer_pool.unpin_page(self.file_manager, self.filename, page_id, dirty)
+        if dirty:
+            self._track_free_space(page)
+
+    def insert(self, record: bytes) -> RID:
+        with self.latch:
+            return self._insert(record)
+
+    def _insert(self, record: bytes) -> RID:
+        for page_id in self._candidate_pages():
+            page = self.buffer_pool.fetch_page(self.file_manager, self.filename, page_id)
+            slot = None
+            try:
+                slot = page.insert(record)
+            finally:
+                self.buffer_pool.unpin_page(self.file_manager, self.filename, page_id, dirty=slot is not None)
+            self._track_free_space(page)
+            if slot is not None:
+                self._insert_page = page_id
+                return page_id, slot
+
+        page_id = self.num_pages
+        page = self.buffer_pool.new_page(self.file_manager, self.filename, page_id)
+        self.num_pages += 1
+        try:
+            slot = page.insert(record)
+        finally:
+            self.buffer_pool.unpin_page(self.file_manager, self.filename, page_id, dirty=True)
+        self._track_free_space(page)
+        self._insert_page = page_id
+        return page_id, slot
+
+    def read(self, rid: RID) -> Optional[bytes]:
+        page_id, slot = rid
+        if page_id >= self.num_pages:
+            return None
+        with self.latch, self.page(page_id) as page:
+            return page.get(slot)
+
+    def update(self, rid: RID, record: bytes) -> RID:
+        page_id, slot = rid
+        with self.latch:
+            self._check_rid(rid)
+            with self.page(page_id, dirty=True) as page:
+                if page.update(slot, record):
+                    return rid
+                page.delete(slot)
+            return self._insert(record)
+
+    def delete(self, rid: RID) -> None:
+        with self.latch:
+            self._check_rid(rid)
+            with self.page(rid[0], dirty=True) as page:
+                page.delete(rid[1])
+
+    def scan(self) -> Iterator[tuple[RID, memoryview]]:
+        for page_id in range(self.num_pages):
+            with self.latch, self.page(page_id) as page:
+                records = list(page.views(frozen=True))
+            for slot, record in records:
+                yield (page_id, slot), record
+
+    def count(self) -> int:
+        total = 0
+        for page_id in range(self.num_pages):
+            with self.latch, self.page(page_id) as page:
+                total += sum(1 for _ in page.views())
+        return total
+
+    def truncate(self) -> None:
+        with self.latch:
+            self.buffer_pool.discard_file(self.file_manager, self.filename)
+            self.file_manager.truncate_file(self.filename)
+            self.num_pages = 0
+            self._free_pages.clear()
+            self._insert_page = -1
+
+    def flush(self) -> None:
+        self.buffer_pool.flush_file(self.file_manager, self.filename)
+
+    def _check_rid(self, rid: RID) -> None:
+        if self.read(rid) is None:
+            raise RecordNotFoundError(f"No record at {rid} in {self.filename}")
+
+    def _candidate_pages(self) -> Iterator[int]:
+        if self._insert_page >= 0:
+            yield self._insert_page
+        for page_id in list(self._free_pages):
+            if page_id != self._insert_page:
+                yield page_id
+
+    def _track_free_space(self, page: Page) -> None:
+        if page.free_space() >= FREE_SPACE_THRESHOLD:
+            self._free_pages.add(page.page_id)
+        else:
+            self._free_pages.discard(page.page_id)
@@ -0,0 +1,176 @@
+import struct
+from typing import Iterator, Optional
+from minisql.config.settings import BUFFER_SIZE, MAX_RECORD_SIZE
+from minisql.utils.exceptions import StorageError
+
+PAGE_SIZE = BUFFER_SIZE
+
+
+class Page:
+    # Header: slot count, end of the slot directory, start of the record area.
+    HEADER = struct.Struct("<HHH")
+    # Slot: record offset and length. Offset 0 marks an empty slot.
+    SLOT = struct.Struct("<HH")
+
+    def __init__(self, page_id: int, data: Optional[bytes] = None):
+        self.page_id = page_id
+        if data is None:
+            self.data = bytearray(PAGE_SIZE)
+            self._set_header(0, self.HEADER.size, PAGE_SIZE)
+        else:
+            if len(data) != PAGE_SIZE:
+                raise StorageError(f"Page {page_id} has size {len(data)}, expected {PAGE_SIZE}")
+            self.data = bytearray(data)
+            if self.HEADER.unpack_from(self.data, 0)[2] == 0:
+                # Never-written pages read back as zeros.
+                self._set_header(0, self.HEADER.size, PAGE_SIZE)
+        # Never resized, so a view can be kept for slicing records out.
+        self.view = memoryview(self.data)
+        self._live_bytes = 0
+        self._empty_slots = 0
+        for offset, length in self._slots(include_empty=True):
+            if offset:
+                self._live_bytes += length
+            else:
+                self._empty_slots += 1
+
+    @property
+    def slot_count(self) -> int:
+        return self.HEADER.unpack_from(self.data, 0)[0]
+
+    def free_space(self) -> int:
+        free_start = self.HEADER.unpack_from(self.data, 0)[1]
+        return PAGE_SIZE - free_start - self._live_bytes
+
+    def insert(self, record: bytes) -> Optional[int]:
+        self._check_record(record)
+        slot = self._free_slot()
+        needed = len(record) + (self.SLOT.size if slot is None else 0)
+        if not self._reserve(needed):
+            return None
+
+        slot_count, free_start, free_end = self.HEADER.unpack_from(self.data, 0)
+        if slot is None:
+            slot = slot_count
+            slot_count += 1
+            free_start += self.SLOT.size
+        else:
+            self._empty_slots -= 1
+        offset = free_end - len(record)
+        self.data[offset:free_end] = record
+        self._set_header(slot_count, free_start, offset)
+        self._set_slot(slot, offset, len(record))
+        self._live_bytes += len(record)
+        return slot
+
+    def get(self, slot: int) -> Optional[bytes]:
+        if slot < 0 or slot >= self.slot_count:
+            return None
+        offset, length = self._get_slot(slot)
+        if offset == 0:
+            return None
+        return bytes(self.view[offset:offset + length])
+
+    def update(self, slot: int, record: bytes) -> bool:
+        self._check_record(record)
+        offset, length = self._get_slot(slot)
+        if offset == 0:
+            raise StorageError(f"Slot {slot} on page {self.page_id} is empty")
+        if len(record) <= length:
+            self.data[offset:offset + len(record)] = record
+            self._set_slot(slot, offset, len(record))
+            self._live_bytes += len(record) - length
+            return True
+
+        self._set_slot(slot, 0, 0)
+        self._live_bytes -= length
+        if not self._reserve(len(record)):
+            self._set_slot(slot, offset, length)
+            self._live_bytes += length
+            return False
+        slot_count, free_start, free_end = self.HEADER.unpack_from(self.data, 0)
+        offset = free_end - len(record)
+        self.data[offset:free_end] = record
+        self._set_header(slot_count, free_start, offset)
+        self._set_slot(slot, offset, len(record))
+        self._live_bytes += len(record)
+        return True
+
+    def delete(self, slot: int) -> None:
+        offset, length = self._get_slot(slot)
+        if offset == 0:
+            raise StorageError(f"Slot {slot} on page {self.page_id} is empty")
+        self._set_slot(slot, 0, 0)
+        self._live_bytes -= length
+        self._empty_slots += 1
+
+        slot_count, free_start, free_end = self.HEADER.unpack_from(self.data, 0)
+        while slot_count and self._get_slot(slot_count - 1)[0] == 0:
+            slot_count -= 1
+            free_start -= self.SLOT.size
+            self._empty_slots -= 1
+        self._set_header(slot_count, free_start, free_end)
+
+    def records(self) -> Iterator[tuple[int, bytes]]:
+        for slot, record in self.views():
+            yield slot, bytes(record)
+
+    def views(self, frozen: bool = False) -> Iterator[tuple[int, memoryview]]:
+        # The records without a copy of each: views into the page, which
+        # change with it, or with `frozen` into one copy of the page as it is.
+        view = memoryview(bytes(self.data)) if frozen else self.view
+        directory = view[self.HEADER.size:self.HEADER.size + self.slot_count * self.SLOT.size]
+        for slot, (offset, length) in enumerate(self.SLOT.iter_unpack(directory)):
+            if offset:
+                yield slot, view[offset:offset + length]
+
+    def compact(self) -> None:
+        slot_count, free_start, _ = self.HEADER.unpack_from(self.data, 0)
+        live = [(slot, self.get(slot)) for slot in range(slot_count)]
+        free_end = PAGE_SIZE
+        for slot, record in live:
+            if record is None:
+                continue
+            free_end -= len(record)
+            self.data[free_end:free_end + len(record)] = record
+            self._set_slot(slot, free_end, len(record))
+        self.data[free_start:free_end] = bytes(free_end - free_start)
+        self._set_header(slot_count, free_start, free_end)
+
+    def _reserve(self, needed: int) -> bool:
+        _, free_start, free_end = self.HEADER.unpack_from(self.data, 0)
+        if free_end - free_start >= needed:
+            return True
+        if self.free_space() < needed:
+            return False
+        self.compact()
+        return True
+
+    def _free_slot(self) -> Optional[int]:
+        if not self._empty_slots:
+            return None
+        for slot, (offset, _) in enumerate(self._slots(include_empty=True)):
+            if offset == 0:
+                return slot
+        return None
+
+    def _slots(self, include_empty: bool = False) -> Iterator[tuple[int, int]]:
+        for slot in range(self.slot_count):
+            offset, length = self._get_slot(slot)
+            if offset or include_empty:
+                yield offset, length
+
+    def _check_record(self, record: bytes) -> None:
+        if not record:
+            raise StorageError("Cannot store an empty record")
+        if len(record) > MAX_RECORD_SIZE:
+            raise StorageError(f"Record of {len(record)} bytes exceeds MAX_RECORD_SIZE ({MAX_RECORD_SIZE})")
+
+    def _get_slot(self, slot: int) -> tuple[int, int]:
+        return self.SLOT.unpack_from(self.data, self.HEADER.size + slot * self.SLOT.size)
+
+    def _set_slot(self, slot: int, offset: int, length: int) -> None:
+        self.SLOT.pack_into(self.data, self.HEADER.size + slot * self.SLOT.size, offset, length)
+
+    def _set_header(self, slot_count: int, free_start: int, free_end: int) -> None:
+        self.HEADER.pack_into(self.data, 0, slot_count, free_start, free_end)
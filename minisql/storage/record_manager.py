@@ -1,52 +1,226 @@
 import os
 import json
+import threading
+from typing import Optional
+from minisql.config.settings import RECORD_COMPACT_INTERVAL, RECORD_COMPACT_MIN_GARBAGE, RECORD_LOG_FSYNC
+
+
+class TableLog:
+    # A table as replayed from its log: live rows by record id, in the order
+    # they were first inserted, and how much of the file has been read.
+    def __init__(self):
+        self.rows: dict[int, dict] = {}
+        self.next_id = 0
+        # Lines compaction would drop: replaced versions and deletes.
+        self.garbage = 0
+        self.offset = 0
+        self.inode: Optional[int] = None
+
 
 class RecordManager:
-    def __init__(self, base_path="data"):
+    # Each table is an append-only NDJSON log: [id, row] writes a row or a
+    # new version of one, [id] deletes it. Writes append a line per row and
+    # never rewrite the file; compaction, in the background, rewrites a log
+    # down to its live rows once most of it is garbage.
+    def __init__(self, base_path="data", sync: bool = RECORD_LOG_FSYNC,
+                 compact_interval: Optional[float] = RECORD_COMPACT_INTERVAL,
+                 min_garbage: int = RECORD_COMPACT_MIN_GARBAGE):
         self.base_path = base_path
         os.makedirs(self.base_path, exist_ok=True)
+        self.sync = sync
+        self.min_garbage = min_garbage
+        # (table, column) -> values already stored, built on first use so
+        # uniqueness checks are set lookups rather than scans.
+        self._keys = {}
+        self._logs: dict[str, TableLog] = {}
+        self._lock = threading.RLock()
+        # The compaction thread starts with the first update or delete, so a
+        # manager that only ever appends rows never has one; close() stops it.
+        self.compact_interval = compact_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
 
     def _table_path(self, table_name):
+        return os.path.join(self.base_path, f"{table_name}.log")
+
+    def _legacy_path(self, table_name):
+        # Tables written before the log format: one JSON array per file.
         return os.path.join(self.base_path, f"{table_name}.json")
 
-    def insert(self, table_name, row, primary_key_col=None):
-        rows = self.select_all(table_name)        
-        if primary_key_col and primary_key_col in row:
-            pk_value = row[primary_key_col]
-            if any(r.get(primary_key_col) == pk_value for r in rows):
-                raise ValueError(f"Integrity Error: Duplicate Primary Key '{pk_value}'")
+    def insert(self, table_name, row, primary_key_col=None, unique_cols=()):
+        self.insert_many(table_name, [row], primary_key_col, unique_cols)
+
+    def insert_many(self, table_name, new_rows, primary_key_col=None, unique_cols=()):
+        # All or nothing: checked as a batch, then appended in one write.
+        with self._lock:
+            log = self._log(table_name)
+            checked = ([primary_key_col] if primary_key_col else []) + list(unique_cols)
+            for column in checked:
+                keys = self._unique_keys(table_name, column, log.rows.values())
+                batch = set()
+                for row in new_rows:
+                    value = row.get(column)
+                    if value is not None and (value in keys or value in batch):
+                        kind = "Primary Key" if column == primary_key_col else f"Unique Key {column}"
+                        raise ValueError(f"Integrity Error: Duplicate {kind} '{value}'")
+                    batch.add(value)
 
-        rows.append(row)
-        self._write(table_name, rows)
+            self._append(table_name, log, [[log.next_id + i, dict(row)] for i, row in enumerate(new_rows)])
+            for column in checked:
+                self._keys[(table_name, column)].update(row[column] for row in new_rows if row.get(column) is not None)
 
     def select_all(self, table_name):
+        with self._lock:
+            return [dict(row) for row in self._log(table_name).rows.values()]
+
+    def update_where(self, table_name, predicate, new_values):
+        with self._lock:
+            self._forget_keys(table_name)
+            log = self._log(table_name)
+            versions = [[record_id, dict(row, **new_values)] for record_id, row in log.rows.items() if predicate(row)]
+            self._append(table_name, log, versions)
+            return len(versions)
+
+    def delete_where(self, table_name, predicate):
+        with self._lock:
+            self._forget_keys(table_name)
+            log = self._log(table_name)
+            tombstones = [[record_id] for record_id, row in log.rows.items() if predicate(row)]
+            self._append(table_name, log, tombstones)
+            return len(tombstones)
+
+    def compact(self, table_name) -> int:
+        # Rewrites the log with one line per live row; returns the lines dropped.
+        with self._lock:
+            log = self._log(table_name)
+            if not log.garbage:
+                return 0
+            path = self._table_path(table_name)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(_line([record_id, row]) for record_id, row in log.rows.items()))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            dropped, log.garbage = log.garbage, 0
+            stat = os.stat(path)
+            log.offset, log.inode = stat.st_size, stat.st_ino
+            return dropped
+
+    def compact_all(self) -> int:
+        dropped = 0
+        with self._lock:
+            for table_name, log in list(self._logs.items()):
+                if log.garbage >= max(self.min_garbage, len(log.rows)):
+                    dropped += self.compact(table_name)
+        return dropped
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _log(self, table_name) -> TableLog:
+        # The table's state, first reading whatever was appended to the log
+        # since last time, by this manager or another.
+        log = self._logs.get(table_name)
+        if log is None:
+            log = self._logs[table_name] = TableLog()
         path = self._table_path(table_name)
         if not os.path.exists(path):
-            return []
+            if os.path.exists(self._legacy_path(table_name)):
+                self._migrate(table_name, log)
+            elif log.inode is not None:
+                self._logs[table_name] = log = TableLog()
+                self._forget_keys(table_name)
+            return log
+        stat = os.stat(path)
+        if stat.st_ino != log.inode or stat.st_size < log.offset:
+            # Compacted or replaced under us: replay from the start.
+            self._logs[table_name] = log = TableLog()
+            self._forget_keys(table_name)
+            log.inode = stat.st_ino
+        if stat.st_size > log.offset:
+            with open(path, "rb") as f:
+                f.seek(log.offset)
+                data = f.read()
+            # A last line without its newline is a write cut short; it is
+            # not read, and the next append replaces it.
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    log.garbage += 1
+                    continue
+                _apply(log, entry)
+            log.offset += end
+        return log
+
+    def _append(self, table_name, log: TableLog, entries) -> None:
+        if not entries:
+            return
+        path = self._table_path(table_name)
+        with open(path, "ab") as f:
+            if f.tell() > log.offset:
+                f.truncate(log.offset)
+            f.write(b"".join(_line(entry) for entry in entries))
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+            log.offset = f.tell()
+        log.inode = os.stat(path).st_ino
+        for entry in entries:
+            _apply(log, entry)
+        if log.garbage and self._thread is None and self.compact_interval and not self._stop.is_set():
+            self._thread = threading.Thread(target=self._compact_loop, args=(self.compact_interval,),
+                                            name="minisql-compact", daemon=True)
+            self._thread.start()
+
+    def _migrate(self, table_name, log: TableLog) -> None:
+        legacy = self._legacy_path(table_name)
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(legacy, "r", encoding="utf-8") as f:
+                rows = json.load(f)
         except (json.JSONDecodeError, FileNotFoundError):
-            return []
+            rows = []
+        self._append(table_name, log, [[i, row] for i, row in enumerate(rows)])
+        os.remove(legacy)
 
-    def update_where(self, table_name, predicate, new_values):
-        rows = self.select_all(table_name)
-        updated_count = 0
-        for row in rows:
-            if predicate(row):
-                row.update(new_values)
-                updated_count += 1
-        self._write(table_name, rows)
-        return updated_count
+    def _compact_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.compact_all()
+            except OSError:
+                # Tried again next round.
+                pass
 
-    def delete_where(self, table_name, predicate):
-        rows = self.select_all(table_name)
-        new_rows = [r for r in rows if not predicate(r)]
-        deleted = len(rows) - len(new_rows)
-        self._write(table_name, new_rows)
-        return deleted
+    def _unique_keys(self, table_name, column, rows):
+        keys = self._keys.get((table_name, column))
+        if keys is None:
+            keys = self._keys[(table_name, column)] = {r[column] for r in rows if r.get(column) is not None}
+        return keys
 
-    def _write(self, table_name, rows):
-        path = self._table_path(table_name)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(rows, f, indent=2)
\ No newline at end of file
+    def _forget_keys(self, table_name):
+        for key in [k for k in self._keys if k[0] == table_name]:
+            del self._keys[key]
+
+
+def _line(entry) -> bytes:
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _apply(log: TableLog, entry) -> None:
+    record_id = entry[0]
+    if len(entry) > 1:
+        if record_id in log.rows:
+            log.garbage += 1
+        log.rows[record_id] = entry[1]
+        log.next_id = max(log.next_id, record_id + 1)
+    elif log.rows.pop(record_id, None) is not None:
+        # The delete and the version it removed.
+        log.garbage += 2
+    else:
+        log.garbage += 1
@@ -1,5 +1,8 @@
 import json
-from typing import Any
+import mmap
+from typing import Any, Optional
+from minisql.catalog.row import Row, as_dict
+from minisql.storage.row_codec import ROW_MAGIC, RowCodec
 from minisql.utils.exceptions import SerializationError
 from minisql.config.settings import DEFAULT_ENCODING
 
@@ -15,11 +18,24 @@ class Serializer:
     @staticmethod
     def deserialize(data: bytes) -> Any:
         try:
-            text = data.decode(DEFAULT_ENCODING)
-            return json.loads(text)
+            return json.loads(str(data, DEFAULT_ENCODING))
         except Exception as e:
             raise SerializationError(f"Deserialization failed: {e}")
 
+    @staticmethod
+    def serialize_row(row: dict, codec: Optional[RowCodec] = None) -> bytes:
+        # Binary against the table's schema when the row fits it, else JSON.
+        data = codec.encode(row) if codec is not None else None
+        return data if data is not None else Serializer.serialize(as_dict(row))
+
+    @staticmethod
+    def deserialize_row(data: bytes, codec: Optional[RowCodec] = None) -> Row | dict:
+        if data[:1] != bytes((ROW_MAGIC,)):
+            return Serializer.deserialize(data)
+        if codec is None:
+            raise SerializationError("Deserialization failed: a binary row needs its table's schema")
+        return codec.decode(data)
+
     @staticmethod
     def serialize_to_file(obj: Any, file_path: str) -> None:
         try:
@@ -31,7 +47,7 @@ class Serializer:
     @staticmethod
     def deserialize_from_file(file_path: str) -> Any:
         try:
-            with open(file_path, "rb") as f:
-                return Serializer.deserialize(f.read())
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return Serializer.deserialize(data)
         except Exception as e:
             raise SerializationError(f"Failed to read from file {file_path}: {e}")
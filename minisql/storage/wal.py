@@ -0,0 +1,189 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Union
+from minisql.config.settings import AUTO_COMMIT, GROUP_COMMIT_DELAY
+from minisql.utils.exceptions import StorageError
+
+
+class WriteAheadLog:
+    # Record header: crc32 of everything after it, payload length, lsn, record type.
+    HEADER = struct.Struct("<IIQB")
+    PAGE_HEADER = struct.Struct("<HI")
+    XID = struct.Struct("<Q")
+
+    PAGE = 1
+    COMMIT = 2
+    # A transaction id handed out; it precedes any page image holding it.
+    BEGIN = 3
+
+    def __init__(self, path: Union[str, Path], group_commit: bool = not AUTO_COMMIT,
+                 group_commit_delay: float = GROUP_COMMIT_DELAY):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.group_commit = group_commit
+        self.group_commit_delay = group_commit_delay
+        self.next_lsn = 1
+        for lsn, _, _ in self.records():
+            self.next_lsn = lsn + 1
+        self.durable_lsn = self.next_lsn - 1
+        self._file = open(self.path, "ab")
+        self._pending: list[bytes] = []
+        self._requested_lsn = 0
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        self.commits = 0
+        self.fsyncs = 0
+
+    def log_page(self, path: Union[str, Path], page_id: int, data: bytes) -> int:
+        name = os.path.relpath(path, self.path.parent).encode("utf-8")
+        payload = self.PAGE_HEADER.pack(len(name), page_id) + name + bytes(data)
+        with self._cond:
+            return self._append(self.PAGE, payload)
+
+    def begin(self, xid: int) -> int:
+        # Not flushed: a page holding the xid can only reach disk after a
+        # flush, which writes this record first.
+        with self._cond:
+            return self._append(self.BEGIN, self.XID.pack(xid))
+
+    def commit(self, xid: int = 0) -> int:
+        lsn = self.log_commit(xid)
+        self.wait(lsn)
+        return lsn
+
+    def log_commit(self, xid: int = 0) -> int:
+        # The COMMIT record, not yet on disk; wait() for that.
+        with self._cond:
+            lsn = self._append(self.COMMIT, self.XID.pack(xid) if xid else b"")
+            self.commits += 1
+            return lsn
+
+    def wait(self, lsn: int) -> None:
+        # Returns once the log is durable up to `lsn`.
+        if self.group_commit:
+            with self._cond:
+                if self.durable_lsn >= lsn:
+                    return
+                self._requested_lsn = max(self._requested_lsn, lsn)
+                self._start_flusher()
+                self._cond.notify_all()
+                while self.durable_lsn < lsn:
+                    self._cond.wait()
+            return
+        if self.durable_lsn < lsn:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._io_lock:
+            with self._cond:
+                chunk, lsn = b"".join(self._pending), self.next_lsn - 1
+                self._pending.clear()
+            if chunk:
+                self._file.write(chunk)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self.fsyncs += 1
+            with self._cond:
+                self.durable_lsn = max(self.durable_lsn, lsn)
+                self._cond.notify_all()
+
+    def size(self) -> int:
+        with self._cond:
+            return self._file.tell() + sum(len(record) for record in self._pending)
+
+    def records(self) -> Iterator[tuple[int, int, bytes]]:
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + self.HEADER.size <= len(data):
+            crc, length, lsn, kind = self.HEADER.unpack_from(data, offset)
+            end = offset + self.HEADER.size + length
+            if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc:
+                # A torn write at the tail marks the end of the usable log.
+                return
+            yield lsn, kind, data[offset + self.HEADER.size:end]
+            offset = end
+
+    def transactions(self) -> tuple[set[int], set[int]]:
+        # The xids begun and committed since the log was last truncated.
+        begun, committed = set(), set()
+        for _, kind, payload in self.records():
+            if kind in (self.BEGIN, self.COMMIT) and len(payload) == self.XID.size:
+                (begun if kind == self.BEGIN else committed).add(self.XID.unpack(payload)[0])
+        return begun, committed
+
+    def recover(self, apply_page: Optional[Callable[[Path, int, bytes], None]] = None) -> int:
+        apply_page = apply_page or self._write_page
+        applied = 0
+        for _, kind, payload in self.records():
+            if kind != self.PAGE:
+                continue
+            name_len, page_id = self.PAGE_HEADER.unpack_from(payload, 0)
+            start = self.PAGE_HEADER.size
+            name = payload[start:start + name_len].decode("utf-8")
+            apply_page(self.path.parent / name, page_id, payload[start + name_len:])
+            applied += 1
+        return applied
+
+    def truncate(self) -> None:
+        with self._io_lock:
+            with self._cond:
+                if self._pending:
+                    raise StorageError("Cannot truncate the log with unflushed records")
+                self._file.truncate(0)
+                self._file.seek(0)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._flusher is not None:
+            self._flusher.join()
+        self._file.close()
+
+    def _append(self, kind: int, payload: bytes) -> int:
+        if self._closed:
+            raise StorageError("Write-ahead log is closed")
+        lsn = self.next_lsn
+        self.next_lsn += 1
+        body = self.HEADER.pack(0, len(payload), lsn, kind)[4:] + payload
+        self._pending.append(struct.pack("<I", zlib.crc32(body)) + body)
+        return lsn
+
+    def _start_flusher(self) -> None:
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-group-commit", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._requested_lsn <= self.durable_lsn and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            if self.group_commit_delay:
+                # Give concurrent statements a chance to join this fsync.
+                time.sleep(self.group_commit_delay)
+            self.flush()
+
+    @staticmethod
+    def _write_page(path: Path, page_id: int, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        mode = "r+b" if path.exists() else "w+b"
+        with open(path, mode) as f:
+            f.seek(page_id * len(data))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
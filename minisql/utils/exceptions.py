@@ -27,3 +27,21 @@ class QueryParseError(MiniSQLError):
 
 class IndexError(MiniSQLError):
     pass
+
+class StorageError(MiniSQLError):
+    pass
+
+class QueryError(MiniSQLError):
+    pass
+
+class ConstraintError(QueryError):
+    pass
+
+class LockTimeoutError(MiniSQLError):
+    pass
+
+class TransactionError(QueryError):
+    pass
+
+class SerializationFailure(TransactionError):
+    pass
@@ -0,0 +1,60 @@
+import pytest
+from minisql.cache.buffer_pool import BufferPool, ClockReplacer
+from minisql.cache.lru_cache import LRUCache, LRUReplacer
+from minisql.storage.file_manager import FileManager
+from minisql.storage.heap_file import HeapFile
+from minisql.utils.exceptions import StorageError
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.parametrize("replacer_cls", [LRUReplacer, ClockReplacer])
+def test_replacers_skip_pinned_frames(replacer_cls):
+    replacer = replacer_cls(3)
+    for frame_id in range(3):
+        replacer.unpin(frame_id)
+    replacer.pin(0)
+
+    victims = {replacer.victim(), replacer.victim()}
+    assert victims == {1, 2}
+    assert replacer.victim() is None
+
+
+@pytest.mark.parametrize("policy", ["lru", "clock"])
+def test_buffer_pool_caps_resident_pages(tmp_path, policy):
+    pool = BufferPool(capacity=4, policy=policy)
+    heap = HeapFile(FileManager(tmp_path), "t.heap", pool)
+    rids = [heap.insert(b"x" * 1000) for _ in range(100)]
+    heap.flush()
+
+    assert heap.num_pages > 4
+    assert pool.stats()["resident"] <= 4
+    assert all(heap.read(rid) == b"x" * 1000 for rid in rids)
+    assert pool.evictions > 0
+
+
+def test_buffer_pool_counts_hits_and_refuses_when_all_pinned(tmp_path):
+    fm = FileManager(tmp_path)
+    pool = BufferPool(capacity=1)
+    pool.new_page(fm, "t.heap", 0)
+    pool.unpin_page(fm, "t.heap", 0, dirty=True)
+
+    pool.fetch_page(fm, "t.heap", 0)
+    assert pool.hits == 1
+    with pytest.raises(StorageError):
+        pool.new_page(fm, "t.heap", 1)
+
+    pool.unpin_page(fm, "t.heap", 0)
+    pool.flush_all()
+    assert pool.stats()["dirty"] == 0
+    assert fm.page_count("t.heap") == 1
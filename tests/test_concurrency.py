@@ -0,0 +1,252 @@
+import threading
+import time
+import pytest
+from minisql.cache.buffer_pool import BufferPool
+from minisql.catalog.table_manager import TableManager
+from minisql.concurrency.lock_manager import EXCLUSIVE, SHARED, LockManager
+from minisql.concurrency.mvcc import Session
+from minisql.concurrency.vacuum import Vacuum
+from minisql.index.index_manager import IndexManager
+from minisql.query.executer import QueryExecutor
+from minisql.storage.file_manager import FileManager
+from minisql.storage.heap_file import HeapFile
+from minisql.utils.exceptions import LockTimeoutError, SerializationFailure, TransactionError
+
+
+def in_thread(target):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(target()))
+    thread.start()
+    thread.join()
+    return result[0] if result else None
+
+
+def make_executor(path):
+    tm = TableManager(db_path=str(path / "data.db"))
+    return QueryExecutor(tm, IndexManager(path / "indices", tm.buffer_pool))
+
+
+def try_lock(locks, resource, mode):
+    try:
+        locks.acquire(resource, mode, timeout=0.01)
+    except LockTimeoutError:
+        return False
+    locks.release(resource)
+    return True
+
+
+def test_lock_manager_shares_reads_and_excludes_writes():
+    locks = LockManager()
+    locks.acquire("t", SHARED)
+    assert in_thread(lambda: try_lock(locks, "t", SHARED))
+    assert not in_thread(lambda: try_lock(locks, "t", EXCLUSIVE))
+
+    # Reentrant, and the sole reader may upgrade.
+    locks.acquire("t", SHARED)
+    locks.acquire("t", EXCLUSIVE)
+    assert locks.mode("t") == EXCLUSIVE
+    assert not in_thread(lambda: try_lock(locks, "t", SHARED))
+    for _ in range(3):
+        locks.release("t")
+    assert locks.mode("t") is None
+    assert in_thread(lambda: try_lock(locks, "t", EXCLUSIVE))
+    with pytest.raises(RuntimeError):
+        locks.release("t")
+
+
+def test_waiting_writer_holds_back_new_readers():
+    locks = LockManager()
+    locks.acquire("t", SHARED)
+    order = []
+
+    def writer():
+        with locks.hold({"t": EXCLUSIVE}):
+            order.append("writer")
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    while not locks.waits:
+        time.sleep(0.001)
+    assert not in_thread(lambda: try_lock(locks, "t", SHARED))
+    locks.release("t")
+    thread.join()
+    assert order == ["writer"]
+    assert in_thread(lambda: try_lock(locks, "t", SHARED))
+
+
+def test_buffer_pool_reads_each_missed_page_once(tmp_path):
+    fm = FileManager(tmp_path)
+    heap = HeapFile(fm, "t.tbl", BufferPool(capacity=4))
+    for i in range(200):
+        heap.insert(b"row-%03d" % i * 20)
+    heap.flush()
+
+    pool = BufferPool(capacity=16)
+    reader = HeapFile(fm, "t.tbl", pool)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(len(list(reader.scan())))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [200] * 8
+    assert pool.stats()["misses"] == reader.num_pages
+
+
+def test_concurrent_readers_and_writers_through_the_executor(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    executor.execute_sql("CREATE TABLE accounts (id INT PRIMARY KEY, balance INT)")
+    executor.execute_sql("CREATE TABLE audit (id INT PRIMARY KEY, note STRING)")
+    executor.bulk_insert("accounts", [(i, 100) for i in range(50)])
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(20):
+                executor.execute_sql("UPDATE accounts SET balance = ? WHERE id = ?", (i, worker))
+                executor.execute_sql("INSERT INTO audit (id, note) VALUES (?, 'moved')", (worker * 100 + i,))
+        except Exception as e:
+            errors.append(e)
+
+    def audit():
+        try:
+            for _ in range(20):
+                # Each statement sees whole updates, never a torn row.
+                rows = executor.execute_sql("SELECT id, balance FROM accounts")
+                assert len(rows) == 50 and all(isinstance(r["balance"], int) for r in rows)
+                assert executor.rowcount == -1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    threads += [threading.Thread(target=audit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert executor.execute_sql("SELECT SUM(balance) FROM accounts")[0]["sum(balance)"] == 46 * 100 + 4 * 19
+    assert executor.execute_sql("SELECT COUNT(*) FROM audit")[0]["count(*)"] == 80
+
+    # A cursor left open between fetches does not block writers.
+    cursor = executor.cursor("SELECT id FROM accounts")
+    assert cursor.fetchone() is not None
+    assert in_thread(lambda: executor.execute_sql("DELETE FROM audit WHERE id < 100")) == "Deleted 20 rows"
+    cursor.close()
+
+
+def test_transactions_read_their_snapshot_and_roll_back(tmp_path):
+    executor = make_executor(tmp_path)
+    executor.execute_sql("CREATE TABLE accounts (id INT PRIMARY KEY, balance INT)")
+    executor.bulk_insert("accounts", [(i, 100) for i in range(10)])
+    alice, bob = Session(), Session()
+
+    with executor.use_session(alice):
+        executor.execute_sql("BEGIN")
+        executor.execute_sql("UPDATE accounts SET balance = ? WHERE id = ?", (50, 1))
+        executor.execute_sql("INSERT INTO accounts (id, balance) VALUES (10, 1)")
+        assert executor.execute_sql("SELECT balance FROM accounts WHERE id = 1") == [{"balance": 50}]
+        with pytest.raises(TransactionError):
+            executor.execute_sql("CREATE INDEX by_balance ON accounts (balance)")
+    with executor.use_session(bob):
+        # Reads do not wait for alice's locks, and miss her uncommitted work.
+        executor.execute_sql("BEGIN")
+        assert executor.execute_sql("SELECT COUNT(*) FROM accounts")[0]["count(*)"] == 10
+        assert executor.execute_sql("SELECT balance FROM accounts WHERE id = 1") == [{"balance": 100}]
+    with executor.use_session(alice):
+        assert executor.execute_sql("COMMIT") == "Transaction committed"
+
+    with executor.use_session(bob):
+        # Bob's snapshot predates alice's commit, so he may not overwrite her row.
+        assert executor.execute_sql("SELECT balance FROM accounts WHERE id = 1") == [{"balance": 100}]
+        with pytest.raises(SerializationFailure):
+            executor.execute_sql("UPDATE accounts SET balance = ? WHERE id = ?", (0, 1))
+        executor.execute_sql("DELETE FROM accounts WHERE id = 2")
+        executor.execute_sql("ROLLBACK")
+    assert executor.execute_sql("SELECT id, balance FROM accounts WHERE id <= 2 ORDER BY id") == \
+        [{"id": 0, "balance": 100}, {"id": 1, "balance": 50}, {"id": 2, "balance": 100}]
+    assert executor.execute_sql("SELECT COUNT(*) FROM accounts")[0]["count(*)"] == 11
+
+
+def test_open_cursors_keep_old_versions_until_vacuum(tmp_path):
+    executor = make_executor(tmp_path)
+    executor.execute_sql("CREATE TABLE items (id INT PRIMARY KEY, qty INT)")
+    executor.bulk_insert("items", [(i, 1) for i in range(200)])
+
+    cursor = executor.cursor("SELECT id, qty FROM items WHERE id >= 0 ORDER BY id")
+    assert cursor.fetchone() == {"id": 0, "qty": 1}
+    in_thread(lambda: executor.execute_sql("UPDATE items SET qty = ?", (2,)))
+    in_thread(lambda: executor.execute_sql("DELETE FROM items WHERE id >= 100"))
+    assert executor.execute_sql("SELECT COUNT(*) FROM items WHERE qty = 2")[0]["count(*)"] == 100
+    assert len(list(executor.index_manager.lookup("items.id", 5))) == 2
+
+    # Vacuum leaves what an open snapshot can still see.
+    vacuum = Vacuum(executor, min_dead=1)
+    assert executor.dead_versions["items"] == 300
+    assert vacuum.run_once() == 0
+    rest = cursor.fetchall()
+    assert len(rest) == 199 and {row["qty"] for row in rest} == {1}
+    assert vacuum.run_once() == 300
+    assert executor.dead_versions == {}
+    assert len(list(executor.index_manager.lookup("items.id", 5))) == 1
+    assert executor.execute_sql("SELECT qty FROM items WHERE id = 5") == [{"qty": 2}]
+    assert executor.execute_sql("SELECT COUNT(*) FROM items")[0]["count(*)"] == 100
+
+
+def test_recovery_undoes_transactions_cut_off_by_a_crash(tmp_path):
+    executor = make_executor(tmp_path)
+    executor.execute_sql("CREATE TABLE t (id INT PRIMARY KEY, v INT)")
+    executor.execute_sql("INSERT INTO t (id, v) VALUES (1, 1)")
+    executor.begin()
+    executor.execute_sql("UPDATE t SET v = ? WHERE id = ?", (2, 1))
+    executor.execute_sql("INSERT INTO t (id, v) VALUES (2, 2)")
+    executor.table_manager.checkpoint()
+    executor.execute_sql("DELETE FROM t WHERE id = 1")
+    executor.table_manager.buffer_pool.log_dirty_pages()
+
+    # Reopened without closing, as after a crash.
+    reopened = make_executor(tmp_path)
+    assert reopened.execute_sql("SELECT id, v FROM t") == [{"id": 1, "v": 1}]
+    reopened.execute_sql("INSERT INTO t (id, v) VALUES (2, 3)")
+    assert reopened.table_manager.transactions.next_xid > executor.table_manager.transactions.next_xid
+
+
+def test_commit_that_triggers_a_checkpoint_survives_a_crash(tmp_path, monkeypatch):
+    from minisql.catalog import table_manager
+    executor = make_executor(tmp_path)
+    executor.execute_sql("CREATE TABLE t (id INT PRIMARY KEY)")
+    monkeypatch.setattr(table_manager, "WAL_CHECKPOINT_BYTES", 1)
+    executor.execute_sql("INSERT INTO t (id) VALUES (1)")
+    session = Session()
+    with executor.use_session(session):
+        executor.begin()
+        executor.execute_sql("INSERT INTO t (id) VALUES (2)")
+    # The commit's own checkpoint, and one from another commit while it is
+    # logged but not yet finished, must both count it as committed.
+    executor.table_manager.log_commit(session.transaction.xid)
+    executor.table_manager.checkpoint()
+    assert executor.table_manager.wal.size() == 0
+
+    reopened = make_executor(tmp_path)
+    assert reopened.execute_sql("SELECT id FROM t ORDER BY id") == [{"id": 1}, {"id": 2}]
+
+
+def test_concurrent_commits_share_fsyncs(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"), auto_commit=False)
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    for t in range(8):
+        executor.execute_sql(f"CREATE TABLE t{t} (id INT PRIMARY KEY)")
+    commits, fsyncs = tm.wal.commits, tm.wal.fsyncs
+
+    def insert(t):
+        for i in range(20):
+            executor.execute_sql(f"INSERT INTO t{t} (id) VALUES ({i})")
+
+    threads = [threading.Thread(target=insert, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tm.wal.commits - commits == 160
+    assert tm.wal.fsyncs - fsyncs < tm.wal.commits - commits
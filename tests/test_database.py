@@ -0,0 +1,133 @@
+import threading
+import pytest
+import minisql
+from minisql import database
+
+
+def test_connect_executes_and_fetches_through_pep249_cursors(tmp_path):
+    with minisql.connect(tmp_path) as connection:
+        cursor = connection.cursor()
+        cursor.execute("CREATE TABLE users (id INT PRIMARY KEY, name STRING, age INT)")
+        cursor.executemany("INSERT INTO users (id, name, age) VALUES (?, ?, ?)",
+                           [(1, "Alice", 25), (2, "Bob", 35), (3, "Carol", None)])
+        assert cursor.rowcount == 3
+
+        cursor.execute("SELECT name, age FROM users WHERE age > ? ORDER BY age", (20,))
+        assert [column[0] for column in cursor.description] == ["name", "age"]
+        assert cursor.description[1][1] == minisql.NUMBER
+        assert cursor.fetchone() == ("Alice", 25)
+        assert cursor.fetchall() == [("Bob", 35)]
+        assert cursor.fetchone() is None
+
+        cursor.execute("SELECT * FROM users ORDER BY id")
+        cursor.arraysize = 2
+        assert cursor.fetchmany() == [(1, "Alice", 25), (2, "Bob", 35)]
+        assert [row[0] for row in cursor] == [3]
+
+        cursor.execute("UPDATE users SET age = :age WHERE name = :name", {"age": 40, "name": "Carol"})
+        assert cursor.rowcount == 1 and cursor.description is None
+        with pytest.raises(minisql.IntegrityError, match="Duplicate entry '1'"):
+            cursor.execute("INSERT INTO users (id, name) VALUES (1, 'Again')")
+        with pytest.raises(minisql.ProgrammingError, match="does not exist"):
+            cursor.execute("SELECT * FROM missing")
+        with pytest.raises(minisql.ProgrammingError, match="No result set"):
+            cursor.fetchall()
+        connection.rollback()
+
+        # Without autocommit, changes stay private until commit().
+        connection.autocommit = False
+        cursor.execute("UPDATE users SET age = ? WHERE id = ?", (99, 1))
+        other = minisql.connect(tmp_path)
+        assert other.execute("SELECT age FROM users WHERE id = 1").fetchall() == [(25,)]
+        connection.rollback()
+        cursor.execute("DELETE FROM users WHERE id = ?", (2,))
+        connection.commit()
+        connection.autocommit = True
+        assert other.execute("SELECT id, age FROM users ORDER BY id").fetchall() == [(1, 25), (3, 40)]
+
+    assert minisql.connect(tmp_path / "data.db").engine is connection.engine
+    with pytest.raises(minisql.InterfaceError):
+        connection.cursor()
+    connection.engine.close()
+    assert minisql.connect(tmp_path).execute("SELECT age FROM users WHERE id = 3").fetchall() == [(40,)]
+
+
+def test_connection_pool_shares_the_engine_between_threads(tmp_path):
+    pool = database.ConnectionPool(tmp_path, size=2, timeout=5)
+    with pool.connection() as connection:
+        connection.execute("CREATE TABLE hits (id INT PRIMARY KEY, worker INT)")
+    errors = []
+
+    def work(worker):
+        try:
+            for i in range(25):
+                with pool.connection() as connection:
+                    connection.execute("INSERT INTO hits (id, worker) VALUES (?, ?)", (worker * 100 + i, worker))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    with pool.connection() as connection:
+        assert connection.engine is pool.engine
+        assert connection.execute("SELECT COUNT(*) FROM hits").fetchone() == (100,)
+
+    first = pool.acquire()
+    pool.acquire()
+    pool.timeout = 0.01
+    with pytest.raises(minisql.OperationalError, match="No free connection"):
+        pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.close()
+    pool.engine.close()
+
+
+def test_connection_pool_rolls_back_what_a_borrower_left_open(tmp_path):
+    pool = database.ConnectionPool(tmp_path, size=1, timeout=5)
+    with pool.connection() as connection:
+        connection.execute("CREATE TABLE t (id INT PRIMARY KEY)")
+    with pytest.raises(RuntimeError):
+        with pool.connection() as connection:
+            connection.execute("BEGIN")
+            connection.execute("INSERT INTO t (id) VALUES (1)")
+            raise RuntimeError("request failed")
+    with pool.connection() as connection:
+        assert connection.session.transaction is None
+        connection.execute("INSERT INTO t (id) VALUES (2)")
+        connection.commit()
+        assert connection.execute("SELECT id FROM t").fetchall() == [(2,)]
+    assert not minisql.connect(tmp_path, autocommit=False).autocommit
+    pool.close()
+    pool.engine.close()
+
+
+def test_concurrent_autocommit_updates_never_conflict(tmp_path):
+    connection = minisql.connect(tmp_path)
+    connection.execute("CREATE TABLE t (id INT PRIMARY KEY, v INT)")
+    connection.execute("INSERT INTO t (id, v) VALUES (1, 0)")
+    errors, updated = [], []
+
+    def work(worker):
+        # Each statement waits for the table lock and reads the row as the
+        # last one left it, so none of them fails to serialize.
+        own = minisql.connect(tmp_path)
+        try:
+            for i in range(1, 201):
+                updated.append(own.execute("UPDATE t SET v = ? WHERE id = 1", (worker * 1000 + i,)).rowcount)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert updated == [1] * 800
+    assert connection.execute("SELECT v FROM t WHERE id = 1").fetchone()[0] in (200, 1200, 2200, 3200)
+    connection.engine.close()
@@ -1,10 +1,17 @@
+import sys
 import tempfile
+import pytest
 from minisql.catalog.table_manager import TableManager
 from minisql.index.index_manager import IndexManager
 from minisql.query.executer import QueryExecutor
 from minisql.query.tokenizer import Tokenizer
 from minisql.query.parser import Parser
-from minisql.catalog.schema import Column
+from minisql.catalog.schema import Column, TableSchema
+from minisql.query.compiler import compile_predicate
+from minisql.query import operators
+from minisql.query.planner import explain
+from minisql.query.vectorized import Unbatch
+from minisql.utils.exceptions import MiniSQLError, QueryError
 
 
 def run_query(executor, query: str):
@@ -13,8 +20,8 @@ def run_query(executor, query: str):
     return executor.execute(ast)
 
 
-def test_executor_insert_select_update_delete():
-    tm = TableManager()
+def test_executor_insert_select_update_delete(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
     im = IndexManager()
     executor = QueryExecutor(tm, im)
 
@@ -42,3 +49,507 @@ def test_executor_insert_select_update_delete():
 
     result = run_query(executor, "SELECT id, name, age FROM users WHERE age > 20")
     assert len(result) == 0
+
+
+def test_compiled_predicate_uses_column_types():
+    schema = TableSchema("items", [Column("id", "INT", primary_key=True), Column("price", "FLOAT"), Column("label", "STRING")])
+    ast = Parser(Tokenizer("SELECT id FROM items WHERE price >= 2").tokenize()).parse()
+    predicate = compile_predicate(ast.children[2].value, schema)
+
+    assert predicate({"id": 1, "price": 2.5, "label": "x"})
+    assert not predicate({"id": 2, "price": 1.5, "label": "y"})
+    assert not predicate({"id": 3, "price": None, "label": "z"})
+
+
+def test_int_columns_reject_fractions_and_compare_them_numerically(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    rows = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    vectors = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool), vectorized=True)
+    rows.execute_sql("CREATE TABLE t (id INT PRIMARY KEY, a INT)")
+    rows.execute_sql("INSERT INTO t (id, a) VALUES (1, 2), (2, 3), (3.0, 4)")
+    with pytest.raises(QueryError, match="Invalid value 2.7"):
+        rows.execute_sql("INSERT INTO t (id, a) VALUES (9, 2.7)")
+    with pytest.raises(QueryError, match="Invalid value 3.9"):
+        rows.execute_sql("UPDATE t SET a = 3.9 WHERE id = 1")
+
+    for executor in (rows, vectors):
+        assert executor.execute_sql("SELECT id FROM t WHERE a = 2.5") == []
+        assert executor.execute_sql("SELECT id FROM t WHERE a >= 2.5 ORDER BY id") == [{"id": 2}, {"id": 3}]
+        assert executor.execute_sql("SELECT id FROM t WHERE a IN (2.5, 4)") == [{"id": 3}]
+        assert executor.execute_sql("SELECT id FROM t WHERE a BETWEEN 2.1 AND 3.9") == [{"id": 2}]
+        # Through the primary key index, with literals and parameters.
+        assert executor.execute_sql("SELECT a FROM t WHERE id = 1.5") == []
+        assert executor.execute_sql("SELECT a FROM t WHERE id < ? ORDER BY a", (2.5,)) == [{"a": 2}, {"a": 3}]
+        assert executor.execute_sql("SELECT a FROM t WHERE id = 3.0") == [{"a": 4}]
+
+
+def test_where_value_containing_operator(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    tm.create_table("notes", [Column("id", "INT", primary_key=True), Column("body", "STRING")])
+    run_query(executor, "INSERT INTO notes (id, body) VALUES (1, 'x>=y')")
+    run_query(executor, "INSERT INTO notes (id, body) VALUES (2, 'plain')")
+
+    result = run_query(executor, "SELECT id FROM notes WHERE body = 'x>=y'")
+    assert result == [{"id": 1}]
+
+
+def test_compound_predicates_follow_sql_null_semantics(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    tm.create_table("users", [Column("id", "INT", primary_key=True), Column("name", "STRING"), Column("age", "INT")])
+    run_query(executor, "INSERT INTO users (id, name, age) VALUES (1, 'Alice', 25)")
+    run_query(executor, "INSERT INTO users (id, name, age) VALUES (2, 'Bob', 35)")
+    run_query(executor, "INSERT INTO users (id, name) VALUES (3, 'Carol')")
+
+    def ids(where):
+        return sorted(r["id"] for r in run_query(executor, f"SELECT id FROM users WHERE {where}"))
+
+    assert ids("age BETWEEN 20 AND 30 OR name = 'Bob'") == [1, 2]
+    assert ids("NOT (age > 30)") == [1]
+    assert ids("age IS NULL") == [3]
+    assert ids("id IN (1, 3) AND NOT name IN ('Carol')") == [1]
+    assert ids("age NOT IN (25, NULL)") == []
+
+
+def test_conjuncts_are_ordered_by_selectivity_and_cost():
+    schema = TableSchema("users", [Column("id", "INT", primary_key=True), Column("name", "STRING"), Column("age", "INT")])
+    ast = Parser(Tokenizer("SELECT id FROM users WHERE name != 'x' AND age > 3 AND id = 7").tokenize()).parse()
+    predicate = compile_predicate(ast.children[2].value, schema)
+
+    ordered = [conjunct.left.value for conjunct in predicate.expression.operands]
+    assert ordered == ["id", "age", "name"]
+
+
+def test_planner_uses_primary_key_index(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    tm.create_table("users", [Column("id", "INT", primary_key=True), Column("name", "STRING"), Column("age", "INT")])
+    for i in range(1, 21):
+        run_query(executor, f"INSERT INTO users (id, name, age) VALUES ({i}, 'user{i}', {20 + i})")
+
+    plan = run_query(executor, "EXPLAIN SELECT name FROM users WHERE id = 7 AND age > 3")
+    assert "IndexLookup(users.id = 7)" in plan
+    assert run_query(executor, "SELECT name FROM users WHERE id = 7 AND age > 3") == [{"name": "user7"}]
+
+    plan = run_query(executor, "EXPLAIN SELECT id FROM users WHERE id > 5 AND id <= 8")
+    assert "IndexRangeScan(users: id > 5 AND id <= 8)" in plan
+    assert [r["id"] for r in run_query(executor, "SELECT id FROM users WHERE id > 5 AND id <= 8")] == [6, 7, 8]
+
+    assert "SeqScan(users)" in run_query(executor, "EXPLAIN SELECT id FROM users WHERE age = 30")
+
+
+def test_index_paths_skip_stale_entries(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    tm.create_table("users", [Column("id", "INT", primary_key=True), Column("name", "STRING")])
+    run_query(executor, "INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    run_query(executor, "INSERT INTO users (id, name) VALUES (2, 'Bob')")
+
+    run_query(executor, "UPDATE users SET id = 5 WHERE id = 1")
+    run_query(executor, "DELETE FROM users WHERE id = 2")
+
+    assert run_query(executor, "SELECT id FROM users WHERE id BETWEEN 1 AND 10") == [{"id": 5}]
+    assert run_query(executor, "SELECT id FROM users WHERE id = 1") == []
+
+
+def test_order_by_limit_and_aggregates(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    tm.create_table("users", [Column("id", "INT", primary_key=True), Column("team", "STRING"), Column("age", "INT")])
+    for i in range(1, 11):
+        run_query(executor, f"INSERT INTO users (id, team, age) VALUES ({i}, 'team{i % 3}', {20 + i})")
+
+    result = run_query(executor, "SELECT id FROM users ORDER BY age DESC LIMIT 3")
+    assert [r["id"] for r in result] == [10, 9, 8]
+    result = run_query(executor, "SELECT id FROM users WHERE id > 2 ORDER BY id LIMIT 2 OFFSET 1")
+    assert [r["id"] for r in result] == [4, 5]
+
+    result = run_query(executor, "SELECT team, COUNT(*), AVG(age) AS avg_age FROM users GROUP BY team ORDER BY team")
+    assert result == [
+        {"team": "team0", "count(*)": 3, "avg_age": 26.0},
+        {"team": "team1", "count(*)": 4, "avg_age": 25.5},
+        {"team": "team2", "count(*)": 3, "avg_age": 25.0},
+    ]
+    assert run_query(executor, "SELECT COUNT(*), MIN(age), MAX(age) FROM users WHERE id > 100") == [
+        {"count(*)": 0, "min(age)": None, "max(age)": None}]
+
+    plan = run_query(executor, "EXPLAIN SELECT team, SUM(age) FROM users GROUP BY team ORDER BY team LIMIT 1")
+    assert plan.splitlines()[:4] == [
+        "Project(team, sum(age))",
+        "  -> Limit(1)",
+        "    -> Sort(team)",
+        "      -> HashAggregate(group by team: sum(age))",
+    ]
+
+
+def test_select_streams_rows_lazily(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm)
+    tm.create_table("events", [Column("id", "INT"), Column("kind", "STRING")])
+    for i in range(50):
+        tm.insert_row("events", {"id": i, "kind": "a"})
+
+    scanned = []
+    original_scan = tm.scan
+
+    def counting_scan(table_name, snapshot=None):
+        for rid, row in original_scan(table_name, snapshot):
+            scanned.append(rid)
+            yield rid, row
+
+    tm.scan = counting_scan
+    ast = Parser(Tokenizer("SELECT id FROM events LIMIT 5").tokenize()).parse()
+    assert [r["id"] for r in executor.stream(ast)] == [0, 1, 2, 3, 4]
+    assert len(scanned) == 5
+
+
+def test_vectorized_mode_matches_row_mode(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    tm.create_table("m", [Column("id", "INT"), Column("score", "FLOAT"), Column("ok", "BOOL"), Column("tag", "STRING")])
+    for i in range(2500):
+        tm.insert_row("m", {"id": i, "score": i / 10, "ok": i % 2 == 0, "tag": None if i % 7 == 0 else f"t{i % 5}"})
+    rows = QueryExecutor(tm)
+    vectors = QueryExecutor(tm, vectorized=True, batch_size=256)
+
+    for query in [
+        "SELECT id, ok FROM m WHERE id > 100 AND score <= 150.5",
+        "SELECT * FROM m WHERE id BETWEEN 10 AND 20 OR tag IN ('t1', 't3')",
+        "SELECT id FROM m WHERE NOT (id IN (1, 2, 3)) AND tag IS NULL",
+        "SELECT tag FROM m WHERE ok = TRUE AND id NOT BETWEEN 5 AND 2000",
+        "SELECT COUNT(*), SUM(id) FROM m WHERE tag != 't2'",
+    ]:
+        assert run_query(vectors, query) == run_query(rows, query), query
+    plan = vectors._plan_select(Parser(Tokenizer("SELECT id FROM m WHERE id > 3").tokenize()).parse())
+    assert isinstance(vectors._build(plan), Unbatch)
+
+
+def test_order_by_indexed_column_skips_sort_and_deletes_clean_index(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    im = IndexManager()
+    executor = QueryExecutor(tm, im)
+    tm.create_table("users", [Column("id", "INT", primary_key=True), Column("age", "INT")])
+    for i in [5, 3, 9, 1, 7, 2, 8]:
+        run_query(executor, f"INSERT INTO users (id, age) VALUES ({i}, {i * 10})")
+
+    plan = run_query(executor, "EXPLAIN SELECT id FROM users ORDER BY id DESC LIMIT 3")
+    assert "Sort" not in plan and "IndexRangeScan(users: all id DESC)" in plan
+    assert [r["id"] for r in run_query(executor, "SELECT id FROM users ORDER BY id DESC LIMIT 3")] == [9, 8, 7]
+    assert [r["id"] for r in run_query(executor, "SELECT id FROM users WHERE id BETWEEN 2 AND 8 ORDER BY id")] == [2, 3, 5, 7, 8]
+    assert "Sort(age)" in run_query(executor, "EXPLAIN SELECT id FROM users ORDER BY age")
+
+    run_query(executor, "DELETE FROM users WHERE id > 6")
+    run_query(executor, "UPDATE users SET id = 4 WHERE id = 3")
+    tree = im.indexes["users.id"]
+    assert list(tree) == [1, 2, 4, 5]
+    assert [r["id"] for r in run_query(executor, "SELECT id FROM users ORDER BY id DESC")] == [5, 4, 2, 1]
+
+
+def test_persistent_indexes_reopen_without_rebuilding(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    im = IndexManager(tmp_path / "indices", tm.buffer_pool)
+    executor = QueryExecutor(tm, im)
+    run_query(executor, "CREATE TABLE users (id INT PRIMARY KEY, name STRING)")
+    for i in range(1, 301):
+        run_query(executor, f"INSERT INTO users (id, name) VALUES ({i}, 'user{i}')")
+    run_query(executor, "DELETE FROM users WHERE id > 250")
+    tm.close()
+    im.close()
+
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    im = IndexManager(tmp_path / "indices", tm.buffer_pool)
+    assert im.has_index("users", "id") and len(im.indexes["users.id"]) == 250
+    tm.scan = None
+    executor = QueryExecutor(tm, im)
+    assert run_query(executor, "SELECT name FROM users WHERE id = 42") == [{"name": "user42"}]
+    assert [r["id"] for r in run_query(executor, "SELECT id FROM users ORDER BY id DESC LIMIT 2")] == [250, 249]
+
+
+def test_unique_constraints_are_checked_through_indexes(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    run_query(executor, "CREATE TABLE users (id INT PRIMARY KEY, email STRING UNIQUE, name STRING)")
+    assert tm.get_table_schema("users").get_column("email").unique
+    for i in range(1, 51):
+        run_query(executor, f"INSERT INTO users (id, email, name) VALUES ({i}, 'u{i}@x', 'same')")
+    run_query(executor, "INSERT INTO users (id, name) VALUES (51, 'no email')")
+    run_query(executor, "INSERT INTO users (id, name) VALUES (52, 'no email')")
+
+    def no_scan(table_name):
+        raise AssertionError("uniqueness check scanned the table")
+    tm.scan = no_scan
+
+    with pytest.raises(QueryError, match="primary key"):
+        run_query(executor, "INSERT INTO users (id, email) VALUES (7, 'new@x')")
+    with pytest.raises(QueryError, match="unique column email"):
+        run_query(executor, "INSERT INTO users (id, email) VALUES (99, 'u7@x')")
+    with pytest.raises(QueryError, match="unique column email"):
+        run_query(executor, "UPDATE users SET email = 'u1@x' WHERE id = 2")
+    with pytest.raises(QueryError, match="unique column email"):
+        run_query(executor, "UPDATE users SET email = 'dup@x' WHERE id > 40")
+
+    run_query(executor, "UPDATE users SET email = 'moved@x' WHERE id = 7")
+    run_query(executor, "INSERT INTO users (id, email) VALUES (53, 'u7@x')")
+    assert run_query(executor, "SELECT id FROM users WHERE email = 'u7@x'") == [{"id": 53}]
+
+
+def test_create_index_secondary_composite_and_drop(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    run_query(executor, "CREATE TABLE orders (id INT PRIMARY KEY, customer STRING, day INT)")
+    for i in range(1, 41):
+        run_query(executor, f"INSERT INTO orders (id, customer, day) VALUES ({i}, 'c{i % 4}', {i % 5})")
+
+    assert run_query(executor, "CREATE INDEX by_customer ON orders (customer)").startswith("Index by_customer")
+    run_query(executor, "CREATE INDEX by_customer_day ON orders (customer, day)")
+    plan = run_query(executor, "EXPLAIN SELECT * FROM orders WHERE customer = 'c1'")
+    assert "using by_customer" in plan
+    assert sorted(r["id"] for r in run_query(executor, "SELECT id FROM orders WHERE customer = 'c1'")) == \
+        list(range(1, 41, 4))
+
+    plan = run_query(executor, "EXPLAIN SELECT * FROM orders WHERE customer = 'c2' AND day = 2")
+    assert "using by_customer_day" in plan
+    assert [r["id"] for r in run_query(executor, "SELECT id FROM orders WHERE customer = 'c2' AND day = 2")] == \
+        [2, 22]
+
+    run_query(executor, "UPDATE orders SET customer = 'c9' WHERE id = 5")
+    run_query(executor, "DELETE FROM orders WHERE id = 9")
+    assert sorted(r["id"] for r in run_query(executor, "SELECT id FROM orders WHERE customer = 'c1'")) == \
+        [1, 13, 17, 21, 25, 29, 33, 37]
+    assert run_query(executor, "SELECT id FROM orders WHERE customer = 'c9'") == [{"id": 5}]
+
+    with pytest.raises(QueryError, match="unique index"):
+        run_query(executor, "CREATE UNIQUE INDEX one_per_customer ON orders (customer)")
+    run_query(executor, "CREATE UNIQUE INDEX one_per_slot ON orders (customer, day, id)")
+    run_query(executor, "CREATE TABLE people (id INT PRIMARY KEY, first STRING, last STRING)")
+    run_query(executor, "CREATE UNIQUE INDEX full_name ON people (first, last)")
+    run_query(executor, "INSERT INTO people (id, first, last) VALUES (1, 'ada', 'lovelace')")
+    run_query(executor, "INSERT INTO people (id, first, last) VALUES (2, 'ada', 'byron')")
+    with pytest.raises(QueryError, match="unique index full_name"):
+        run_query(executor, "INSERT INTO people (id, first, last) VALUES (3, 'ada', 'lovelace')")
+    with pytest.raises(QueryError, match="already exists"):
+        run_query(executor, "CREATE INDEX full_name ON people (last)")
+
+    run_query(executor, "DROP INDEX by_customer")
+    assert "using by_customer_day" in \
+        run_query(executor, "EXPLAIN SELECT * FROM orders WHERE customer = 'c1'")
+    executor.index_manager.close()
+    tm.close()
+
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    index_manager = IndexManager(tmp_path / "indices", tm.buffer_pool)
+    assert index_manager.get_index("by_customer") is None
+    assert index_manager.get_index("full_name").columns == ("first", "last")
+    executor = QueryExecutor(tm, index_manager)
+    assert [r["id"] for r in run_query(executor, "SELECT id FROM orders WHERE customer = 'c2' AND day = 2")] == \
+        [2, 22]
+    with pytest.raises(QueryError, match="unique index full_name"):
+        run_query(executor, "UPDATE people SET last = 'lovelace' WHERE id = 2")
+    run_query(executor, "DROP TABLE people")
+    assert index_manager.table_indexes("people") == []
+
+
+def test_hash_index_serves_equality_lookups(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    run_query(executor, "CREATE TABLE kv (k STRING, v INT)")
+    for i in range(200):
+        run_query(executor, f"INSERT INTO kv (k, v) VALUES ('key{i}', {i})")
+    run_query(executor, "CREATE UNIQUE INDEX kv_k ON kv USING HASH (k)")
+    run_query(executor, "CREATE INDEX kv_v ON kv (v) USING hash")
+
+    assert "IndexLookup(kv.k = 'key42' using kv_k)" in run_query(executor, "EXPLAIN SELECT v FROM kv WHERE k = 'key42'")
+    assert run_query(executor, "SELECT v FROM kv WHERE k = 'key42'") == [{"v": 42}]
+    assert "using kv_v" in run_query(executor, "EXPLAIN SELECT k FROM kv WHERE v IN (3, 4)")
+    assert "SeqScan(kv)" in run_query(executor, "EXPLAIN SELECT k FROM kv WHERE v > 190")
+    assert len(run_query(executor, "SELECT k FROM kv WHERE v > 190")) == 9
+    with pytest.raises(QueryError, match="unique index kv_k"):
+        run_query(executor, "INSERT INTO kv (k, v) VALUES ('key7', 1000)")
+    run_query(executor, "UPDATE kv SET k = 'renamed' WHERE v = 42")
+    assert run_query(executor, "SELECT v FROM kv WHERE k = 'key42'") == []
+    executor.index_manager.close()
+    tm.close()
+
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    assert executor.index_manager.get_index("kv_k").kind == "hash"
+    assert run_query(executor, "SELECT v FROM kv WHERE k = 'renamed'") == [{"v": 42}]
+
+
+def test_prepared_statements_bind_parameters_and_reuse_plans(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    executor.execute_sql("CREATE TABLE users (id INT PRIMARY KEY, name STRING, age INT)")
+    insert = executor.prepare("INSERT INTO users (id, name, age) VALUES (?, ?, ?)")
+    for i, name in enumerate(["Alice", "Bob", "Carol", "Dave"]):
+        insert.execute((i, name, 20 + i * 10))
+    insert.execute((4, "Eve", None))
+
+    select = executor.prepare("SELECT name FROM users WHERE id = :id")
+    assert executor.prepare("select  name from users where id = :id") is select
+    assert executor.execute_sql("SELECT name FROM users WHERE id = :id", {"id": 2}) == [{"name": "Carol"}]
+    plan = select.plan
+    assert select.execute({"id": "1"}) == [{"name": "Bob"}]
+    assert select.plan is plan
+    assert select.execute({"id": None}) == []
+
+    ranged = executor.prepare("SELECT id FROM users WHERE age BETWEEN ? AND ? AND id IN (?, ?, ?) ORDER BY id")
+    assert ranged.execute((25, 60, 3, 1, 2)) == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert executor.execute_sql("UPDATE users SET age = ?, name = ? WHERE id = ?", (99, "Bobby", 1)) == \
+        "Updated 1 rows"
+    assert executor.execute_sql("SELECT name, age FROM users WHERE id = 1") == [{"name": "Bobby", "age": 99}]
+    assert executor.execute_sql("DELETE FROM users WHERE age > ?", [40]) == "Deleted 2 rows"
+
+    with pytest.raises(QueryError, match="takes 5 parameters, got 2"):
+        ranged.execute((1, 2))
+    with pytest.raises(QueryError, match="No value for parameter :id"):
+        select.execute({"name": "Bob"})
+    with pytest.raises(QueryError, match="Invalid value"):
+        select.execute({"id": "abc"})
+
+
+def test_cached_plans_are_replaced_after_ddl(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    executor.execute_sql("CREATE TABLE t (id INT, v INT)")
+    for i in range(20):
+        executor.execute_sql("INSERT INTO t (id, v) VALUES (?, ?)", (i, i % 5))
+
+    select = executor.prepare("SELECT id FROM t WHERE v = ?")
+    assert len(select.execute((3,))) == 4
+    assert "SeqScan" in explain_plan(select.plan)
+    executor.execute_sql("CREATE INDEX t_v ON t (v)")
+    assert len(select.execute((3,))) == 4
+    assert "IndexLookup(t.v = ? using t_v)" in explain_plan(select.plan)
+    executor.execute_sql("DROP INDEX t_v")
+    assert len(select.execute((4,))) == 4
+    assert "SeqScan" in explain_plan(select.plan)
+
+    executor.execute_sql("DROP TABLE t")
+    executor.execute_sql("CREATE TABLE t (id INT, v STRING)")
+    executor.execute_sql("INSERT INTO t (id, v) VALUES (1, 'x')")
+    assert select.execute(("x",)) == [{"id": 1}]
+
+
+def explain_plan(plan):
+    return "\n".join(explain(plan))
+
+
+def test_multi_row_insert_copy_and_bulk_insert(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    executor.execute_sql("CREATE TABLE items (id INT PRIMARY KEY, name STRING UNIQUE, price FLOAT)")
+    assert executor.execute_sql("INSERT INTO items (id, name, price) VALUES (1, 'a', 1.5), (2, 'b', 2.5)") == \
+        "Inserted 2 rows into items"
+    with pytest.raises(QueryError, match="Duplicate entry '3'"):
+        executor.execute_sql("INSERT INTO items (id, name, price) VALUES (3, 'c', 1), (3, 'd', 1)")
+    assert executor.execute_sql("SELECT id FROM items WHERE id = 3") == []
+
+    path = tmp_path / "items.csv"
+    path.write_text("name;id;price\n" + "".join(f"n{i};{i};{i / 2}\n" for i in range(10, 2010)) + "last;5;\n")
+    result = executor.execute_sql(f"COPY items FROM '{path}' WITH (header true, delimiter ';')")
+    assert result == "Copied 2001 rows into items"
+    assert executor.execute_sql("SELECT name, price FROM items WHERE id = 1500") == [{"name": "n1500", "price": 750.0}]
+    assert executor.execute_sql("SELECT price FROM items WHERE id = 5") == [{"price": None}]
+    assert "IndexLookup" in executor.execute_sql("EXPLAIN SELECT id FROM items WHERE name = 'n42'")
+    assert executor.execute_sql("SELECT id FROM items WHERE name = 'n42'") == [{"id": 42}]
+
+    loaded = executor.bulk_insert("items", ([i, f"x{i}", None] for i in range(3000, 3010)), batch_size=4)
+    assert loaded == 10
+    with pytest.raises(QueryError, match="unique column name"):
+        executor.bulk_insert("items", [{"id": 4000, "name": "y"}, {"id": 4001, "name": "x3005"}])
+    with pytest.raises(QueryError, match="Duplicate entry '4002'"):
+        executor.bulk_insert("items", [(4002, "z", 1.0), (4002, "w", 1.0)], columns=["id", "name", "price"])
+    assert executor.execute_sql("SELECT COUNT(*) FROM items") == [{"count(*)": 2013}]
+    assert executor.execute_sql("SELECT id FROM items WHERE id >= 3008") == [{"id": 3008}, {"id": 3009}]
+
+
+def test_cursor_fetches_incrementally_and_copy_to_round_trips(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager())
+    executor.execute_sql("CREATE TABLE t (id INT PRIMARY KEY, name STRING, score FLOAT)")
+    executor.bulk_insert("t", ([i, f"n{i}", None if i % 3 == 0 else i / 4] for i in range(50)))
+
+    cursor = executor.cursor("SELECT id FROM t WHERE id < ? ORDER BY id", (10,))
+    assert cursor.fetchone() == {"id": 0}
+    assert cursor.fetchmany(3) == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert [row["id"] for row in cursor] == [4, 5, 6, 7, 8, 9]
+    assert cursor.fetchmany(5) == [] and cursor.rownumber == 10
+    cursor.close()
+    with pytest.raises(QueryError, match="closed"):
+        cursor.fetchone()
+
+    csv_path, json_path = tmp_path / "t.csv", tmp_path / "t.ndjson"
+    assert executor.execute_sql(f"COPY t TO '{csv_path}' WITH (header)") == f"Copied 50 rows to {csv_path}"
+    assert csv_path.read_text().splitlines()[:2] == ["id,name,score", "0,n0,"]
+    executor.execute_sql(f"COPY (SELECT name, id FROM t WHERE id >= :low) TO '{json_path}' WITH (format ndjson)",
+                         {"low": 45})
+    assert json_path.read_text().splitlines()[0] == '{"name": "n45", "id": 45}'
+
+    executor.execute_sql("CREATE TABLE u (id INT PRIMARY KEY, name STRING, score FLOAT)")
+    executor.execute_sql(f"COPY u FROM '{csv_path}' WITH (header true)")
+    assert executor.execute_sql("SELECT * FROM u WHERE id = 3") == [{"id": 3, "name": "n3", "score": None}]
+    executor.execute_sql("CREATE TABLE v (id INT PRIMARY KEY, name STRING)")
+    assert executor.execute_sql(f"COPY v (name, id) FROM '{json_path}' WITH (format = ndjson)") == \
+        "Copied 5 rows into v"
+
+
+def test_columnar_tables_match_row_tables(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    rows = [(i, i / 4 if i % 9 else None, i % 2 == 0, ["oslo", "rome", None][i % 3]) for i in range(3000)]
+    for table, options in (("r", ""), ("c", " WITH (format = columnar)")):
+        executor.execute_sql(f"CREATE TABLE {table} (id INT PRIMARY KEY, score FLOAT, ok BOOL, city STRING){options}")
+        executor.bulk_insert(table, rows)
+        executor.execute_sql(f"UPDATE {table} SET score = ? WHERE id < 20", (1.5,))
+        executor.execute_sql(f"DELETE FROM {table} WHERE id >= 2500 AND ok = TRUE")
+        executor.begin()
+        executor.execute_sql(f"DELETE FROM {table} WHERE city = 'rome'")
+        executor.execute_sql(f"INSERT INTO {table} (id, city) VALUES (5000, 'lima')")
+        executor.rollback()
+    assert tm.get_table_schema("c").storage == "columnar"
+    with pytest.raises(QueryError):
+        executor.execute_sql("CREATE TABLE bad (id INT) WITH (format = parquet)")
+    # Refused at insert, not left to fail every commit after it.
+    executor.execute_sql("CREATE TABLE wide (n INT) WITH (format = columnar)")
+    with pytest.raises(MiniSQLError, match="does not fit"):
+        executor.execute_sql(f"INSERT INTO wide (n) VALUES ({2 ** 70})")
+    executor.execute_sql("INSERT INTO wide (n) VALUES (1)")
+    assert executor.execute_sql("SELECT n FROM wide") == [{"n": 1}]
+
+    queries = [
+        "SELECT COUNT(*), SUM(score), AVG(score), MIN(city), MAX(id), COUNT(city) FROM {}",
+        "SELECT city, COUNT(*), SUM(id) FROM {} WHERE ok = FALSE GROUP BY city ORDER BY city",
+        "SELECT * FROM {} WHERE score > 100 AND city IS NULL ORDER BY id LIMIT 5",
+        "SELECT id, score FROM {} WHERE id IN (3, 17, 2501, 2502)",
+    ]
+    for query in queries:
+        assert run_query(executor, query.format("c")) == run_query(executor, query.format("r")), query
+    plan = executor._plan_select(Parser(Tokenizer("SELECT SUM(score) FROM c").tokenize()).parse())
+    assert not isinstance(executor._build(plan), operators.Aggregate)
+
+    tm.close()
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm, IndexManager(tmp_path / "indices", tm.buffer_pool))
+    for query in queries:
+        assert run_query(executor, query.format("c")) == run_query(executor, query.format("r")), query
+
+
+def test_rows_are_tuples_inside_and_dicts_outside(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
+    executor = QueryExecutor(tm)
+    executor.execute_sql("CREATE TABLE t (id INT PRIMARY KEY, name STRING, age INT)")
+    executor.execute_sql("INSERT INTO t (id, name) VALUES (1, 'a'), (2, 'b')")
+    executor.execute_sql("UPDATE t SET age = ? WHERE id = ?", (30, 2))
+
+    (_, row), _ = list(tm.scan("t"))
+    assert isinstance(row, tuple) and row == {"id": 1, "name": "a", "age": None}
+    assert sys.getsizeof(row) < sys.getsizeof(dict(row)) / 2
+    assert row.get("name") == "a" and row["age"] is None and "id" in row and row.get("missing") is None
+
+    result = executor.execute_sql("SELECT name, age FROM t WHERE age > 10")
+    assert result == [{"name": "b", "age": 30}] and type(result[0]) is dict
+    cursor = executor.cursor("SELECT * FROM t ORDER BY id DESC")
+    assert type(cursor.fetchone()) is dict
+    assert executor.execute_sql("SELECT age, COUNT(*) FROM t GROUP BY age ORDER BY age") == \
+        [{"age": None, "count(*)": 1}, {"age": 30, "count(*)": 1}]
@@ -1,4 +1,11 @@
+import random
+import pytest
+from minisql.cache.buffer_pool import BufferPool
 from minisql.index.bplustree import BPlusTree
+from minisql.index.hash_index import HashIndex, stable_hash
+from minisql.index.paged_bplustree import PagedBPlusTree
+from minisql.index.paged_hash_index import PagedHashIndex
+from minisql.storage.file_manager import FileManager
 
 
 def test_bplustree_insert_and_search():
@@ -23,3 +30,151 @@ def test_bplustree_multiple_inserts():
     assert tree.search(1) == "row1"
     assert tree.search(25) == "row25"
     assert tree.search(49) == "row49"
+
+
+def test_bplustree_range_scan_and_order():
+    tree = BPlusTree(order=4)
+    for i in range(0, 100, 3):
+        tree.insert(i, f"row{i}")
+
+    assert [k for k, _ in tree.range_scan(10, 30)] == [12, 15, 18, 21, 24, 27, 30]
+    assert [k for k, _ in tree.range_scan(12, 30, low_inclusive=False, high_inclusive=False)] == [15, 18, 21, 24, 27]
+    assert [k for k, _ in tree.range_scan(10, 30, reverse=True)] == [30, 27, 24, 21, 18, 15, 12]
+    assert [k for k, _ in tree.range_scan(high=6, high_inclusive=False, reverse=True)] == [3, 0]
+    assert list(tree) == list(range(0, 100, 3))
+    assert tree.min() == (0, "row0") and tree.max() == (99, "row99")
+    assert len(tree) == 34
+
+
+@pytest.mark.parametrize("order", [3, 4, 5, 8])
+def test_bplustree_delete_rebalances(order):
+    rng = random.Random(order)
+    tree = BPlusTree(order=order)
+    keys = list(range(300))
+    rng.shuffle(keys)
+    for key in keys:
+        tree.insert(key, key * 2)
+
+    expected = set(keys)
+    rng.shuffle(keys)
+    for key in keys[:250]:
+        assert tree.delete(key)
+        expected.discard(key)
+        assert not tree.delete(key)
+    assert list(tree) == sorted(expected)
+    assert [k for k, _ in tree.range_scan(reverse=True)] == sorted(expected, reverse=True)
+    assert all(tree.search(k) == k * 2 for k in expected)
+    assert len(tree) == len(expected)
+
+    for key in keys[250:]:
+        tree.delete(key)
+    assert list(tree) == [] and tree.root.is_leaf and tree.min() is None
+
+
+def _leaf_depths_and_sizes(node, depth=0):
+    if node.is_leaf:
+        return [(depth, len(node.keys))]
+    return [entry for child in node.children for entry in _leaf_depths_and_sizes(child, depth + 1)]
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 500, 2049])
+def test_bplustree_bulk_load(count):
+    rng = random.Random(count)
+    keys = list(range(count))
+    rng.shuffle(keys)
+    tree = BPlusTree.bulk_load(((k, f"row{k}") for k in keys), order=8, fill_factor=0.75)
+
+    assert list(tree) == sorted(keys) and len(tree) == count
+    assert all(tree.search(k) == f"row{k}" for k in keys)
+    leaves = _leaf_depths_and_sizes(tree.root)
+    assert len({depth for depth, _ in leaves}) == 1
+    if len(leaves) > 1:
+        assert all(tree.min_keys <= size <= 7 for _, size in leaves)
+        assert max(size for _, size in leaves) == 5
+
+    tree.insert(count, "new")
+    for k in keys[: count // 2]:
+        assert tree.delete(k)
+    assert list(tree) == sorted(keys[count // 2:] + [count])
+
+
+def test_bplustree_bulk_load_keeps_last_duplicate():
+    tree = BPlusTree.bulk_load([(2, "a"), (1, "b"), (2, "c")], order=4)
+    assert list(tree.items()) == [(1, "b"), (2, "c")]
+
+
+def test_paged_bplustree_persists_and_loads_lazily(tmp_path):
+    pool = BufferPool(capacity=16)
+    tree = PagedBPlusTree.bulk_load(((k, (k, 0)) for k in range(0, 3000, 2)), order=16, fill_factor=0.75,
+                                    file_manager=FileManager(tmp_path), filename="t.id.idx", buffer_pool=pool)
+    odd = list(range(1, 3000, 2))
+    random.Random(11).shuffle(odd)
+    for key in odd:
+        tree.insert(key, (key, 1))
+    for key in range(0, 3000, 3):
+        assert tree.delete(key)
+    tree.mark_ready()
+    pool.flush_all()
+
+    reopened_pool = BufferPool(capacity=16)
+    reopened = PagedBPlusTree(FileManager(tmp_path), "t.id.idx", reopened_pool)
+    assert reopened_pool.misses == 1 and reopened.ready and len(reopened) == 2000
+    assert reopened.search(1501) == (1501, 1) and reopened.search(1500) is None
+    assert list(reopened) == [k for k in range(3000) if k % 3]
+    assert [k for k, _ in reopened.range_scan(10, 20, reverse=True)] == [20, 19, 17, 16, 14, 13, 11, 10]
+
+
+def test_paged_bplustree_spills_large_nodes_to_overflow_pages(tmp_path):
+    tree = PagedBPlusTree(FileManager(tmp_path), "t.name.idx", BufferPool(capacity=32), order=64)
+    keys = [f"{i:05d}" * 40 for i in range(600)]
+    random.Random(5).shuffle(keys)
+    for key in keys:
+        tree.insert(key, ("x", None, 1.5, True))
+    for key in keys[:300]:
+        tree.delete(key)
+
+    assert tree._overflow
+    tree.nodes.clear()
+    assert list(tree) == sorted(keys[300:])
+    assert tree.search(keys[-1]) == ("x", None, 1.5, True)
+
+
+def test_hash_index_splits_buckets_and_deletes():
+    index = HashIndex(bucket_size=4)
+    keys = list(range(1000))
+    random.Random(3).shuffle(keys)
+    for key in keys:
+        index.insert(key, (key, 0))
+    index.insert(5, (5, 1))
+    assert len(index) == 1000 and index.depth > 0
+    assert index.search(5) == (5, 1) and index.search(999) == (999, 0) and index.search(1000) is None
+    assert sorted(index) == list(range(1000))
+    assert all(len(index._load(ref).entries) <= 4 for ref in index.directory)
+
+    for key in range(0, 1000, 2):
+        assert index.delete(key)
+    assert not index.delete(0)
+    assert len(index) == 500 and index.search(2) is None and index.search(3) == (3, 0)
+
+    assert stable_hash(7) == stable_hash(7.0) and stable_hash("a") == stable_hash("a")
+    loaded = HashIndex.bulk_load(((f"k{i}", i) for i in range(3000)), bucket_size=16, fill_factor=0.75)
+    assert len(loaded) == 3000 and loaded.search("k2999") == 2999 and len(list(loaded.items())) == 3000
+
+
+def test_paged_hash_index_persists(tmp_path):
+    pool = BufferPool(capacity=32)
+    index = PagedHashIndex.bulk_load(((k, (k, 0)) for k in range(5000)), bucket_size=32, fill_factor=0.75,
+                                     file_manager=FileManager(tmp_path), filename="t.id.hidx", buffer_pool=pool,
+                                     descriptor=["t", ["id"], True, "hash"])
+    for k in range(5000, 20000):
+        index.insert(k, (k, 1))
+    index.insert("long", [(k, 0) for k in range(1500)])
+    index.delete(7)
+    index.mark_ready()
+    pool.flush_file(FileManager(tmp_path), "t.id.hidx")
+
+    reopened = PagedHashIndex(FileManager(tmp_path), "t.id.hidx", BufferPool(capacity=32))
+    assert reopened.ready and reopened.descriptor == ["t", ["id"], True, "hash"]
+    assert len(reopened) == 20000 and reopened.depth == index.depth
+    assert reopened.search(7) is None and reopened.search(4999) == (4999, 0) and reopened.search(19999) == (19999, 1)
+    assert len(reopened.search("long")) == 1500
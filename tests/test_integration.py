@@ -12,8 +12,8 @@ def run_query(executor, query: str):
     return executor.execute(ast)
 
 
-def test_full_pipeline():
-    tm = TableManager()
+def test_full_pipeline(tmp_path):
+    tm = TableManager(db_path=str(tmp_path / "data.db"))
     im = IndexManager()
     executor = QueryExecutor(tm, im)
 
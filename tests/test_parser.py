@@ -1,6 +1,7 @@
 import pytest
 from minisql.query.tokenizer import Tokenizer
 from minisql.query.parser import Parser
+from minisql.query.ast import Between, BooleanOp, ColumnRef, Comparison, InList, Literal, Not, Parameter
 
 
 def parse_query(query: str):
@@ -31,3 +32,91 @@ def test_parse_delete():
     ast = parse_query(query)
     assert ast.node_type == "DELETE"
     assert any(child.node_type == "WHERE" for child in ast.children)
+
+def test_parse_where_builds_expression_tree():
+    ast = parse_query("SELECT id FROM users WHERE name != 'a>=b'")
+    where = next(child for child in ast.children if child.node_type == "WHERE").value
+    assert isinstance(where, Comparison)
+    assert where.value == "!="
+    assert isinstance(where.left, ColumnRef) and where.left.value == "name"
+    assert isinstance(where.right, Literal) and where.right.value == "a>=b"
+
+def test_parse_compound_where_precedence():
+    ast = parse_query("SELECT id FROM users WHERE a = 1 OR b = 2 AND NOT (c IN (1, 2) OR d IS NULL)")
+    where = next(child for child in ast.children if child.node_type == "WHERE").value
+    assert isinstance(where, BooleanOp) and where.value == "OR"
+    conjunction = where.operands[1]
+    assert isinstance(conjunction, BooleanOp) and conjunction.value == "AND"
+    assert isinstance(conjunction.operands[1], Not)
+
+def test_parse_between_and_not_in():
+    ast = parse_query("SELECT id FROM users WHERE age NOT BETWEEN 10 AND 20 AND name NOT IN ('a', 'b')")
+    where = next(child for child in ast.children if child.node_type == "WHERE").value
+    between, in_list = where.operands
+    assert isinstance(between, Between) and between.negated
+    assert isinstance(in_list, InList) and in_list.negated
+    assert [v.value for v in in_list.values] == ["a", "b"]
+
+
+def test_parse_aggregates_order_by_and_limit():
+    ast = parse_query("SELECT age, COUNT(*), MAX(id) AS top FROM users GROUP BY age ORDER BY top DESC, age LIMIT 5 OFFSET 2")
+    columns = ast.children[0].value
+    assert [type(c).__name__ for c in columns] == ["ColumnRef", "AggregateCall", "AggregateCall"]
+    assert columns[1].name == "count(*)" and columns[2].name == "top"
+    children = {child.node_type: child.value for child in ast.children}
+    assert children["GROUP_BY"] == ["age"]
+    assert children["ORDER_BY"] == [("top", True), ("age", False)]
+    assert children["LIMIT"] == 5 and children["OFFSET"] == 2
+
+
+def test_parse_create_and_drop_index():
+    ast = parse_query("CREATE UNIQUE INDEX by_name ON users (last, first)")
+    assert ast.node_type == "CREATE_INDEX"
+    assert {c.node_type: c.value for c in ast.children} == \
+        {"UNIQUE": True, "INDEX": "by_name", "TABLE": "users", "COLUMNS": ["last", "first"], "USING": "btree"}
+    for query in ("CREATE INDEX by_id ON users USING HASH (id)", "CREATE INDEX by_id ON users (id) USING hash"):
+        assert parse_query(query).children[-1].value == "hash"
+    with pytest.raises(ValueError, match="Unknown index type"):
+        parse_query("CREATE INDEX by_id ON users USING gist (id)")
+    assert parse_query("DROP INDEX by_name").node_type == "DROP_INDEX"
+    assert parse_query("DROP TABLE users").node_type == "DROP_TABLE"
+
+def test_parse_parameters():
+    parser = Parser(Tokenizer("UPDATE users SET name = ?, age = 30 WHERE id = ? AND age IN (?, 4)").tokenize())
+    ast = parser.parse()
+    assignments = ast.children[1].value
+    assert [column for column, _ in assignments] == ["name", "age"]
+    assert isinstance(assignments[0][1], Parameter) and assignments[1][1].value == 30
+    assert parser.parameters == [0, 1, 2]
+    assert ast.children[2].value.to_sql() == "(id = ? AND age IN (?, 4))"
+
+    parser = Parser(Tokenizer("SELECT * FROM users WHERE age > :age AND name = :name OR age < :age").tokenize())
+    parser.parse()
+    assert parser.parameters == ["age", "name"]
+    with pytest.raises(ValueError, match="Cannot mix"):
+        parse_query("SELECT * FROM users WHERE id = ? AND name = :name")
+
+def test_parse_multi_row_insert_and_copy():
+    ast = parse_query("INSERT INTO users (id, name) VALUES (1, 'a'), (2, ?)")
+    rows = ast.children[2].value
+    assert len(rows) == 2 and rows[0][1].value == "a" and isinstance(rows[1][1], Parameter)
+
+    ast = parse_query("COPY users (id, name) FROM 'users.csv' WITH (HEADER, delimiter = ';', format csv)")
+    assert ast.node_type == "COPY_FROM"
+    assert {c.node_type: c.value for c in ast.children} == {
+        "TABLE": "users", "COLUMNS": ["id", "name"], "FILE": "users.csv",
+        "OPTIONS": {"header": True, "delimiter": ";", "format": "csv"}}
+
+
+def test_parse_transaction_control_and_vacuum():
+    assert [parse_query(q).node_type for q in ("BEGIN", "BEGIN TRANSACTION", "COMMIT", "ROLLBACK")] == \
+        ["BEGIN", "BEGIN", "COMMIT", "ROLLBACK"]
+    assert parse_query("VACUUM").children == []
+    ast = parse_query("VACUUM users")
+    assert ast.node_type == "VACUUM" and ast.children[0].value == "users"
+
+
+def test_parse_create_table_with_storage_format():
+    ast = parse_query("CREATE TABLE events (id INT PRIMARY KEY, kind STRING) WITH (format = columnar)")
+    assert ast.children[2].node_type == "OPTIONS" and ast.children[2].value == {"format": "columnar"}
+    assert parse_query("CREATE TABLE t (id INT)").children[2].value == {}
@@ -1,6 +1,20 @@
 import os
+import pickle
 import tempfile
+import threading
+from array import array
+from minisql.storage.column_file import DICTIONARY, OFFSETS, PLAIN, ColumnFile
 from minisql.storage.record_manager import RecordManager
+from minisql.storage.row_codec import ROW_MAGIC, RowCodec
+from minisql.storage.serializer import Serializer
+from minisql.storage.file_manager import FileManager
+from minisql.storage.heap_file import HeapFile
+from minisql.cache.buffer_pool import BufferPool
+from minisql.storage.page import Page
+from minisql.storage.wal import WriteAheadLog
+from minisql.catalog.table_manager import TableManager
+from minisql.catalog.schema import Column, TableSchema
+from minisql.utils.exceptions import FileManagerError
 
 
 def test_insert_and_select_records():
@@ -15,6 +29,7 @@ def test_insert_and_select_records():
         assert len(records) == 2
         assert records[0]["name"] == "Alice"
         assert records[1]["name"] == "Bob"
+        rm.close()
 
 
 def test_delete_records():
@@ -30,3 +45,267 @@ def test_delete_records():
         assert deleted == 1
         assert len(records) == 1
         assert records[0]["id"] == "2"
+        # Compaction runs in a thread from the first delete until close().
+        assert any(t.name == "minisql-compact" for t in threading.enumerate())
+        rm.close()
+        assert not any(t.name == "minisql-compact" for t in threading.enumerate())
+
+
+def test_slotted_page_insert_update_delete():
+    page = Page(0)
+
+    first = page.insert(b"alice")
+    second = page.insert(b"bob")
+    assert page.get(first) == b"alice"
+    assert page.get(second) == b"bob"
+
+    assert page.update(first, b"alice-with-a-longer-record")
+    assert page.get(first) == b"alice-with-a-longer-record"
+
+    page.delete(second)
+    assert page.get(second) is None
+    assert [slot for slot, _ in page.records()] == [first]
+
+
+def test_slotted_page_reports_full():
+    page = Page(0)
+    record = b"x" * 1000
+    while page.insert(record) is not None:
+        pass
+    assert page.free_space() < len(record) + Page.SLOT.size
+
+
+def test_heap_file_persists_only_dirty_pages():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fm = FileManager(tmpdir)
+        heap = HeapFile(fm, "users.heap")
+        rids = [heap.insert(f"row-{i}".encode() * 50) for i in range(200)]
+        heap.flush()
+        assert heap.num_pages > 1
+
+        heap.update(rids[0], b"changed")
+        assert heap.buffer_pool.dirty_pages() == [(tmpdir, "users.heap", rids[0][0])]
+        heap.flush()
+        fm.close()
+
+        reopened = HeapFile(FileManager(tmpdir), "users.heap")
+        assert reopened.read(rids[0]) == b"changed"
+        assert reopened.count() == 200
+
+
+def test_file_manager_views_pages_without_copying(tmp_path):
+    fm = FileManager(tmp_path)
+    fm.write_page("t.heap", 0, bytes([1]) * 4096, 4096)
+    view = fm.view_page("t.heap", 0, 4096)
+    assert isinstance(view, memoryview) and view.readonly and view == fm.read_page("t.heap", 0, 4096)
+    # Pages written later are seen, including past the end the file was mapped at.
+    fm.write_page("t.heap", 0, bytes([2]) * 4096, 4096)
+    fm.write_page("t.heap", 1, bytes([3]) * 4096, 4096)
+    assert view[0] == 2 and fm.view_page("t.heap", 1, 4096)[0] == 3
+    assert len(fm.view_file("t.heap")) == 8192
+    fm.truncate_file("t.heap", 4096)
+    try:
+        fm.view_page("t.heap", 1, 4096)
+    except FileManagerError:
+        pass
+    else:
+        raise AssertionError("read past the end of a truncated file")
+
+    heap = HeapFile(FileManager(tmp_path), "users.heap")
+    rid = heap.insert(b"alice")
+    scan = heap.scan()
+    _, record = next(scan)
+    heap.update(rid, b"bob")
+    # Scanned records are views into a copy of the page, not the page itself.
+    assert isinstance(record, memoryview) and record == b"alice"
+
+
+def test_table_manager_reloads_rows(tmp_path):
+    db_path = str(tmp_path / "data.db")
+    tm = TableManager(db_path=db_path)
+    tm.create_table("users", [Column("id", "INT", primary_key=True), Column("name", "STRING")])
+    tm.insert_row("users", {"id": 1, "name": "Alice"})
+    tm.insert_row("users", {"id": 2, "name": "Bob"})
+    tm.save()
+
+    reloaded = TableManager(db_path=db_path)
+    assert reloaded.list_tables() == ["users"]
+    assert [row for _, row in reloaded.scan("users")] == [
+        {"id": 1, "name": "Alice"},
+        {"id": 2, "name": "Bob"},
+    ]
+
+
+def test_table_manager_migrates_a_pickled_catalog(tmp_path):
+    # Catalogs pickled before UNIQUE: columns without a unique attribute.
+    columns = [Column("id", "INT", primary_key=True), Column("name", "STRING")]
+    for column in columns:
+        del column.unique
+    legacy = TableSchema("users", columns)
+    legacy.data = [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}]
+    db_path = tmp_path / "data.db"
+    with open(db_path, "wb") as f:
+        pickle.dump({"users": legacy}, f)
+
+    tm = TableManager(db_path=str(db_path))
+    assert tm.get_table_schema("users").get_primary_key_column().name == "id"
+    tm.close()
+    reloaded = TableManager(db_path=str(db_path))
+    assert [row for _, row in reloaded.scan("users")] == legacy.data
+    reloaded.close()
+
+
+def test_binary_rows_round_trip_and_fall_back_to_json(tmp_path):
+    columns = [Column("id", "INT"), Column("name", "STRING"), Column("score", "FLOAT"), Column("ok", "BOOL")]
+    codec = RowCodec(columns)
+    row = {"id": -7, "name": "Zoë", "score": 2.5, "ok": False}
+    data = Serializer.serialize_row(row, codec)
+    assert data[0] == ROW_MAGIC and len(data) < len(Serializer.serialize(row))
+    assert Serializer.deserialize_row(data, codec) == row
+    nulls = {"id": 1, "name": None, "score": None, "ok": None}
+    assert Serializer.deserialize_row(Serializer.serialize_row(nulls, codec), codec) == nulls
+    # Rows that do not fit the schema exactly keep their JSON form.
+    for odd in ({"id": 1.5, "name": "a", "score": 1.0, "ok": True}, {"id": 1, "name": "a", "score": 1, "ok": True},
+                {"id": 1, "name": "a"}, {"id": 1, "name": "a", "score": 1.0, "ok": True, "extra": 1},
+                {"id": 2 ** 70, "name": "big", "score": 1.0, "ok": True}):
+        assert Serializer.deserialize_row(Serializer.serialize_row(odd, codec), codec) == odd
+    assert Serializer.serialize_row({"id": -2 ** 63 - 1, "name": "", "score": 0.0, "ok": True}, codec)[:1] == b"{"
+
+    # A database written with JSON rows reads back after switching to binary.
+    db_path = str(tmp_path / "data.db")
+    tm = TableManager(db_path=db_path, row_format="json")
+    tm.create_table("t", columns)
+    tm.insert_row("t", row)
+    tm.close()
+    tm = TableManager(db_path=db_path)
+    tm.insert_row("t", nulls)
+    tm.insert_row("t", {"id": 2 ** 70, "name": "big", "score": 0.5, "ok": True})
+    assert [r for _, r in tm.scan("t")] == [row, nulls, {"id": 2 ** 70, "name": "big", "score": 0.5, "ok": True}]
+
+
+def test_wal_redoes_committed_pages_after_crash(tmp_path):
+    db_path = str(tmp_path / "data.db")
+    tm = TableManager(db_path=db_path)
+    tm.create_table("users", [Column("id", "INT", primary_key=True), Column("name", "STRING")])
+    tm.insert_row("users", {"id": 1, "name": "Alice"})
+    tm.commit()
+    # No checkpoint: the data file still has no pages, only the log has them.
+    assert tm.file_manager.page_count("users.heap") == 0
+
+    recovered = TableManager(db_path=db_path)
+    assert [row for _, row in recovered.scan("users")] == [{"id": 1, "name": "Alice"}]
+    assert recovered.wal.size() == 0
+
+
+def test_wal_ignores_torn_tail(tmp_path):
+    wal = WriteAheadLog(tmp_path / "wal.log")
+    wal.log_page(tmp_path / "t.heap", 0, bytes(Page(0).data))
+    wal.commit()
+    wal.close()
+    with open(tmp_path / "wal.log", "ab") as f:
+        f.write(b"\x01\x02\x03partial-record")
+
+    reopened = WriteAheadLog(tmp_path / "wal.log")
+    assert [kind for _, kind, _ in reopened.records()] == [WriteAheadLog.PAGE, WriteAheadLog.COMMIT]
+
+
+def test_group_commit_shares_fsyncs(tmp_path):
+    wal = WriteAheadLog(tmp_path / "wal.log", group_commit=True, group_commit_delay=0.01)
+    threads = [threading.Thread(target=wal.commit) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wal.close()
+
+    assert wal.commits == 8
+    assert wal.fsyncs < 8
+    assert wal.durable_lsn == 8
+
+
+def test_record_manager_rejects_duplicate_keys():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        rm = RecordManager(base_path=tmpdir)
+        rm.insert("users", {"id": 1, "email": "a@x"}, primary_key_col="id", unique_cols=["email"])
+        rm.insert("users", {"id": 2, "email": None}, primary_key_col="id", unique_cols=["email"])
+
+        for row in ({"id": 1, "email": "b@x"}, {"id": 3, "email": "a@x"}):
+            try:
+                rm.insert("users", row, primary_key_col="id", unique_cols=["email"])
+            except ValueError as e:
+                assert "Duplicate" in str(e)
+            else:
+                raise AssertionError(f"duplicate accepted: {row}")
+
+        rm.delete_where("users", lambda r: r["id"] == 1)
+        rm.insert("users", {"id": 1, "email": "a@x"}, primary_key_col="id", unique_cols=["email"])
+        assert len(rm.select_all("users")) == 2
+        rm.close()
+
+
+def test_record_manager_appends_to_a_log_and_compacts(tmp_path):
+    with open(tmp_path / "legacy.json", "w") as f:
+        f.write('[{"id": 1}, {"id": 2}]')
+    rm = RecordManager(base_path=str(tmp_path), compact_interval=None, min_garbage=4)
+    assert rm.select_all("legacy") == [{"id": 1}, {"id": 2}]
+    assert not (tmp_path / "legacy.json").exists()
+
+    path = tmp_path / "users.log"
+    rm.insert_many("users", [{"id": i, "name": f"u{i}"} for i in range(6)])
+    size = path.stat().st_size
+    rm.insert("users", {"id": 6, "name": "u6"})
+    with open(path, "rb") as f:
+        head = f.read(size)
+        tail = f.read()
+    assert len(head) == size and tail == b'[6,{"id":6,"name":"u6"}]\n'
+
+    assert rm.update_where("users", lambda r: r["id"] < 2, {"name": "new"}) == 2
+    assert rm.delete_where("users", lambda r: r["id"] == 3) == 1
+    assert path.read_bytes().endswith(b'[0,{"id":0,"name":"new"}]\n[1,{"id":1,"name":"new"}]\n[3]\n')
+    expected = [{"id": 0, "name": "new"}, {"id": 1, "name": "new"}, {"id": 2, "name": "u2"},
+                {"id": 4, "name": "u4"}, {"id": 5, "name": "u5"}, {"id": 6, "name": "u6"}]
+
+    # A write cut short leaves a partial line, which is skipped and then overwritten.
+    with open(path, "ab") as f:
+        f.write(b'[7,{"id":')
+    other = RecordManager(base_path=str(tmp_path), compact_interval=None)
+    assert other.select_all("users") == expected
+    other.close()
+
+    assert rm.compact_all() == 0
+    assert rm.compact("users") == 4
+    assert len(path.read_bytes().splitlines()) == 6
+    rm.insert("users", {"id": 7, "name": "u7"})
+    reopened = RecordManager(base_path=str(tmp_path), compact_interval=None)
+    assert reopened.select_all("users") == expected + [{"id": 7, "name": "u7"}]
+    reopened.close()
+    rm.close()
+
+
+def test_column_file_encodes_chunks_by_type_and_reopens(tmp_path):
+    fm = FileManager(tmp_path)
+    columns = [("id", "INT"), ("score", "FLOAT"), ("ok", "BOOL"), ("city", "STRING"), ("name", "STRING")]
+    cols = ColumnFile(fm, "t.cols", columns, BufferPool(), group_rows=100)
+    for i in range(250):
+        cols.insert({"id": i, "score": None if i % 10 == 0 else i / 4, "ok": i % 2 == 0,
+                     "city": ["oslo", "rome", None][i % 3], "name": f"n{i}"}, xmin=0)
+    cols.set_xmax(3, 7)
+    for rid in range(100, 200):
+        cols.delete(rid)
+    cols.flush()
+
+    cols = ColumnFile(fm, "t.cols", columns, BufferPool())
+    assert cols.group_rows == 100 and cols.rows == 250
+    assert [cols._read_chained(cols.directory[c], cols.CHUNK)[0][0] for c in range(2, 7)] == \
+        [PLAIN, PLAIN, PLAIN, DICTIONARY, OFFSETS]
+    assert cols.read(3) == (0, 7, {"id": 3, "score": 0.75, "ok": False, "city": "oslo", "name": "n3"})
+    assert cols.read(150) is None
+    # The chunks of a group with every row removed are given back.
+    assert cols.directory[cols.width + 2] == 0
+
+    groups = list(cols.scan(["id", "score"], lambda xmin, xmax: not xmax))
+    assert [len(rids) for rids, _, _, _ in groups] == [99, 50]
+    vectors = groups[1][3]
+    assert isinstance(vectors["id"], array) and list(vectors["id"]) == list(range(200, 250))
+    assert vectors["score"][0] is None and vectors["score"][1] == 50.25
+    assert cols.vacuum(horizon=8) == 1 and cols.count() == 149